@@ -7,7 +7,7 @@ db = SQLAlchemy()
 login = LoginManager()
 login.login_view = "routes.login"
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
     
     # Configuration
@@ -30,11 +30,97 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['WTF_CSRF_ENABLED'] = True
     app.config['WTF_CSRF_SECRET_KEY'] = os.environ.get("CSRF_SECRET_KEY", "csrf-secret-key-change-in-production")
+
+    # Cache des identités utilisateur (par worker)
+    app.config['USER_CACHE_SIZE'] = int(os.environ.get("USER_CACHE_SIZE", 1024))
+    app.config['USER_CACHE_TTL'] = int(os.environ.get("USER_CACHE_TTL", 300))
+
+    # Hachage des mots de passe : paramétrage et contrôle d'admission
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    app.config['HASH_CONCURRENCY'] = int(os.environ.get("HASH_CONCURRENCY", 2))
+    app.config['HASH_QUEUE_DEPTH'] = int(os.environ.get("HASH_QUEUE_DEPTH", 8))
+    app.config['HASH_TIMEOUT'] = float(os.environ.get("HASH_TIMEOUT", 5))
+
+    # Fichiers des documents : hors de static/, servis après authentification
+    app.config['DOCUMENTS_FOLDER'] = os.environ.get("DOCUMENTS_FOLDER", os.path.join(app.instance_path, "documents"))
+
+    # Tâches de fond : threads (E/S) et processus (calcul) par worker
+    app.config['JOBS_ASYNC'] = os.environ.get("JOBS_ASYNC", "1") != "0"
+    app.config['JOBS_THREADS'] = int(os.environ.get("JOBS_THREADS", 4))
+    app.config['JOBS_PROCESSES'] = int(os.environ.get("JOBS_PROCESSES", 2))
+    app.config['JOBS_FOLDER'] = os.environ.get("JOBS_FOLDER", os.path.join(app.instance_path, "jobs"))
+
+    # Pool de connexions (PostgreSQL, par worker) et verrous SQLite
+    app.config['DB_POOL_SIZE'] = int(os.environ.get("DB_POOL_SIZE", 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get("DB_MAX_OVERFLOW", 5))
+    app.config['DB_POOL_TIMEOUT'] = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    app.config['DB_STATEMENT_TIMEOUT'] = int(os.environ.get("DB_STATEMENT_TIMEOUT", 0))
+    app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))
+
+    # Métriques Prometheus : dossier partagé par les workers (gunicorn.conf.py)
+    app.config['METRICS_FOLDER'] = os.environ.get("METRICS_FOLDER")
+    app.config['METRICS_TOKEN'] = os.environ.get("METRICS_TOKEN")
+    app.config['METRICS_FLUSH_SECONDS'] = float(os.environ.get("METRICS_FLUSH_SECONDS", 1))
+
+    # Requêtes SQL lentes (toujours) et répétées (N+1, requêtes échantillonnées)
+    app.config['QUERY_SLOW_MS'] = float(os.environ.get("QUERY_SLOW_MS", 250))
+    app.config['QUERY_PROFILE_SAMPLE'] = float(os.environ.get("QUERY_PROFILE_SAMPLE", 0.01))
+    app.config['QUERY_REPEAT_THRESHOLD'] = int(os.environ.get("QUERY_REPEAT_THRESHOLD", 5))
+
+    # Surcharge de configuration (tests)
+    if test_config:
+        app.config.update(test_config)
     
+    # Profil du moteur selon la base (pool PostgreSQL, pragmas SQLite)
+    from app import database
+    database.configure(app)
     db.init_app(app)
+    database.init_app(app)
     login.init_app(app)
 
+    # Latence par route, requêtes SQL par requête, N+1 et requêtes lentes (/metrics)
+    from app import metrics, query_profiler
+    metrics.init_app(app)
+    query_profiler.init_app(app)
+
+    from app import hashing, user_cache
+    user_cache.init_app(app)
+    hashing.init_app(app)
+
     from app import routes
     app.register_blueprint(routes.bp)
 
+    # CSS et JS des pages, à empreinte et mis en cache un an (/assets/...)
+    from app import assets
+    assets.init_app(app)
+
+    # Commande CLI d'initialisation de la base (flask --app wsgi bootstrap)
+    from app import bootstrap
+    bootstrap.init_app(app)
+
+    # Statistiques du tableau de bord (flask --app wsgi summary-reconcile)
+    from app import summary
+    summary.init_app(app)
+
+    # Contours des districts (flask --app wsgi districts-import / districts-assign)
+    from app import spatial
+    spatial.init_app(app)
+
+    # Nettoyage des documents (flask --app wsgi documents-gc)
+    from app import documents
+    documents.init_app(app)
+
+    # Tâches de fond (flask --app wsgi jobs-run / jobs-purge)
+    from app import jobs
+    jobs.init_app(app)
+
+    # Index plein texte des documents (flask --app wsgi documents-index)
+    from app import search
+    search.init_app(app)
+
+    # Jeu de données synthétique à grande échelle (flask --app wsgi synthetic-data)
+    from app import synthetic
+    synthetic.init_app(app)
+
     return app
\ No newline at end of file
@@ -0,0 +1,359 @@
+"""Analytics IA : détection d'anomalies budget / délai et recommandations.
+
+Tous les calculs sont vectorisés (opérations de colonnes NumPy / pandas,
+``np.select`` pour les recommandations) et le résultat est mis en cache par
+version des données : une page vue sur des données inchangées ne recalcule
+rien.
+
+Sur la base, :func:`scan_anomalies` lit les projets par blocs (curseur côté
+serveur sur PostgreSQL) et fusionne des résultats partiels de taille fixe :
+la mémoire reste bornée quelle que soit la taille de l'historique.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from app import db
+from app.http_cache import collection_state
+from app.models import Projet
+
+# Seuil de dépassement (10 %) au-delà duquel un écart est une anomalie
+SEUIL_DEPASSEMENT = 1.1
+
+RECO_BUDGET = "Réduire budget futur ou reporter fonds"
+RECO_DELAI = "Allouer ressources supplémentaires"
+RECO_AUCUNE = "Aucune action nécessaire"
+
+# Données fictives pour les projets (à remplacer par la base)
+PROJECTS_DATA = [
+    {
+        "id": 1,
+        "nom": "Projet A",
+        "budget": 500000,
+        "executed": 520000,
+        "delai": 30,
+        "delai_real": 40,
+    },
+    {
+        "id": 2,
+        "nom": "Projet B",
+        "budget": 300000,
+        "executed": 250000,
+        "delai": 20,
+        "delai_real": 18,
+    },
+    {
+        "id": 3,
+        "nom": "Projet C",
+        "budget": 400000,
+        "executed": 600000,
+        "delai": 25,
+        "delai_real": 50,
+    },
+]
+# À incrémenter à chaque modification de PROJECTS_DATA
+PROJECTS_DATA_VERSION = 1
+
+SCAN_CHUNKSIZE = 50_000
+# Nombre d'anomalies détaillées conservées (les plus fortes)
+SCAN_TOP = 100
+
+
+def detect_anomalies(df, seuil=SEUIL_DEPASSEMENT):
+    """Ajoute les colonnes ``anomalie_budget`` et ``anomalie_delai`` à ``df``."""
+    df["anomalie_budget"] = df["executed"].to_numpy() > df["budget"].to_numpy() * seuil
+    df["anomalie_delai"] = df["delai_real"].to_numpy() > df["delai"].to_numpy() * seuil
+    return df
+
+
+def recommander(df):
+    """Recommandation par projet, calculée en une passe avec ``np.select``."""
+    budget = df["anomalie_budget"].to_numpy()
+    delai = df["anomalie_delai"].to_numpy()
+    return np.select(
+        [delai, budget],
+        [RECO_DELAI, RECO_BUDGET],
+        default=RECO_AUCUNE,
+    )
+
+
+def analyse(df):
+    """Renvoie ``(anomalies, recommandations)`` pour un DataFrame de projets."""
+    df = detect_anomalies(df)
+    df["recommandation"] = recommander(df)
+    anomalies = df[df["anomalie_budget"].to_numpy() | df["anomalie_delai"].to_numpy()]
+    return anomalies, df["recommandation"]
+
+
+class AnalysisCache:
+    """Résultats d'analyse mémorisés par version des données (par worker)."""
+
+    def __init__(self, maxsize=4):
+        self.maxsize = maxsize
+        self._results = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, version, compute):
+        with self._lock:
+            if version in self._results:
+                self.hits += 1
+                return self._results[version]
+        result = compute()
+        with self._lock:
+            self.misses += 1
+            self._results[version] = result
+            while len(self._results) > self.maxsize:
+                self._results.pop(next(iter(self._results)))
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+cache = AnalysisCache()
+
+
+def _analyse_records(records):
+    anomalies, recommandations = analyse(pd.DataFrame.from_records(records))
+    return {
+        "anomalies": anomalies.to_dict(orient="records"),
+        "recommandations": recommandations.tolist(),
+    }
+
+
+def _projects_query():
+    return select(
+        Projet.id,
+        Projet.nom,
+        Projet.montant_prevu.label("budget"),
+        Projet.montant_execute.label("executed"),
+        Projet.delai_prevu.label("delai"),
+        Projet.delai_reel.label("delai_real"),
+    ).where(
+        Projet.montant_prevu.is_not(None),
+        Projet.montant_execute.is_not(None),
+        Projet.delai_prevu.is_not(None),
+        Projet.delai_reel.is_not(None),
+    )
+
+
+def _ecart(df):
+    # Dépassement relatif le plus fort (budget ou délai), pour classer
+    with np.errstate(divide="ignore", invalid="ignore"):
+        budget = df["executed"].to_numpy() / df["budget"].to_numpy()
+        delai = df["delai_real"].to_numpy() / df["delai"].to_numpy()
+    return np.fmax(budget, delai)
+
+
+class ScanAccumulator:
+    """Agrégats et top des anomalies, fusionnés bloc par bloc."""
+
+    def __init__(self, top=SCAN_TOP):
+        self.top = top
+        self.total = 0
+        self.anomalies_budget = 0
+        self.anomalies_delai = 0
+        self.anomalies_total = 0
+        self.budget_total = 0
+        self.execute_total = 0
+        self.depassement_total = 0
+        self._worst = None
+
+    def add(self, chunk):
+        chunk = detect_anomalies(chunk)
+        budget = chunk["anomalie_budget"].to_numpy()
+        delai = chunk["anomalie_delai"].to_numpy()
+        flagged = budget | delai
+
+        self.total += len(chunk)
+        self.anomalies_budget += int(budget.sum())
+        self.anomalies_delai += int(delai.sum())
+        self.anomalies_total += int(flagged.sum())
+        self.budget_total += int(chunk["budget"].sum())
+        self.execute_total += int(chunk["executed"].sum())
+        ecart = chunk["executed"].to_numpy() - chunk["budget"].to_numpy()
+        self.depassement_total += int(np.clip(ecart, 0, None).sum())
+
+        anomalies = chunk[flagged].copy()
+        if anomalies.empty:
+            return
+        anomalies["ecart"] = _ecart(anomalies)
+        if self._worst is not None:
+            anomalies = pd.concat([self._worst, anomalies], ignore_index=True)
+        self._worst = anomalies.nlargest(self.top, "ecart")
+
+    def result(self):
+        worst = self._worst
+        if worst is None:
+            anomalies, recommandations = [], []
+        else:
+            worst = worst.drop(columns="ecart")
+            recommandations = recommander(worst).tolist()
+            anomalies = worst.to_dict(orient="records")
+        return {
+            "total_projets": self.total,
+            "anomalies_budget": self.anomalies_budget,
+            "anomalies_delai": self.anomalies_delai,
+            "anomalies_total": self.anomalies_total,
+            "budget_total": self.budget_total,
+            "execute_total": self.execute_total,
+            "depassement_total": self.depassement_total,
+            "anomalies": anomalies,
+            "recommandations": recommandations,
+        }
+
+
+def scan_anomalies(chunksize=SCAN_CHUNKSIZE, top=SCAN_TOP):
+    """Parcourt les projets de la base par blocs de ``chunksize`` lignes."""
+    accumulator = ScanAccumulator(top)
+    with db.engine.connect() as connection:
+        connection = connection.execution_options(
+            stream_results=True, max_row_buffer=chunksize
+        )
+        for chunk in pd.read_sql(_projects_query(), connection, chunksize=chunksize):
+            accumulator.add(chunk)
+    return accumulator.result()
+
+
+def analyse_projets():
+    """Analyse des projets, recalculée seulement quand les données changent.
+
+    Les projets de la base disposant d'un suivi d'exécution sont analysés par
+    blocs ; à défaut, les données de démonstration sont utilisées.
+    """
+    version, _ = collection_state("projets")
+    resultat = cache.get_or_compute(("projets", version), scan_anomalies)
+    if resultat["total_projets"]:
+        return resultat
+    return cache.get_or_compute(
+        ("projects_data", PROJECTS_DATA_VERSION),
+        lambda: _analyse_records(PROJECTS_DATA),
+    )
+
+
+# -----------------------------
+# Détecteurs statistiques (z-score robuste, IQR, centile par catégorie)
+# -----------------------------
+METRIQUES = {
+    "budget": ("executed", "budget"),
+    "delai": ("delai_real", "delai"),
+}
+GROUPES = ("type_projet", "district")
+GROUPE_INCONNU = "Non renseigné"
+
+
+class DetectorError(ValueError):
+    """Paramètre de détection invalide (méthode, métrique, groupe, seuil)."""
+
+
+def _ratio(df, metrique):
+    realise, prevu = METRIQUES[metrique]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valeurs = df[realise].to_numpy(dtype=float) / df[prevu].to_numpy(dtype=float)
+    valeurs[~np.isfinite(valeurs)] = np.nan
+    return pd.Series(valeurs, index=df.index)
+
+
+def detect_ratio(valeurs, groupes, seuil=SEUIL_DEPASSEMENT):
+    # Méthode historique : dépassement fixe du prévu
+    return valeurs > seuil, valeurs
+
+
+def detect_zscore(valeurs, groupes, seuil=3.5):
+    # z-score robuste : 0,6745 × (x − médiane) / MAD, par groupe
+    grouped = valeurs.groupby(groupes, sort=False)
+    mediane = grouped.transform("median")
+    ecart = (valeurs - mediane).abs()
+    mad = ecart.groupby(groupes, sort=False).transform("median")
+    score = 0.6745 * (valeurs - mediane) / mad.where(mad > 0)
+    return score.abs() > seuil, score
+
+
+def detect_iqr(valeurs, groupes, seuil=1.5):
+    # Hors des moustaches de Tukey : [Q1 − k·IQR, Q3 + k·IQR]
+    grouped = valeurs.groupby(groupes, sort=False)
+    q1 = grouped.transform("quantile", 0.25)
+    q3 = grouped.transform("quantile", 0.75)
+    iqr = (q3 - q1).where(q3 > q1)
+    score = np.fmax((valeurs - q3) / iqr, (q1 - valeurs) / iqr)
+    return score > seuil, score
+
+
+def detect_percentile(valeurs, groupes, seuil=0.95):
+    # Au-delà du centile ``seuil`` de sa catégorie
+    if not 0 < seuil < 1:
+        raise DetectorError("Le seuil du centile doit être compris entre 0 et 1")
+    rang = valeurs.groupby(groupes, sort=False).rank(pct=True)
+    return rang > seuil, rang
+
+
+DETECTEURS = {
+    "ratio": detect_ratio,
+    "zscore": detect_zscore,
+    "iqr": detect_iqr,
+    "percentile": detect_percentile,
+}
+
+
+def check_parameters(methode, metrique, groupe):
+    if methode not in DETECTEURS:
+        raise DetectorError(f"Méthode inconnue : {methode}")
+    if metrique not in METRIQUES:
+        raise DetectorError(f"Métrique inconnue : {metrique}")
+    if groupe not in GROUPES:
+        raise DetectorError(f"Regroupement inconnu : {groupe}")
+
+
+def detect(df, methode="zscore", metrique="budget", groupe="type_projet", seuil=None):
+    """Applique un détecteur à tout le portefeuille en une passe vectorisée.
+
+    Renvoie un DataFrame des projets signalés, trié par score décroissant,
+    avec les colonnes ``groupe``, ``valeur`` et ``score``.
+    """
+    check_parameters(methode, metrique, groupe)
+
+    valeurs = _ratio(df, metrique)
+    groupes = df[groupe].fillna(GROUPE_INCONNU)
+    kwargs = {} if seuil is None else {"seuil": seuil}
+    flags, score = DETECTEURS[methode](valeurs, groupes, **kwargs)
+
+    resultat = df.loc[flags.fillna(False).to_numpy(), ["id", "nom"]].copy()
+    resultat["groupe"] = groupes[resultat.index]
+    resultat["valeur"] = valeurs[resultat.index].round(4)
+    resultat["score"] = score[resultat.index].round(4)
+    return resultat.sort_values("score", ascending=False, kind="stable")
+
+
+def charger_portefeuille():
+    """Charge les colonnes utiles de tous les projets suivis (une requête)."""
+    query = _projects_query().add_columns(Projet.type_projet, Projet.district)
+    with db.engine.connect() as connection:
+        return pd.read_sql(query, connection)
+
+
+def anomalies_portefeuille(methode, metrique, groupe, seuil=None):
+    """Détection mise en cache par version de la collection des projets."""
+    version, _ = collection_state("projets")
+    return cache.get_or_compute(
+        ("detection", version, methode, metrique, groupe, seuil),
+        lambda: detect(charger_portefeuille(), methode, metrique, groupe, seuil),
+    )
+
+
+def anomalies_job(ctx, methode, metrique, groupe, seuil, limit):
+    """Travail de fond ``analytics.anomalies`` : détection dans un processus."""
+    ctx.progress(10, "Chargement du portefeuille", force=True)
+    df = charger_portefeuille()
+    ctx.progress(40, f"Détection sur {len(df)} projets", force=True)
+    anomalies = ctx.cpu(detect, df, methode, metrique, groupe, seuil)
+    return {
+        "method": methode,
+        "count": len(anomalies),
+        "anomalies": anomalies.head(limit).to_dict(orient="records"),
+    }
@@ -0,0 +1,119 @@
+"""Feuilles de style et scripts des pages, servis sous un nom à empreinte.
+
+Les gros gabarits (tableau de bord, paramètres, cartographie, documents)
+référencent leurs CSS et JS par ``{{ asset_url('index.css') }}`` au lieu de
+les embarquer : une page ne transporte plus que son HTML dynamique.
+
+Chaque paquet (fichiers de ``static/`` concaténés) est lu au premier usage et
+nommé d'après l'empreinte SHA-256 de son contenu (``index.3f9a1c2b4d5e.css``).
+Le nom change avec le contenu : la réponse peut donc être mise en cache un an
+(``immutable``), sans revalidation. Les paquets restent en mémoire, compressés
+une fois pour toutes en gzip, et sont servis par ``/assets/`` : aucune étape
+de construction ni écriture sur disque (système de fichiers en lecture seule
+sur Vercel). En mode debug, un fichier source modifié est relu aussitôt.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import namedtuple
+
+from flask import abort, current_app, request, url_for
+
+# Paquet -> fichiers sources (relatifs à static/), concaténés dans l'ordre
+BUNDLES = {
+    "index.css": ("css/index.css",),
+    "index.js": ("js/index.js",),
+    "parametres.css": ("css/parametres.css",),
+    "parametres.js": ("js/parametres.js",),
+    "cartographie.css": ("css/cartographie.css",),
+    "cartographie.js": ("js/cartographie.js",),
+    "documents.css": ("css/documents.css",),
+    "documents.js": ("js/documents.js",),
+}
+
+# Un an : le nom du fichier change avec son contenu
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+Bundle = namedtuple("Bundle", "fichier empreinte contenu gzip mimetype")
+
+_state = {"bundles": {}, "sources": {}}
+_lock = threading.Lock()
+
+
+def _sources_state(static_folder, nom):
+    # Dates de modification des sources (rechargement en mode debug)
+    return tuple(
+        os.stat(os.path.join(static_folder, source)).st_mtime_ns
+        for source in BUNDLES[nom]
+    )
+
+
+def build(static_folder, nom):
+    """Concatène les sources du paquet ``nom`` et calcule son empreinte."""
+    morceaux = []
+    for source in BUNDLES[nom]:
+        with open(os.path.join(static_folder, source), "rb") as fichier:
+            morceaux.append(fichier.read())
+    contenu = b"\n".join(morceaux)
+    empreinte = hashlib.sha256(contenu).hexdigest()[:12]
+    base, extension = os.path.splitext(nom)
+    return Bundle(
+        fichier=f"{base}.{empreinte}{extension}",
+        empreinte=empreinte,
+        contenu=contenu,
+        gzip=gzip.compress(contenu, compresslevel=9, mtime=0),
+        mimetype=mimetypes.guess_type(nom)[0] or "application/octet-stream",
+    )
+
+
+def bundle(nom):
+    """Paquet ``nom``, construit au premier usage (puis à chaque modification en
+    mode debug)."""
+    if nom not in BUNDLES:
+        raise KeyError(f"Paquet inconnu : {nom}")
+    static_folder = current_app.static_folder
+    etat = _sources_state(static_folder, nom) if current_app.debug else None
+    paquet = _state["bundles"].get(nom)
+    if paquet is not None and _state["sources"].get(nom) == etat:
+        return paquet
+    with _lock:
+        paquet = _state["bundles"][nom] = build(static_folder, nom)
+        _state["sources"][nom] = etat
+    return paquet
+
+
+def asset_url(nom):
+    """URL à empreinte du paquet ``nom`` (pendant de ``url_for('static', ...)``)."""
+    return url_for("assets", filename=bundle(nom).fichier)
+
+
+def _serve(filename):
+    base, _, reste = filename.partition(".")
+    empreinte, _, extension = reste.rpartition(".")
+    nom = f"{base}.{extension}"
+    if not empreinte or nom not in BUNDLES:
+        abort(404)
+    paquet = bundle(nom)
+
+    compresse = "gzip" in request.headers.get("Accept-Encoding", "")
+    response = current_app.response_class(
+        paquet.gzip if compresse else paquet.contenu, mimetype=paquet.mimetype
+    )
+    if compresse:
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    response.set_etag(paquet.empreinte)
+    if empreinte == paquet.empreinte:
+        response.headers["Cache-Control"] = IMMUTABLE
+    else:
+        # Page rendue avant un déploiement : contenu actuel, sans cache durable
+        response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
+def init_app(app):
+    app.add_url_rule("/assets/<path:filename>", "assets", _serve)
+    app.add_template_global(asset_url)
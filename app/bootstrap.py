@@ -0,0 +1,65 @@
+"""Initialisation unique de la base : ``flask --app wsgi bootstrap``.
+
+À lancer une fois par déploiement (avant gunicorn), et non plus à l'import
+de chaque worker : les workers démarrent ainsi sans aucun accès à la base.
+"""
+
+import os
+
+import click
+from flask import current_app
+from werkzeug.security import generate_password_hash
+
+from app import db, summary
+from app.demo_data import seed_demo_data
+from app.models import User
+
+
+def bootstrap_db(seed_demo=True):
+    """Crée les tables manquantes, l'administrateur et les données de démo."""
+    # Créer toutes les tables (sans effet sur les tables existantes)
+    db.create_all()
+    print("✅ Tables créées avec succès")
+
+    if seed_demo:
+        # Données de démonstration (tâches, projets, budgets)
+        seed_demo_data()
+
+    # Statistiques du tableau de bord (initialisées sur une base existante)
+    drift = summary.reconcile(db.session.connection())
+    db.session.commit()
+    print(f"✅ Statistiques du tableau de bord à jour ({len(drift)} correction(s))")
+
+    # Vérifier si l'admin existe déjà
+    if User.query.filter_by(username="admin").first():
+        print("ℹ️  L'utilisateur admin existe déjà")
+        return
+
+    # Récupérer le mot de passe admin depuis les variables d'environnement
+    admin_password = os.getenv("ADMIN_PASSWORD", "admin123")
+    db.session.add(
+        User(
+            username="admin",
+            password=generate_password_hash(
+                admin_password, current_app.config["PASSWORD_HASH_METHOD"]
+            ),
+            role="admin",
+        )
+    )
+    db.session.commit()
+    print("✅ Utilisateur admin créé")
+
+    # Avertissement sécurité
+    if admin_password == "admin123":
+        print("⚠️  ATTENTION : Utilisez un mot de passe plus sécurisé!")
+        print("⚠️  Définissez la variable ADMIN_PASSWORD dans Railway")
+
+
+def init_app(app):
+    @app.cli.command("bootstrap")
+    @click.option(
+        "--sans-demo", is_flag=True, help="Ne pas insérer les données de démo."
+    )
+    def bootstrap_command(sans_demo):
+        """Initialise la base (tables, admin, données de démonstration)."""
+        bootstrap_db(seed_demo=not sans_demo)
@@ -0,0 +1,254 @@
+"""Opérations en lot sur les budgets (création, mise à jour, suppression).
+
+Tout le lot est validé en une passe puis appliqué dans une seule transaction
+avec des INSERT / UPDATE / DELETE en masse. L'existence des identifiants est
+vérifiée à l'application, sur les lignes verrouillées (requêtes ``IN ... FOR
+UPDATE`` groupées) : une suppression concurrente entre validation et
+application rejette le lot au lieu de le faire échouer. Si une opération est
+invalide, rien n'est écrit et chaque erreur est rapportée avec l'index de
+l'opération.
+"""
+
+import re
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, update
+
+from app import db, summary
+from app.models import Budget, touch_collections
+
+MAX_OPERATIONS = 100_000
+# Reste sous la limite de variables liées de SQLite
+IN_CHUNK = 900
+
+REQUIRED_FIELDS = ("nom", "montant", "statut", "date")
+# Champ JSON -> colonne du modèle
+FIELDS = {
+    "nom": "nom",
+    "montant": "montant",
+    "statut": "statut",
+    "date": "date_allocation",
+    "projet_associe": "projet_associe",
+    "description": "description",
+}
+
+
+# Longueur maximale des champs texte (colonnes String du modèle)
+TEXT_LIMITS = {
+    "nom": 200,
+    "montant": 100,
+    "statut": 30,
+    "projet_associe": 200,
+    "description": None,
+}
+_CHIFFRE = re.compile(r"\d")
+
+
+class BatchError(ValueError):
+    """Lot rejeté dans son ensemble (format ou taille)."""
+
+
+class BatchRejected(BatchError):
+    """Identifiants introuvables à l'application ; ``errors`` par opération."""
+
+    def __init__(self, errors):
+        super().__init__("Budget non trouvé")
+        self.errors = errors
+
+
+def _chunks(values, size=IN_CHUNK):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _montant(value):
+    # Texte libre (« 1 200 000 Ariary ») ou entier JSON ; stocké en texte
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    if isinstance(value, str) and _CHIFFRE.search(value):
+        return value
+    raise ValueError("Champ 'montant' numérique requis")
+
+
+def _to_columns(item, dates):
+    values = {}
+    for field, column in FIELDS.items():
+        if field not in item:
+            continue
+        value = item[field]
+        if value is None or value == "":
+            # Colonnes NOT NULL : refusées ici plutôt qu'en base (erreur 500)
+            if field in REQUIRED_FIELDS:
+                raise ValueError(f"Champ '{field}' requis")
+            value = None
+        elif field == "date":
+            # Les lots d'allocation répètent souvent les mêmes dates
+            if value not in dates:
+                try:
+                    dates[value] = datetime.strptime(value, "%Y-%m-%d")
+                except (TypeError, ValueError):
+                    raise ValueError("Date invalide (format AAAA-MM-JJ)")
+            value = dates[value]
+        elif field == "montant":
+            value = _montant(value)
+        elif not isinstance(value, str):
+            raise ValueError(f"Champ '{field}' : texte attendu")
+        limite = TEXT_LIMITS.get(field)
+        if limite and isinstance(value, str) and len(value) > limite:
+            raise ValueError(f"Champ '{field}' trop long ({limite} caractères max.)")
+        values[column] = value
+    return values
+
+
+def validate(operations):
+    """Valide le lot ; renvoie ``(creates, updates, deletes, errors)``.
+
+    ``creates`` et ``updates`` sont des listes de ``(index, colonnes)``,
+    ``deletes`` une liste de ``(index, id)`` et ``errors`` une liste de
+    résultats d'erreur par opération.
+    """
+    if not isinstance(operations, list):
+        raise BatchError("Le champ 'operations' doit être une liste")
+    if len(operations) > MAX_OPERATIONS:
+        raise BatchError(f"Lot trop volumineux (maximum {MAX_OPERATIONS} opérations)")
+
+    creates, updates, deletes, errors = [], [], [], []
+    dates = {}
+    touched = {}
+
+    for index, item in enumerate(operations):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": "Opération invalide"})
+            continue
+        op = item.get("op")
+        try:
+            if op == "create":
+                missing = [key for key in REQUIRED_FIELDS if not item.get(key)]
+                if missing:
+                    raise ValueError(f"Données manquantes : {', '.join(missing)}")
+                creates.append((index, _to_columns(item, dates)))
+                continue
+
+            if op not in ("update", "delete"):
+                raise ValueError("Champ 'op' invalide (create, update ou delete)")
+            budget_id = item.get("id")
+            if not isinstance(budget_id, int) or isinstance(budget_id, bool):
+                raise ValueError("Champ 'id' entier requis")
+            if budget_id in touched:
+                raise ValueError(
+                    f"Budget {budget_id} déjà modifié par l'opération "
+                    f"{touched[budget_id]}"
+                )
+            touched[budget_id] = index
+
+            if op == "update":
+                values = _to_columns(item, dates)
+                if not values:
+                    raise ValueError("Aucun champ à mettre à jour")
+                values["id"] = budget_id
+                updates.append((index, values))
+            else:
+                deletes.append((index, budget_id))
+        except ValueError as e:
+            errors.append({"index": index, "op": op, "error": str(e)})
+
+    return creates, updates, deletes, errors
+
+
+def _tracked_values(cibles):
+    """Valeurs en base (statut, montant) des lignes modifiées ou supprimées.
+
+    ``cibles`` est une liste de ``(index, op, id)``. Les lignes restent
+    verrouillées jusqu'à la fin de la transaction (PostgreSQL) ; un identifiant
+    disparu depuis la validation lève :class:`BatchRejected`.
+    """
+    values = {}
+    for chunk in _chunks(budget_id for _, _, budget_id in cibles):
+        rows = db.session.execute(
+            select(Budget.id, Budget.statut, Budget.montant)
+            .where(Budget.id.in_(chunk))
+            .with_for_update()
+        )
+        values.update(
+            (row.id, {"statut": row.statut, "montant": row.montant}) for row in rows
+        )
+    errors = [
+        {"index": index, "op": op, "id": budget_id, "error": "Budget non trouvé"}
+        for index, op, budget_id in cibles
+        if budget_id not in values
+    ]
+    if errors:
+        raise BatchRejected(sorted(errors, key=lambda error: error["index"]))
+    return values
+
+
+def _summary_deltas(creates, updates, deletes):
+    """Incréments des statistiques du tableau de bord pour le lot."""
+    deltas = Counter()
+    for _, values in creates:
+        summary.add_row(deltas, Budget, values)
+
+    anciens = _tracked_values(
+        [(index, "update", values["id"]) for index, values in updates]
+        + [(index, "delete", budget_id) for index, budget_id in deletes]
+    )
+    for _, values in updates:
+        if "statut" in values or "montant" in values:
+            ancien = anciens[values["id"]]
+            summary.add_row(deltas, Budget, ancien, -1)
+            summary.add_row(deltas, Budget, {**ancien, **values})
+    for _, budget_id in deletes:
+        summary.add_row(deltas, Budget, anciens[budget_id], -1)
+    return deltas
+
+
+def apply(creates, updates, deletes):
+    """Applique le lot validé dans la transaction courante ; renvoie les résultats.
+
+    Lève :class:`BatchRejected` (rien n'est écrit) si une ligne a disparu.
+    """
+    results = []
+    # Lu et verrouillé avant les écritures : anciennes valeurs des lignes
+    deltas = _summary_deltas(creates, updates, deletes)
+
+    if creates:
+        new_ids = db.session.scalars(
+            insert(Budget).returning(Budget.id, sort_by_parameter_order=True),
+            [values for _, values in creates],
+        ).all()
+        for (index, _), budget_id in zip(creates, new_ids):
+            results.append(
+                {"index": index, "op": "create", "id": budget_id, "status": 201}
+            )
+
+    if updates:
+        # UPDATE en masse par clé primaire, regroupé par jeu de colonnes
+        groups = {}
+        for index, values in updates:
+            groups.setdefault(tuple(sorted(values)), []).append(values)
+        for rows in groups.values():
+            db.session.execute(update(Budget), rows)
+        results.extend(
+            {"index": index, "op": "update", "id": values["id"], "status": 200}
+            for index, values in updates
+        )
+
+    if deletes:
+        for chunk in _chunks(budget_id for _, budget_id in deletes):
+            db.session.execute(delete(Budget).where(Budget.id.in_(chunk)))
+        results.extend(
+            {"index": index, "op": "delete", "id": budget_id, "status": 200}
+            for index, budget_id in deletes
+        )
+
+    # Les écritures en masse ne passent pas par le flush ORM : versions et
+    # statistiques ajustées ici, par incréments (sans recalcul complet)
+    touch_collections(db.session.connection(), ["budgets"])
+    summary.apply_deltas(db.session.connection(), deltas)
+
+    results.sort(key=lambda result: result["index"])
+    return results
@@ -0,0 +1,226 @@
+"""Profils du moteur de base de données et métriques du pool de connexions.
+
+Les options du moteur dépendent de la base désignée par l'URI :
+
+- PostgreSQL : pool borné par worker (``DB_POOL_SIZE`` + ``DB_MAX_OVERFLOW``),
+  attente maximale d'une connexion (``DB_POOL_TIMEOUT``), recyclage des
+  connexions anciennes (``DB_POOL_RECYCLE``, coupées sinon par les proxys) et
+  vérification avant usage (``pool_pre_ping``) après un redémarrage du
+  serveur. Le total ``workers × (taille + débordement)`` doit rester sous le
+  ``max_connections`` du serveur.
+- SQLite : journal WAL (lectures concurrentes d'une écriture),
+  ``synchronous=NORMAL`` (sûr en WAL, sans fsync à chaque transaction) et
+  ``busy_timeout`` pour attendre le verrou d'écriture au lieu d'échouer
+  aussitôt avec « database is locked ». Les pragmas sont appliqués à chaque
+  nouvelle connexion (événement ``connect``).
+
+Le temps d'attente d'une connexion au pool et la saturation sont mesurés par
+worker et exposés par :func:`stats` (``/api/db/pool/stats``).
+"""
+
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app import db
+
+# Bornes (secondes) de l'histogramme des attentes de connexion
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+# -----------------------------
+# Métriques du pool
+# -----------------------------
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.in_use = 0
+            self.peak_in_use = 0
+            self.buckets = [0] * (len(WAIT_BUCKETS) + 1)
+            self._total_wait = 0.0
+            self._max_wait = 0.0
+
+    def observe(self, wait, ok=True):
+        with self._lock:
+            if not ok:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            for i, borne in enumerate(WAIT_BUCKETS):
+                if wait <= borne:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+
+    def returned(self):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def histogram(self):
+        """Compteurs par tranche (non cumulés) et attente totale."""
+        with self._lock:
+            return list(self.buckets), self._total_wait
+
+    def snapshot(self):
+        with self._lock:
+            cumul, histogramme = 0, {}
+            for borne, compte in zip(WAIT_BUCKETS + ("+Inf",), self.buckets):
+                cumul += compte
+                histogramme[str(borne)] = cumul
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "wait_avg_seconds": (
+                    round(self._total_wait / self.checkouts, 6)
+                    if self.checkouts
+                    else 0.0
+                ),
+                "wait_max_seconds": round(self._max_wait, 6),
+                "wait_seconds_total": round(self._total_wait, 6),
+                "wait_histogram": histogramme,
+            }
+
+
+# Compteurs partagés par le worker
+metrics = PoolMetrics()
+
+
+class MeteredQueuePool(QueuePool):
+    """``QueuePool`` qui mesure l'attente d'une connexion libre.
+
+    ``_do_get`` est le point d'extension des implémentations de pool : il
+    couvre l'attente dans la file et l'ouverture d'une nouvelle connexion,
+    mais pas le ``pre_ping`` (mesuré à part par les requêtes elles-mêmes).
+    """
+
+    def _do_get(self):
+        debut = time.perf_counter()
+        try:
+            connexion = super()._do_get()
+        except TimeoutError:
+            metrics.observe(time.perf_counter() - debut, ok=False)
+            raise
+        metrics.observe(time.perf_counter() - debut)
+        return connexion
+
+    def _do_return_conn(self, record):
+        metrics.returned()
+        super()._do_return_conn(record)
+
+
+# -----------------------------
+# Profils du moteur
+# -----------------------------
+def _is_memory(url):
+    return url.database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+
+def engine_options(config):
+    """Options ``create_engine`` adaptées à la base de ``config``."""
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        connect_args = {
+            "connect_timeout": config.get("DB_CONNECT_TIMEOUT", 10),
+            "application_name": config.get("DB_APPLICATION_NAME", "projets"),
+        }
+        if config.get("DB_STATEMENT_TIMEOUT"):
+            connect_args["options"] = (
+                f"-c statement_timeout={int(config['DB_STATEMENT_TIMEOUT'])}"
+            )
+        return {
+            "poolclass": MeteredQueuePool,
+            "pool_size": config.get("DB_POOL_SIZE", 5),
+            "max_overflow": config.get("DB_MAX_OVERFLOW", 5),
+            "pool_timeout": config.get("DB_POOL_TIMEOUT", 10),
+            "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),
+            "pool_pre_ping": True,
+            "connect_args": connect_args,
+        }
+    if backend == "sqlite":
+        # Délai du pilote (secondes), doublé par le pragma busy_timeout
+        options = {
+            "connect_args": {"timeout": config.get("SQLITE_BUSY_TIMEOUT", 5000) / 1000}
+        }
+        if not _is_memory(url):
+            # Base en mémoire : Flask-SQLAlchemy impose un StaticPool
+            options["poolclass"] = MeteredQueuePool
+            options["connect_args"]["check_same_thread"] = False
+        return options
+    return {}
+
+
+def configure(app):
+    """Renseigne ``SQLALCHEMY_ENGINE_OPTIONS`` (avant ``db.init_app``).
+
+    Des options explicites dans la configuration restent prioritaires.
+    """
+    options = engine_options(app.config)
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def _sqlite_pragmas(busy_timeout):
+    def on_connect(dbapi_connection, connection_record):
+        curseur = dbapi_connection.cursor()
+        try:
+            # Sans effet sur une base en mémoire (journal_mode reste "memory")
+            curseur.execute(f"PRAGMA busy_timeout={int(busy_timeout)}")
+            curseur.execute("PRAGMA journal_mode=WAL")
+            curseur.execute("PRAGMA synchronous=NORMAL")
+        finally:
+            curseur.close()
+
+    return on_connect
+
+
+def init_app(app):
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == "sqlite":
+        event.listen(
+            engine,
+            "connect",
+            _sqlite_pragmas(app.config.get("SQLITE_BUSY_TIMEOUT", 5000)),
+        )
+
+
+def stats(engine=None):
+    """Métriques du pool de ce worker (taille, occupation, attentes)."""
+    pool = (engine or db.engine).pool
+    donnees = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        capacite = pool.size() + max(pool._max_overflow, 0)
+        donnees.update(
+            {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "saturation": (
+                    round(pool.checkedout() / capacite, 3)
+                    if pool._max_overflow >= 0
+                    else None
+                ),
+            }
+        )
+    donnees.update(metrics.snapshot())
+    return donnees
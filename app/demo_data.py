@@ -0,0 +1,257 @@
+"""Données de démonstration insérées au premier démarrage (base vide)."""
+
+from datetime import datetime
+
+from app import db
+from app.models import Budget, District, Projet, Site, Tache
+
+DEMO_TASKS = [
+    {
+        "titre": "Préparer rapport annuel",
+        "date_limite": datetime(2025, 9, 10),
+        "statut": "En cours",
+        "priorite": "Haute",
+        "description": "Rapport des activités de l'année 2025",
+        "projet": "Projet Développement Rural",
+        "assignee": "Jean Dupont",
+    },
+    {
+        "titre": "Réunion projet infrastructure",
+        "date_limite": datetime(2025, 9, 12),
+        "statut": "Planifié",
+        "priorite": "Moyenne",
+        "description": "Réunion de coordination pour le projet d'infrastructure",
+        "projet": "Projet Infrastructure Routière",
+        "assignee": "Marie Lambert",
+    },
+    {
+        "titre": "Vérifier budget santé",
+        "date_limite": datetime(2025, 9, 15),
+        "statut": "Terminé",
+        "priorite": "Basse",
+        "description": "Vérification du budget alloué au projet santé",
+        "projet": "Projet Santé Communautaire",
+        "assignee": "Paul Martin",
+    },
+    {
+        "titre": "Commander matériel construction",
+        "date_limite": datetime(2025, 9, 5),
+        "statut": "En cours",
+        "priorite": "Haute",
+        "description": "Commande des matériaux pour la construction de l'école",
+        "projet": "Construction école primaire",
+        "assignee": "Jean Dupont",
+    },
+    {
+        "titre": "Contacter fournisseurs eau",
+        "date_limite": datetime(2025, 9, 8),
+        "statut": "En retard",
+        "priorite": "Moyenne",
+        "description": (
+            "Prise de contact avec les fournisseurs pour le projet eau potable"
+        ),
+        "projet": "Installation eau potable",
+        "assignee": "Marie Lambert",
+    },
+]
+
+DEMO_PROJECTS = [
+    {
+        "nom": "Construction école primaire",
+        "date_debut": datetime(2025, 9, 1),
+        "statut": "En cours",
+        "date_fin": datetime(2025, 12, 15),
+        "budget": "150 000 Ariary",
+        "progression": 65,
+        "description": "Construction d'une école primaire dans le village d'Ankazo",
+        "type_projet": "Éducation",
+        "district": "Fianarantsoa I",
+        "montant_prevu": 150000,
+        "montant_execute": 171000,
+        "delai_prevu": 105,
+        "delai_reel": 110,
+    },
+    {
+        "nom": "Réhabilitation route RN7",
+        "date_debut": datetime(2025, 8, 15),
+        "statut": "Planifié",
+        "date_fin": datetime(2026, 2, 28),
+        "budget": "850 000 Ariary",
+        "progression": 0,
+        "description": "Réhabilitation de 15km de la Route Nationale 7",
+        "type_projet": "Infrastructure",
+        "district": "Lalangina",
+        "montant_prevu": 850000,
+    },
+    {
+        "nom": "Installation eau potable",
+        "date_debut": datetime(2025, 7, 20),
+        "statut": "Terminé",
+        "date_fin": datetime(2025, 10, 5),
+        "budget": "120 000 Ariary",
+        "progression": 100,
+        "description": "Installation de système d'eau potable dans 3 villages",
+        "type_projet": "Eau et assainissement",
+        "district": "Vohibato",
+        "montant_prevu": 120000,
+        "montant_execute": 112000,
+        "delai_prevu": 77,
+        "delai_reel": 95,
+    },
+]
+
+DEMO_BUDGETS = [
+    {
+        "nom": "Budget Développement Rural",
+        "montant": "500 000 Ariary",
+        "statut": "Approuvé",
+        "date_allocation": datetime(2025, 1, 15),
+        "projet_associe": "Projet Développement Rural",
+        "description": "Budget alloué au développement des zones rurales de la région",
+    },
+    {
+        "nom": "Budget Santé Communautaire",
+        "montant": "750 000 Ariary",
+        "statut": "En cours",
+        "date_allocation": datetime(2025, 2, 10),
+        "projet_associe": "Projet Santé Communautaire",
+        "description": "Financement des centres de santé communautaires",
+    },
+    {
+        "nom": "Budget Infrastructure Routière",
+        "montant": "1 200 000 Ariary",
+        "statut": "Planifié",
+        "date_allocation": datetime(2025, 3, 5),
+        "projet_associe": "Projet Infrastructure Routière",
+        "description": "Développement et entretien des routes régionales",
+    },
+]
+
+
+DEMO_SITES = [
+    {
+        "nom": "École Primaire Publique d'Antsirabe",
+        "latitude": -21.45,
+        "longitude": 47.08,
+        "projet": "Construction école",
+        "categorie": "education",
+        "statut": "en-cours",
+        "budget": 150000000,
+        "description": "Construction d'une nouvelle école primaire avec 12 classes",
+        "responsable": "Ministère de l'Éducation",
+        "date_debut": datetime(2024, 1, 15),
+        "date_fin_prevue": datetime(2025, 6, 30),
+        "avancement": 65,
+    },
+    {
+        "nom": "Réhabilitation Route Nationale 7",
+        "latitude": -21.47,
+        "longitude": 47.05,
+        "projet": "Réhabilitation route",
+        "categorie": "infrastructure",
+        "statut": "planifie",
+        "budget": 800000000,
+        "description": "Réhabilitation de 15 km de route nationale",
+        "responsable": "Ministère des Travaux Publics",
+        "date_debut": datetime(2025, 3, 1),
+        "date_fin_prevue": datetime(2026, 12, 31),
+        "avancement": 0,
+    },
+    {
+        "nom": "Installation Pompe Solaire",
+        "latitude": -21.49,
+        "longitude": 47.10,
+        "projet": "Installation eau potable",
+        "categorie": "eau",
+        "statut": "termine",
+        "budget": 75000000,
+        "description": (
+            "Installation de pompes solaires pour l'approvisionnement en eau"
+        ),
+        "responsable": "JIRAMA",
+        "date_debut": datetime(2023, 6, 1),
+        "date_fin_prevue": datetime(2024, 1, 31),
+        "avancement": 100,
+    },
+    {
+        "nom": "Centre de Santé de Base",
+        "latitude": -21.44,
+        "longitude": 47.06,
+        "projet": "Construction centre santé",
+        "categorie": "sante",
+        "statut": "en-cours",
+        "budget": 200000000,
+        "description": "Construction d'un centre de santé avec maternité",
+        "responsable": "Ministère de la Santé",
+        "date_debut": datetime(2024, 2, 1),
+        "date_fin_prevue": datetime(2025, 8, 31),
+        "avancement": 45,
+    },
+    {
+        "nom": "Canal d'Irrigation Sud",
+        "latitude": -21.51,
+        "longitude": 47.12,
+        "projet": "Infrastructure agricole",
+        "categorie": "agriculture",
+        "statut": "termine",
+        "budget": 120000000,
+        "description": "Construction de canal d'irrigation pour 500 hectares",
+        "responsable": "Ministère de l'Agriculture",
+        "date_debut": datetime(2023, 1, 15),
+        "date_fin_prevue": datetime(2024, 5, 30),
+        "avancement": 100,
+    },
+    {
+        "nom": "Lycée Technique Antsirabe",
+        "latitude": -21.46,
+        "longitude": 47.07,
+        "projet": "Enseignement technique",
+        "categorie": "education",
+        "statut": "planifie",
+        "budget": 350000000,
+        "description": "Construction d'un lycée technique avec ateliers",
+        "responsable": "Ministère de l'Éducation",
+        "date_debut": datetime(2025, 9, 1),
+        "date_fin_prevue": datetime(2027, 6, 30),
+        "avancement": 0,
+    },
+]
+
+
+def _rectangle(west, south, east, north):
+    return {
+        "type": "Polygon",
+        "coordinates": [
+            [[west, south], [east, south], [east, north], [west, north], [west, south]]
+        ],
+    }
+
+
+# Contours simplifiés (démonstration) de districts de la Haute Matsiatra ;
+# les contours officiels s'importent avec `flask --app wsgi districts-import`
+DEMO_DISTRICTS = [
+    {"nom": nom, **District.columns_for(_rectangle(*emprise))}
+    for nom, emprise in (
+        ("Fianarantsoa I", (47.04, -21.48, 47.11, -21.42)),
+        ("Lalangina", (46.90, -21.70, 47.08, -21.48)),
+        ("Vohibato", (47.08, -21.80, 47.30, -21.48)),
+        ("Isandra", (46.70, -21.48, 47.04, -21.20)),
+        ("Ambohimahasoa", (47.04, -21.42, 47.40, -21.00)),
+    )
+]
+
+
+def seed_demo_data():
+    """Insère les données de démonstration dans les tables encore vides."""
+    for model, rows in (
+        (Tache, DEMO_TASKS),
+        (Projet, DEMO_PROJECTS),
+        (Budget, DEMO_BUDGETS),
+        # Les districts avant les sites, qui y sont rattachés à l'insertion
+        (District, DEMO_DISTRICTS),
+        (Site, DEMO_SITES),
+    ):
+        if db.session.query(model.id).first() is None:
+            db.session.add_all(model(**row) for row in rows)
+            db.session.flush()
+    db.session.commit()
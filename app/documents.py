@@ -0,0 +1,426 @@
+"""Catalogue des documents : fichiers sur disque, métadonnées en base.
+
+Les fichiers sont stockés dans ``DOCUMENTS_FOLDER``, hors de ``static/``, sous
+leur empreinte SHA-256 (jamais sous le nom fourni par l'utilisateur) : un même
+contenu envoyé plusieurs fois n'occupe qu'un fichier, partagé par les fiches.
+Ils ne sont servis qu'aux utilisateurs connectés, par ``send_file`` qui gère
+les requêtes conditionnelles (304) et partielles (``Range``).
+
+Les gros fichiers s'envoient par morceaux (``start_upload`` /
+``append_chunk`` / ``commit_upload``) : chaque morceau est écrit directement
+à son offset, sans être gardé en mémoire, et une coupure reprend au dernier
+octet reçu. Si le client annonce l'empreinte d'un contenu déjà stocké, aucun
+morceau n'est à envoyer.
+
+La liste est lue dans la table ``documents`` (pagination par curseur) : aucun
+parcours du répertoire, quel que soit le nombre de fichiers.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app, send_file
+from sqlalchemy import select, update
+
+from app import db
+from app.models import Document, DocumentUpload
+
+ALLOWED_EXTENSIONS = {"pdf", "doc", "docx", "xls", "xlsx", "txt"}
+# Types affichés dans le navigateur ; les autres sont toujours téléchargés
+INLINE_TYPES = {"application/pdf", "text/plain"}
+TYPES = ("rapport", "contrat", "technique")
+# Champ de formulaire / JSON -> colonne du modèle
+FIELDS = {
+    "titre": "titre",
+    "type": "type_document",
+    "projet": "projet",
+    "description": "description",
+}
+
+# Copie par blocs : mémoire bornée quelle que soit la taille du fichier
+BLOC = 1024 * 1024
+MAX_CHUNK = 16 * 1024 * 1024
+MAX_DOCUMENT_SIZE = 1024 * 1024 * 1024
+# Envois abandonnés supprimés par ``documents-gc`` après ce délai
+UPLOAD_EXPIRY = timedelta(days=2)
+# Un fichier non référencé plus récent que ce délai peut être en cours de
+# réutilisation par un envoi concurrent : il est laissé à ``documents-gc``
+BLOB_GRACE_SECONDS = 600
+UPLOADS_DIR = ".uploads"
+
+_EMPREINTE = re.compile(r"[0-9a-f]{64}")
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+
+class DocumentError(ValueError):
+    """Fichier ou métadonnées de document invalides."""
+
+
+class UploadConflict(DocumentError):
+    """Morceau hors séquence : le client doit reprendre à ``recu``."""
+
+    def __init__(self, recu):
+        super().__init__(f"Morceau hors séquence : reprendre à l'octet {recu}")
+        self.recu = recu
+
+
+def allowed_file(filename):
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def storage_path(chemin):
+    return os.path.join(current_app.config["DOCUMENTS_FOLDER"], chemin)
+
+
+def blob_path(empreinte):
+    # Répartition en sous-répertoires : dossiers courts
+    return os.path.join(empreinte[:2], empreinte)
+
+
+def part_path(upload_id):
+    return storage_path(os.path.join(UPLOADS_DIR, f"{upload_id}.part"))
+
+
+def _metadata(values, partial=False):
+    columns = {}
+    for field, column in FIELDS.items():
+        if field in values:
+            columns[column] = (values.get(field) or "").strip() or None
+    if ("titre" in columns or not partial) and not columns.get("titre"):
+        raise DocumentError("Le titre du document est obligatoire")
+    if columns.get("type_document") and columns["type_document"] not in TYPES:
+        raise DocumentError(f"Type de document inconnu : {columns['type_document']}")
+    return columns
+
+
+def _filename(raw):
+    # Le nom d'origine n'est conservé que pour le téléchargement
+    nom = os.path.basename((raw or "").replace("\\", "/")).strip()[-255:]
+    if not nom:
+        raise DocumentError("Veuillez choisir un fichier")
+    if not allowed_file(nom):
+        raise DocumentError(
+            "Extension non autorisée (" + ", ".join(sorted(ALLOWED_EXTENSIONS)) + ")"
+        )
+    return nom
+
+
+def _mime(nom):
+    # D'après l'extension (déjà contrôlée), jamais d'après le type annoncé par
+    # le client : un .txt envoyé en text/html serait servi comme une page
+    return mimetypes.guess_type(nom)[0] or "application/octet-stream"
+
+
+def _copy(source, target, digest=None, limit=MAX_DOCUMENT_SIZE):
+    """Copie ``source`` dans ``target`` par blocs ; renvoie le nombre d'octets."""
+    total = 0
+    while True:
+        bloc = source.read(BLOC)
+        if not bloc:
+            return total
+        total += len(bloc)
+        if total > limit:
+            raise DocumentError("Fichier trop volumineux")
+        if digest is not None:
+            digest.update(bloc)
+        target.write(bloc)
+
+
+def _temp_file():
+    directory = storage_path(UPLOADS_DIR)
+    os.makedirs(directory, exist_ok=True)
+    return tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False)
+
+
+def _store(temp, empreinte):
+    """Range ``temp`` sous son empreinte ; renvoie le chemin de stockage.
+
+    Contenu déjà présent : le fichier temporaire est supprimé et le fichier
+    existant seulement « touché » (sa date le protège de ``release_file``).
+    """
+    chemin = blob_path(empreinte)
+    path = storage_path(chemin)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp, path)
+    else:
+        os.remove(temp)
+    return chemin
+
+
+def save_file(fichier):
+    """Enregistre un fichier envoyé ; renvoie ``(nom, chemin, empreinte, taille,
+    mime)``."""
+    if fichier is None:
+        raise DocumentError("Veuillez choisir un fichier")
+    nom = _filename(fichier.filename)
+    digest = hashlib.sha256()
+    with _temp_file() as temp:
+        try:
+            taille = _copy(fichier.stream, temp, digest)
+        except DocumentError:
+            temp.close()
+            os.remove(temp.name)
+            raise
+    empreinte = digest.hexdigest()
+    chemin = _store(temp.name, empreinte)
+    return nom, chemin, empreinte, taille, _mime(nom)
+
+
+def release_file(chemin):
+    """Supprime un fichier qui n'est plus référencé (à appeler après le commit)."""
+    reference = select(Document.id).where(Document.chemin == chemin).limit(1)
+    if db.session.execute(reference).first():
+        return False
+    path = storage_path(chemin)
+    try:
+        if time.time() - os.path.getmtime(path) < BLOB_GRACE_SECONDS:
+            return False
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def create_document(values, fichier, auteur):
+    """Enregistre le fichier et ajoute sa fiche à la session (non validée)."""
+    columns = _metadata(values)
+    nom, chemin, empreinte, taille, mime = save_file(fichier)
+    document = Document(
+        nom_fichier=nom,
+        chemin=chemin,
+        empreinte=empreinte,
+        taille=taille,
+        mime_type=mime,
+        auteur=auteur,
+        **columns,
+    )
+    db.session.add(document)
+    return document
+
+
+def update_document(document, values, fichier=None):
+    """Met à jour la fiche ; renvoie l'ancien chemin si le fichier est remplacé."""
+    for column, value in _metadata(values, partial=True).items():
+        setattr(document, column, value)
+    if fichier is None or not fichier.filename:
+        return None
+    ancien = document.chemin
+    (
+        document.nom_fichier,
+        document.chemin,
+        document.empreinte,
+        document.taille,
+        document.mime_type,
+    ) = save_file(fichier)
+    return ancien
+
+
+# -----------------------------
+# Envoi par morceaux (reprise)
+# -----------------------------
+def start_upload(values, auteur):
+    """Ouvre un envoi ; déjà complet si l'empreinte annoncée est connue."""
+    nom = _filename(values.get("nom"))
+    try:
+        taille = int(values.get("taille"))
+    except (TypeError, ValueError):
+        raise DocumentError("Paramètre 'taille' requis (octets)")
+    if not 0 < taille <= MAX_DOCUMENT_SIZE:
+        raise DocumentError("Fichier vide ou trop volumineux")
+    empreinte = (values.get("sha256") or "").lower() or None
+    if empreinte and not _EMPREINTE.fullmatch(empreinte):
+        raise DocumentError("Empreinte SHA-256 invalide")
+
+    upload = DocumentUpload(
+        id=uuid.uuid4().hex,
+        nom_fichier=nom,
+        taille=taille,
+        recu=0,
+        empreinte=empreinte,
+        auteur=auteur,
+    )
+    if empreinte:
+        existant = db.session.execute(
+            select(Document.chemin)
+            .where(Document.empreinte == empreinte, Document.taille == taille)
+            .limit(1)
+        ).scalar()
+        if existant and os.path.exists(storage_path(existant)):
+            upload.chemin = existant
+    if upload.chemin is None:
+        os.makedirs(storage_path(UPLOADS_DIR), exist_ok=True)
+        open(part_path(upload.id), "wb").close()
+    db.session.add(upload)
+    return upload
+
+
+def _parse_content_range(header):
+    match = _CONTENT_RANGE.fullmatch((header or "").strip())
+    if not match:
+        raise DocumentError("En-tête Content-Range requis (bytes début-fin/total)")
+    debut, fin, total = (int(value) for value in match.groups())
+    if fin < debut:
+        raise DocumentError("Content-Range invalide")
+    return debut, fin, total
+
+
+def append_chunk(upload, stream, content_range, length):
+    """Écrit un morceau à son offset ; renvoie le nombre d'octets reçus.
+
+    Seul le morceau commençant à ``recu`` est accepté : un morceau rejoué ou
+    envoyé en parallèle lève :class:`UploadConflict`.
+    """
+    if upload.chemin is not None:
+        return upload.recu
+    debut, fin, total = _parse_content_range(content_range)
+    if total != upload.taille or fin >= total:
+        raise DocumentError("Content-Range incohérent avec la taille annoncée")
+    if debut != upload.recu:
+        raise UploadConflict(upload.recu)
+    taille = fin - debut + 1
+    if taille > MAX_CHUNK:
+        raise DocumentError(f"Morceau trop gros (maximum {MAX_CHUNK} octets)")
+    if length != taille:
+        raise DocumentError("Content-Length différent du Content-Range")
+
+    with open(part_path(upload.id), "r+b") as part:
+        part.seek(debut)
+        ecrits = _copy(stream, part, limit=taille)
+    if ecrits != taille:
+        # Les octets au-delà de ``recu`` seront réécrits par la reprise
+        raise DocumentError("Morceau incomplet")
+
+    result = db.session.execute(
+        update(DocumentUpload)
+        .where(DocumentUpload.id == upload.id, DocumentUpload.recu == debut)
+        .values(recu=debut + taille, updated_at=datetime.utcnow())
+    )
+    if result.rowcount != 1:
+        db.session.refresh(upload)
+        raise UploadConflict(upload.recu)
+    return debut + taille
+
+
+def commit_upload(upload, values):
+    """Crée la fiche d'un envoi complet ; le fichier est rangé par empreinte."""
+    columns = _metadata(values)
+    chemin, empreinte = upload.chemin, upload.empreinte
+    if chemin is None:
+        if upload.recu != upload.taille:
+            raise DocumentError(
+                f"Envoi incomplet : {upload.recu}/{upload.taille} octets reçus"
+            )
+        digest = hashlib.sha256()
+        with open(part_path(upload.id), "rb") as part:
+            for bloc in iter(lambda: part.read(BLOC), b""):
+                digest.update(bloc)
+        if empreinte and digest.hexdigest() != empreinte:
+            raise DocumentError("Empreinte différente de celle annoncée")
+        empreinte = digest.hexdigest()
+        chemin = _store(part_path(upload.id), empreinte)
+
+    document = Document(
+        nom_fichier=upload.nom_fichier,
+        chemin=chemin,
+        empreinte=empreinte,
+        taille=upload.taille,
+        mime_type=_mime(upload.nom_fichier),
+        auteur=upload.auteur,
+        **columns,
+    )
+    db.session.add(document)
+    db.session.delete(upload)
+    return document
+
+
+def abort_upload(upload):
+    db.session.delete(upload)
+    try:
+        os.remove(part_path(upload.id))
+    except FileNotFoundError:
+        pass
+
+
+# -----------------------------
+# Nettoyage
+# -----------------------------
+def collect_garbage(now=None):
+    """Supprime envois expirés et fichiers orphelins ; renvoie leur nombre."""
+    now = now or datetime.utcnow()
+    expires = db.session.scalars(
+        select(DocumentUpload).where(DocumentUpload.updated_at < now - UPLOAD_EXPIRY)
+    ).all()
+    for upload in expires:
+        abort_upload(upload)
+    db.session.commit()
+
+    # Maintenance seulement : le parcours du répertoire n'a lieu qu'ici
+    references = set(db.session.scalars(select(Document.chemin).distinct()))
+    en_cours = {
+        f"{upload_id}.part"
+        for upload_id in db.session.scalars(select(DocumentUpload.id))
+    }
+    racine = current_app.config["DOCUMENTS_FOLDER"]
+    limite = time.time()
+    orphelins = 0
+    for dossier, _, fichiers in os.walk(racine):
+        temporaire = os.path.relpath(dossier, racine) == UPLOADS_DIR
+        for nom in fichiers:
+            path = os.path.join(dossier, nom)
+            if temporaire:
+                if (
+                    nom in en_cours
+                    or limite - os.path.getmtime(path) < UPLOAD_EXPIRY.total_seconds()
+                ):
+                    continue
+            elif os.path.relpath(path, racine) in references or (
+                limite - os.path.getmtime(path) < BLOB_GRACE_SECONDS
+            ):
+                continue
+            os.remove(path)
+            orphelins += 1
+    return len(expires), orphelins
+
+
+def download_response(document, as_attachment=False):
+    """Réponse de téléchargement : ETag de version, 304 et ``Range`` (206).
+
+    Seuls PDF et texte brut s'affichent dans le navigateur ; le type servi est
+    recalculé d'après le nom (fiches enregistrées avant ce contrôle comprises).
+    """
+    mime = _mime(document.nom_fichier)
+    response = send_file(
+        storage_path(document.chemin),
+        mimetype=mime,
+        as_attachment=as_attachment or mime not in INLINE_TYPES,
+        download_name=document.nom_fichier,
+        conditional=True,
+        etag=f"{Document.__tablename__}-{document.id}-v{document.version}",
+        last_modified=document.updated_at,
+        max_age=0,
+    )
+    # Fichier authentifié : revalidation obligatoire, pas de cache partagé
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
+def init_app(app):
+    @app.cli.command("documents-gc")
+    def documents_gc_command():
+        """Supprime les envois abandonnés et les fichiers non référencés."""
+        expires, orphelins = collect_garbage()
+        click.echo(
+            f"✅ {expires} envoi(s) expiré(s), {orphelins} fichier(s) orphelin(s)"
+            " supprimé(s)"
+        )
@@ -0,0 +1,259 @@
+"""Exports CSV / XLSX en flux pour les budgets, tâches et projets.
+
+Les lignes sont lues par lots (pagination par identifiant, tuples de colonnes
+sans objets ORM) et écrites au fil de l'eau par un générateur : la mémoire
+consommée ne dépend que de la taille d'un lot, pas du nombre de lignes.
+"""
+
+import csv
+import io
+import os
+import re
+import zipfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from app import db
+from app.models import Budget, Projet, Tache
+
+BATCH_SIZE = 2000
+
+# Colonnes exportées : (en-tête, attribut du modèle)
+EXPORT_COLUMNS = {
+    "budgets": (
+        Budget,
+        [
+            ("ID", "id"),
+            ("Nom", "nom"),
+            ("Montant", "montant"),
+            ("Statut", "statut"),
+            ("Date d'allocation", "date_allocation"),
+            ("Projet associé", "projet_associe"),
+            ("Description", "description"),
+        ],
+    ),
+    "taches": (
+        Tache,
+        [
+            ("ID", "id"),
+            ("Titre", "titre"),
+            ("Date limite", "date_limite"),
+            ("Statut", "statut"),
+            ("Priorité", "priorite"),
+            ("Projet", "projet"),
+            ("Assigné à", "assignee"),
+            ("Description", "description"),
+        ],
+    ),
+    "projets": (
+        Projet,
+        [
+            ("ID", "id"),
+            ("Nom", "nom"),
+            ("Date de début", "date_debut"),
+            ("Date de fin", "date_fin"),
+            ("Statut", "statut"),
+            ("Budget", "budget"),
+            ("Progression", "progression"),
+            ("Description", "description"),
+        ],
+    ),
+}
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+# Début de texte interprété comme une formule par Excel / LibreOffice
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def neutralize(value):
+    """Texte saisi commençant comme une formule, préfixé d'une apostrophe.
+
+    Sans quoi ``=HYPERLINK(...)`` dans un nom de tâche serait évalué à
+    l'ouverture du fichier exporté.
+    """
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+def iter_rows(query, collection, batch_size=BATCH_SIZE):
+    """Parcourt ``query`` par lots de ``batch_size`` lignes (keyset sur l'id)."""
+    model, columns = EXPORT_COLUMNS[collection]
+    attrs = [getattr(model, attr) for _, attr in columns]
+    # Session du contexte courant : la requête construite dans la vue reste
+    # liée à la session de la requête HTTP, déjà close quand le flux
+    # (stream_with_context) s'exécute ; sa connexion ne serait jamais rendue.
+    query = query.with_session(db.session())
+    query = query.with_entities(*attrs).order_by(None).order_by(model.id)
+
+    last_id = None
+    while True:
+        batch = query
+        if last_id is not None:
+            batch = batch.filter(model.id > last_id)
+        rows = batch.limit(batch_size).all()
+        if not rows:
+            return
+        for row in rows:
+            yield [_cell(value) for value in row]
+        last_id = rows[-1][0]
+
+
+def headers(collection):
+    return [header for header, _ in EXPORT_COLUMNS[collection][1]]
+
+
+def csv_stream(header, rows, flush_every=500):
+    """Génère le CSV par blocs d'octets (BOM UTF-8 pour Excel)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    for index, row in enumerate(rows, 1):
+        writer.writerow([neutralize(value) for value in row])
+        if index % flush_every == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+# -----------------------------
+# XLSX (SpreadsheetML minimal écrit en flux dans un zip)
+# -----------------------------
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships"><Relationship Id="rId1" Type="http://schemas.openxmlformats.'
+    'org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships"><Relationship Id="rId1" Type="http://schemas.openxmlformats.'
+    'org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/></Relationships>'
+)
+
+
+class _ChunkPipe:
+    """Flux en écriture seule : le zip y écrit, le générateur vide les blocs."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if value is None:
+            cells.append("<c/>")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f"<c><v>{value}</v></c>")
+        else:
+            text = escape(_INVALID_XML.sub("", str(neutralize(value))))
+            cells.append(f'<c t="inlineStr"><is><t>{text}</t></is></c>')
+    return "<row>" + "".join(cells) + "</row>"
+
+
+def xlsx_stream(header, rows, sheet_name="Export", flush_every=500):
+    """Génère un classeur XLSX à une feuille, bloc par bloc."""
+    pipe = _ChunkPipe()
+    with zipfile.ZipFile(pipe, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _WORKBOOK.format(name=escape(sheet_name)))
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        yield pipe.drain()
+
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/'
+                b'spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(header).encode("utf-8"))
+            for index, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(row).encode("utf-8"))
+                if index % flush_every == 0:
+                    yield pipe.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield pipe.drain()
+
+
+def export_stream(query, collection, fmt, rows=None):
+    """Renvoie le générateur d'octets de l'export ``collection`` au format ``fmt``."""
+    if rows is None:
+        rows = iter_rows(query, collection)
+    if fmt == "xlsx":
+        return xlsx_stream(headers(collection), rows, sheet_name=collection)
+    return csv_stream(headers(collection), rows)
+
+
+def export_job(ctx, collection, fmt, args):
+    """Travail de fond ``exports.export`` : écrit l'export dans un fichier."""
+    from app.routes import EXPORT_FILTERS
+
+    query = EXPORT_FILTERS[collection](args)
+    total = query.order_by(None).count()
+
+    def rows():
+        for index, row in enumerate(iter_rows(query, collection), 1):
+            if index % BATCH_SIZE == 0:
+                ctx.progress(100 * index / total, f"{index}/{total} lignes")
+            yield row
+
+    path = ctx.output_path(fmt)
+    with open(path, "wb") as fichier:
+        for chunk in export_stream(query, collection, fmt, rows()):
+            fichier.write(chunk)
+    return {
+        "fichier": os.path.basename(path),
+        "nom": f"{collection}_{datetime.now():%Y%m%d}.{fmt}",
+        "mime": FORMATS[fmt],
+        "lignes": total,
+    }
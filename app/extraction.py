@@ -0,0 +1,156 @@
+"""Extraction du texte des documents pour l'index plein texte (``app.search``).
+
+Aucune dépendance obligatoire : DOCX et XLSX sont des archives ZIP de XML,
+lues avec la bibliothèque standard. Pour les PDF, ``pypdf`` est utilisé s'il
+est installé ; sinon un lecteur minimal extrait les chaînes des blocs de texte
+(PDF non chiffrés à polices simples, suffisant pour les rapports générés).
+Les formats binaires anciens (DOC, XLS) ne sont pas indexés.
+"""
+
+import re
+import zipfile
+import zlib
+from xml.etree import ElementTree
+
+# Texte indexé par document (au-delà, la fin n'est pas cherchable)
+MAX_CHARS = 500_000
+# Garde-fou contre les archives piégées (XML décompressé)
+MAX_XML_BYTES = 64 * 1024 * 1024
+
+_WORD = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_SHEET = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_ESPACES = re.compile(r"[ \t\r\f\v]+")
+_LIGNES = re.compile(r"\n\s*\n+")
+
+
+class ExtractionError(Exception):
+    """Texte illisible (fichier corrompu, chiffré ou tronqué)."""
+
+
+class UnsupportedFormat(ExtractionError):
+    """Format sans extracteur : le document reste cherchable par ses métadonnées."""
+
+
+def extract_text(path, nom):
+    """Texte normalisé du fichier ``path`` (format déduit du nom d'origine)."""
+    extension = nom.rsplit(".", 1)[-1].lower()
+    extractor = EXTRACTORS.get(extension)
+    if extractor is None:
+        raise UnsupportedFormat(f"Format non indexé : {extension}")
+    try:
+        texte = extractor(path)
+    except ExtractionError:
+        raise
+    except (OSError, ValueError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+        raise ExtractionError(str(e)) from e
+    texte = _LIGNES.sub("\n\n", _ESPACES.sub(" ", texte)).strip()
+    return texte[:MAX_CHARS]
+
+
+# -----------------------------
+# Texte brut
+# -----------------------------
+def _txt(path):
+    with open(path, "rb") as fichier:
+        data = fichier.read(MAX_CHARS * 4)
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("cp1252", errors="replace")
+
+
+# -----------------------------
+# Office Open XML (DOCX, XLSX)
+# -----------------------------
+def _read_xml(archive, membre):
+    info = archive.getinfo(membre)
+    if info.file_size > MAX_XML_BYTES:
+        raise ExtractionError(f"{membre} trop volumineux une fois décompressé")
+    return ElementTree.fromstring(archive.read(info))
+
+
+def _docx(path):
+    with zipfile.ZipFile(path) as archive:
+        racine = _read_xml(archive, "word/document.xml")
+    paragraphes = (
+        "".join(t.text or "" for t in p.iter(f"{_WORD}t"))
+        for p in racine.iter(f"{_WORD}p")
+    )
+    return "\n".join(p for p in paragraphes if p)
+
+
+def _xlsx(path):
+    textes = []
+    with zipfile.ZipFile(path) as archive:
+        noms = archive.namelist()
+        # Cellules texte : chaînes partagées et chaînes en ligne des feuilles
+        if "xl/sharedStrings.xml" in noms:
+            racine = _read_xml(archive, "xl/sharedStrings.xml")
+            for si in racine.iter(f"{_SHEET}si"):
+                textes.append("".join(t.text or "" for t in si.iter(f"{_SHEET}t")))
+        for nom in noms:
+            if nom.startswith("xl/worksheets/") and nom.endswith(".xml"):
+                racine = _read_xml(archive, nom)
+                for cellule in racine.iter(f"{_SHEET}is"):
+                    textes.append(
+                        "".join(t.text or "" for t in cellule.iter(f"{_SHEET}t"))
+                    )
+    return "\n".join(t for t in textes if t)
+
+
+# -----------------------------
+# PDF
+# -----------------------------
+_STREAM = re.compile(rb"stream\r?\n(.*?)endstream", re.S)
+_BLOC_TEXTE = re.compile(rb"BT(.*?)ET", re.S)
+_CHAINE = re.compile(rb"\(((?:\\.|[^\\)])*)\)", re.S)
+_ECHAPPEMENT = re.compile(rb"\\([nrtbf()\\]|[0-7]{1,3}|\r?\n)")
+_ECHAPPEMENTS = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+
+def _unescape(match):
+    code = match.group(1)
+    if code[:1].isdigit():
+        return bytes([int(code, 8) & 0xFF])
+    if code in (b"\n", b"\r\n"):
+        return b""
+    return _ECHAPPEMENTS.get(code, code)
+
+
+def _pdf_minimal(path):
+    with open(path, "rb") as fichier:
+        data = fichier.read()
+    if b"/Encrypt" in data:
+        raise ExtractionError("PDF chiffré")
+    lignes = []
+    for flux in _STREAM.finditer(data):
+        contenu = flux.group(1)
+        try:
+            contenu = zlib.decompress(contenu)
+        except zlib.error:
+            pass
+        for bloc in _BLOC_TEXTE.finditer(contenu):
+            morceaux = (
+                _ECHAPPEMENT.sub(_unescape, chaine.group(1))
+                for chaine in _CHAINE.finditer(bloc.group(1))
+            )
+            ligne = b"".join(morceaux).decode("cp1252", errors="replace")
+            if ligne.strip():
+                lignes.append(ligne)
+    return "\n".join(lignes)
+
+
+def _pdf(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return _pdf_minimal(path)
+    try:
+        reader = PdfReader(path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    except Exception as e:
+        # pypdf lève des exceptions propres à chaque défaut de fichier
+        raise ExtractionError(str(e)) from e
+
+
+EXTRACTORS = {"txt": _txt, "docx": _docx, "xlsx": _xlsx, "pdf": _pdf}
@@ -0,0 +1,297 @@
+"""Calculs géographiques vectorisés : district des sites et proximité.
+
+- Affectation des sites à leur district : test point-dans-polygone (règle
+  pair-impair) vectorisé avec NumPy, par lots de sites ; chaque district
+  n'examine que les points de son emprise.
+- Plus proches voisins et recherche par rayon : distance haversine calculée
+  en une passe sur les candidats fournis par l'index de grille
+  (``app.spatial``), le rayon étant élargi jusqu'à trouver assez de sites.
+
+Module importé à la demande : NumPy n'est pas chargé au démarrage des workers.
+"""
+
+import json
+import threading
+from collections import namedtuple
+
+import numpy as np
+from sqlalchemy import select, update
+
+from app import db, spatial, summary
+from app.models import CollectionVersion, District, Site, touch_collections
+
+RAYON_TERRE_KM = 6371.0088
+KM_PAR_DEGRE = np.pi * RAYON_TERRE_KM / 180
+# Demi-circonférence : au-delà, tout le globe est couvert
+MAX_RADIUS_KM = np.pi * RAYON_TERRE_KM
+
+ASSIGN_CHUNK = 50_000
+NEAREST_START_KM = 5.0
+DEFAULT_K = 5
+MAX_K = 100
+MAX_RESULTS = 2000
+
+Contour = namedtuple("Contour", "nom min_lon min_lat max_lon max_lat polygons")
+
+
+class GeoError(ValueError):
+    """Paramètre géographique invalide (coordonnées, rayon, nombre)."""
+
+
+# -----------------------------
+# Point dans polygone
+# -----------------------------
+def _ring_parity(xs, ys, ring):
+    # Règle pair-impair sur des points triés par latitude : une arête
+    # [y1, y2) ne concerne qu'une tranche contiguë, trouvée par dichotomie
+    inside = np.zeros(xs.shape, dtype=bool)
+    xi, yi = ring[:, 0], ring[:, 1]
+    xj, yj = np.roll(xi, 1), np.roll(yi, 1)
+    for x1, y1, x2, y2 in zip(xi, yi, xj, yj):
+        if y1 == y2:
+            # Arête horizontale (ou de fermeture) : jamais traversée
+            continue
+        start, stop = np.searchsorted(ys, sorted((y1, y2)))
+        if start == stop:
+            continue
+        x_cross = x1 + (ys[start:stop] - y1) * (x2 - x1) / (y2 - y1)
+        inside[start:stop] ^= xs[start:stop] < x_cross
+    return inside
+
+
+def points_in_polygons(x, y, polygons):
+    """Points dans l'un des polygones (anneau extérieur moins les trous).
+
+    Les points sont triés une fois par latitude : chaque arête ne traite que
+    les points de sa bande, soit un coût proche de O(N log N + N + arêtes).
+    """
+    order = np.argsort(y, kind="stable")
+    xs, ys = x[order], y[order]
+    inside = np.zeros(xs.shape, dtype=bool)
+    for outer, *holes in polygons:
+        mask = _ring_parity(xs, ys, outer)
+        for hole in holes:
+            mask &= ~_ring_parity(xs, ys, hole)
+        inside |= mask
+    result = np.empty_like(inside)
+    result[order] = inside
+    return result
+
+
+def _polygons(geometry):
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    else:
+        polygons = geometry["coordinates"]
+    return [
+        [np.asarray(ring, dtype=float)[:, :2] for ring in polygon]
+        for polygon in polygons
+    ]
+
+
+def assign_districts(lat, lon, contours):
+    """Nom du district de chaque point (``None`` hors de tout contour)."""
+    noms = np.full(lat.shape, None, dtype=object)
+    libres = np.ones(lat.shape, dtype=bool)
+    for contour in contours:
+        candidats = np.flatnonzero(
+            libres
+            & (lon >= contour.min_lon)
+            & (lon <= contour.max_lon)
+            & (lat >= contour.min_lat)
+            & (lat <= contour.max_lat)
+        )
+        if not candidats.size:
+            continue
+        inside = points_in_polygons(lon[candidats], lat[candidats], contour.polygons)
+        trouves = candidats[inside]
+        noms[trouves] = contour.nom
+        libres[trouves] = False
+    return noms
+
+
+# -----------------------------
+# Contours en cache (par version de la collection)
+# -----------------------------
+_contours = {}
+_lock = threading.Lock()
+
+
+def load_districts(connection):
+    """Contours des districts, relus seulement quand la collection change."""
+    table = CollectionVersion.__table__
+    key = connection.execute(
+        select(table.c.version, table.c.updated_at).where(table.c.nom == "districts")
+    ).first()
+    key = tuple(key) if key else None
+    with _lock:
+        if key in _contours:
+            return _contours[key]
+
+    rows = connection.execute(
+        select(
+            District.nom,
+            District.min_lon,
+            District.min_lat,
+            District.max_lon,
+            District.max_lat,
+            District.geometrie,
+        ).order_by(District.id)
+    ).all()
+    contours = [
+        Contour(*row[:5], polygons=_polygons(json.loads(row.geometrie))) for row in rows
+    ]
+    with _lock:
+        _contours.clear()
+        _contours[key] = contours
+    return contours
+
+
+def district_of(connection, latitude, longitude):
+    """District d'un point isolé (écriture d'un site)."""
+    noms = assign_districts(
+        np.array([latitude], dtype=float),
+        np.array([longitude], dtype=float),
+        load_districts(connection),
+    )
+    return noms[0]
+
+
+def assign_all_sites(chunk=ASSIGN_CHUNK):
+    """Recalcule le district de tous les sites par lots ; renvoie le nombre modifié.
+
+    Les sites sont lus par curseur sur l'identifiant et seuls ceux dont le
+    district change sont mis à jour (UPDATE en masse par clé primaire).
+    """
+    connection = db.session.connection()
+    contours = load_districts(connection)
+    modifies = 0
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(Site.id, Site.latitude, Site.longitude, Site.district)
+            .where(Site.id > last_id)
+            .order_by(Site.id)
+            .limit(chunk)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        ids, lats, lons, actuels = zip(*rows)
+        noms = assign_districts(
+            np.array(lats, dtype=float), np.array(lons, dtype=float), contours
+        )
+        changes = [
+            {"id": site_id, "district": nom}
+            for site_id, nom, actuel in zip(ids, noms, actuels)
+            if nom != actuel
+        ]
+        if changes:
+            db.session.execute(update(Site), changes)
+            modifies += len(changes)
+
+    # Les mises à jour en masse ne passent pas par le flush ORM
+    if modifies:
+        touch_collections(connection, ["sites"])
+        summary.reconcile(connection, ["sites"])
+    return modifies
+
+
+# -----------------------------
+# Distances, rayon et plus proches voisins
+# -----------------------------
+def haversine_km(lat, lon, lats, lons):
+    """Distance orthodromique (km) d'un point à un tableau de points."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * RAYON_TERRE_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def radius_bbox(lat, lon, km):
+    """Emprise contenant le cercle de rayon ``km`` (élargie près des pôles)."""
+    dlat = km / KM_PAR_DEGRE
+    south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    # Écart en longitude le plus large : à la latitude la plus proche du pôle
+    cos = np.cos(np.radians(max(abs(south), abs(north))))
+    if cos < 1e-9 or km / (KM_PAR_DEGRE * cos) >= 180:
+        return -180.0, south, 180.0, north
+    dlon = km / (KM_PAR_DEGRE * cos)
+    if lon - dlon < -180 or lon + dlon > 180:
+        # Antiméridien : toutes les longitudes (emprise moins sélective)
+        return -180.0, south, 180.0, north
+    return lon - dlon, south, lon + dlon, north
+
+
+def within_radius(lat, lon, km, limit=None, filtres=None):
+    """``[(id, distance_km)]`` des sites à moins de ``km``, du plus proche."""
+    query = spatial.in_bbox(
+        select(Site.id, Site.latitude, Site.longitude),
+        radius_bbox(lat, lon, km),
+        filtres or {},
+    )
+    rows = db.session.execute(query).all()
+    if not rows:
+        return []
+    ids, lats, lons = (np.array(column) for column in zip(*rows))
+    distances = haversine_km(lat, lon, lats.astype(float), lons.astype(float))
+    proches = np.flatnonzero(distances <= km)
+    proches = proches[np.argsort(distances[proches], kind="stable")][:limit]
+    return list(zip(ids[proches].tolist(), distances[proches].round(3).tolist()))
+
+
+def nearest(lat, lon, k=DEFAULT_K, filtres=None):
+    """Les ``k`` sites les plus proches, par rayons croissants.
+
+    Tous les sites à moins de ``r`` km étant examinés, les ``k`` plus proches
+    d'entre eux sont exacts dès qu'il y en a au moins ``k``.
+    """
+    km = NEAREST_START_KM
+    while True:
+        found = within_radius(lat, lon, km, k, filtres)
+        if len(found) >= k or km >= MAX_RADIUS_KM:
+            return found
+        km = min(km * 4, MAX_RADIUS_KM)
+
+
+def with_sites(found):
+    """Sites complets (``to_dict``) avec leur distance, dans l'ordre donné."""
+    if not found:
+        return []
+    ids = [site_id for site_id, _ in found]
+    sites = {
+        site.id: site
+        for site in db.session.scalars(select(Site).where(Site.id.in_(ids)))
+    }
+    return [{**sites[site_id].to_dict(), "distance_km": d} for site_id, d in found]
+
+
+# -----------------------------
+# Paramètres de requête
+# -----------------------------
+def parse_point(args):
+    try:
+        lat, lon = float(args["lat"]), float(args["lon"])
+    except (KeyError, TypeError, ValueError):
+        raise GeoError("Paramètres 'lat' et 'lon' requis (degrés décimaux)")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise GeoError("Coordonnées hors limites")
+    return lat, lon
+
+
+def parse_number(raw, nom, default, maximum, cast=float):
+    """Nombre strictement positif borné par ``maximum``."""
+    if raw in (None, ""):
+        if default is None:
+            raise GeoError(f"Paramètre '{nom}' requis")
+        return default
+    try:
+        value = cast(raw)
+    except ValueError:
+        raise GeoError(f"Paramètre '{nom}' invalide")
+    if not 0 < value <= maximum:
+        raise GeoError(f"Le paramètre '{nom}' doit être compris entre 0 et {maximum:g}")
+    return value
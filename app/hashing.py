@@ -0,0 +1,158 @@
+"""Contrôle d'admission pour le hachage des mots de passe.
+
+Le hachage (scrypt / pbkdf2) est volontairement coûteux : une rafale de
+tentatives de connexion peut occuper tous les workers. Les calculs passent
+donc par un petit pool de threads borné (``HASH_CONCURRENCY``) avec une file
+d'attente limitée (``HASH_QUEUE_DEPTH``) ; au-delà, :class:`HashingBusy` est
+levée immédiatement et la route répond 429.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+
+class HashingBusy(Exception):
+    """Capacité de hachage saturée : la requête doit être rejetée (429)."""
+
+    retry_after = 1
+
+
+class HashingPool:
+    def __init__(self, concurrency=2, queue_depth=8, timeout=5.0, method=None):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.configure(concurrency, queue_depth, timeout, method or DEFAULT_METHOD)
+
+    def configure(self, concurrency, queue_depth, timeout, method):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self.concurrency = concurrency
+            self.queue_depth = queue_depth
+            self.timeout = timeout
+            self.method = method
+            self._prefix = None
+            self._slots = threading.BoundedSemaphore(concurrency + queue_depth)
+            self.in_flight = 0
+            self.submitted = 0
+            self.completed = 0
+            self.rejected = 0
+            self.timeouts = 0
+            self.rehashed = 0
+            self._total_seconds = 0.0
+
+    def _get_executor(self):
+        # Créé à la première utilisation : jamais avant le fork des workers
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="hashing"
+                )
+            return self._executor
+
+    def _release(self, slots, started):
+        slots.release()
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self._total_seconds += time.perf_counter() - started
+
+    def _run(self, fn, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy()
+
+        with self._lock:
+            self.in_flight += 1
+            self.submitted += 1
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except RuntimeError:
+            self._release(slots, started)
+            raise
+        # Le créneau n'est libéré qu'à la fin réelle du calcul
+        future.add_done_callback(lambda _: self._release(slots, started))
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise HashingBusy()
+
+    def generate(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def check(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def _method_prefix(self):
+        # Werkzeug complète les paramètres à l'écriture (« scrypt » est stocké
+        # « scrypt:32768:8:1 ») : préfixe relevé une fois sur un hachage témoin
+        if self._prefix is None:
+            prefix = self._run(generate_password_hash, "", self.method)
+            with self._lock:
+                self._prefix = prefix.split("$", 1)[0]
+        return self._prefix
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split("$", 1)[0] != self._method_prefix()
+
+    def verify_and_update(self, user, password):
+        """Vérifie le mot de passe et re-hache s'il utilise un ancien paramétrage.
+
+        Renvoie ``True`` si le mot de passe est correct ; ``user.password`` est
+        alors éventuellement remplacé (à l'appelant de valider la session).
+        """
+        if not self.check(user.password, password):
+            return False
+        try:
+            if not self.needs_rehash(user.password):
+                return True
+            user.password = self.generate(password)
+        except HashingBusy:
+            # Pool saturé : le re-hachage attendra la prochaine connexion
+            return True
+        with self._lock:
+            self.rehashed += 1
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "concurrency": self.concurrency,
+                "queue_depth": self.queue_depth,
+                "method": self.method,
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "rehashed": self.rehashed,
+                "avg_seconds": (
+                    round(self._total_seconds / self.completed, 4)
+                    if self.completed
+                    else 0.0
+                ),
+            }
+
+
+# Pool partagé par le worker (configuré par create_app)
+pool = HashingPool()
+
+
+def init_app(app):
+    pool.configure(
+        app.config.get("HASH_CONCURRENCY", 2),
+        app.config.get("HASH_QUEUE_DEPTH", 8),
+        app.config.get("HASH_TIMEOUT", 5.0),
+        app.config.get("PASSWORD_HASH_METHOD", DEFAULT_METHOD),
+    )
@@ -0,0 +1,66 @@
+"""GET conditionnels : ETag fort, Last-Modified et réponses 304.
+
+Les jetons de version sont lus dans la base (``collection_versions`` pour les
+listes, colonne ``version`` pour les entités) : ils sont donc partagés par
+tous les workers et le 304 est décidé sans sérialiser la moindre ligne.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+
+from flask import current_app, request
+
+from app import db
+from app.models import CollectionVersion
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def collection_state(nom):
+    """Renvoie ``(version, updated_at)`` d'une collection (lecture par clé)."""
+    row = db.session.get(CollectionVersion, nom)
+    if row is None:
+        return 0, EPOCH
+    return row.version, row.updated_at
+
+
+def collection_etag(nom, *extra):
+    """ETag d'une vue de liste : version de la collection + paramètres de vue."""
+    version, updated_at = collection_state(nom)
+    digest = hashlib.sha1(request.query_string, usedforsecurity=False)
+    for part in extra:
+        digest.update(str(part).encode())
+    return f"{nom}-v{version}-{digest.hexdigest()[:12]}", updated_at
+
+
+def entity_etag(obj):
+    """ETag d'une entité versionnée : table, identifiant et version."""
+    return f"{obj.__tablename__}-{obj.id}-v{obj.version}", obj.updated_at
+
+
+def _as_utc(value):
+    return value.replace(microsecond=0, tzinfo=timezone.utc)
+
+
+def is_not_modified(etag, last_modified):
+    """Vrai si la requête peut recevoir un 304 (If-None-Match prioritaire)."""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        return _as_utc(last_modified) <= request.if_modified_since
+    return False
+
+
+def with_validators(response, etag, last_modified):
+    """Ajoute ETag, Last-Modified et Cache-Control à ``response``."""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = _as_utc(last_modified)
+    # Données authentifiées : revalidation obligatoire, pas de cache partagé
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def not_modified(etag, last_modified):
+    response = current_app.response_class(status=304)
+    return with_validators(response, etag, last_modified)
@@ -0,0 +1,433 @@
+"""Tâches de fond : les opérations longues ne bloquent pas les workers.
+
+Une route enregistre un travail dans la table ``jobs`` (:func:`enqueue`) et
+répond aussitôt avec son identifiant ; l'état se suit par ``/api/jobs/<id>``.
+Chaque worker exécute la file avec :
+
+- un pool de threads (``JOBS_THREADS``) pour les travaux liés aux E/S
+  (lectures en base, écriture de fichiers) ;
+- un pool de processus (``JOBS_PROCESSES``), utilisé par un travail via
+  :meth:`JobContext.cpu` pour ses calculs lourds (pandas / NumPy) sans
+  bloquer le GIL du worker.
+
+Les travaux sont réclamés par UPDATE conditionnel (un seul worker par
+travail), limités dans le temps (``timeout``) et relancés avec un délai
+croissant en cas d'échec (``retries``). Une tentative dont le worker a disparu
+expire comme un dépassement de délai. Pools et thread de distribution ne sont
+créés qu'à la première utilisation : jamais avant le fork des workers.
+"""
+
+import importlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import select, update
+
+from app import db
+from app.models import Job
+
+EN_ATTENTE = "en_attente"
+EN_COURS = "en_cours"
+TERMINE = "termine"
+ECHEC = "echec"
+ANNULE = "annule"
+ACTIFS = (EN_ATTENTE, EN_COURS)
+
+POLL_SECONDS = 5
+RETRY_DELAY = 10
+# Écritures de progression espacées (chaque appel vérifie l'annulation)
+PROGRESS_INTERVAL = 0.5
+# Résultats (et fichiers produits) conservés après la fin du travail
+RETENTION = timedelta(days=7)
+
+Task = namedtuple("Task", "target timeout retries unique")
+
+# Travaux connus : fonction ``module:nom`` importée à l'exécution (les
+# modules lourds comme app.analytics ne sont pas chargés au démarrage)
+TASKS = {
+    "exports.export": Task("app.exports:export_job", 1800, 1, False),
+    "analytics.anomalies": Task("app.analytics:anomalies_job", 600, 1, False),
+    "documents.index": Task("app.search:index_job", 3600, 2, True),
+}
+
+
+class JobError(ValueError):
+    """Travail inconnu ou paramètres invalides."""
+
+
+class JobCancelled(Exception):
+    """Travail annulé ou expiré : la tentative en cours doit s'arrêter."""
+
+
+# -----------------------------
+# Contexte d'exécution
+# -----------------------------
+class JobContext:
+    """Passé au travail : progression, calcul en processus, fichier produit."""
+
+    def __init__(self, runner, job):
+        self.id = job.id
+        self.tentative = job.tentatives
+        self.expire_a = job.expire_a
+        self._runner = runner
+        self._last = 0.0
+        self._outputs = []
+
+    def _restant(self):
+        return max((self.expire_a - datetime.utcnow()).total_seconds(), 0)
+
+    def progress(self, pourcentage, message=None, force=False):
+        """Publie l'avancement ; lève :class:`JobCancelled` si le travail a été
+        annulé, a expiré ou a été repris par une autre tentative."""
+        now = time.monotonic()
+        if not force and now - self._last < PROGRESS_INTERVAL:
+            return
+        self._last = now
+        with db.engine.begin() as connection:
+            result = connection.execute(
+                update(Job.__table__)
+                .where(
+                    Job.id == self.id,
+                    Job.statut == EN_COURS,
+                    Job.tentatives == self.tentative,
+                )
+                .values(
+                    progression=min(max(int(pourcentage), 0), 99),
+                    message=message,
+                    updated_at=datetime.utcnow(),
+                )
+            )
+        if result.rowcount != 1:
+            raise JobCancelled(self.id)
+
+    def cpu(self, fn, *args):
+        """Exécute ``fn(*args)`` dans le pool de processus (calcul lourd).
+
+        ``fn`` doit être une fonction de module et ses arguments sérialisables.
+        """
+        pool = self._runner.process_pool(current_app.config["JOBS_PROCESSES"])
+        if pool is None:
+            return fn(*args)
+        try:
+            return pool.submit(fn, *args).result(timeout=self._restant())
+        except FutureTimeout:
+            raise JobCancelled(self.id)
+
+    def output_path(self, extension):
+        """Fichier produit par le travail (servi par ``/api/jobs/<id>/download``).
+
+        Propre à la tentative : une tentative expirée mais encore active
+        n'écrase pas le fichier de celle qui l'a remplacée.
+        """
+        dossier = current_app.config["JOBS_FOLDER"]
+        os.makedirs(dossier, exist_ok=True)
+        path = os.path.join(dossier, f"{self.id}.{self.tentative}.{extension}")
+        self._outputs.append(path)
+        return path
+
+    def discard_outputs(self):
+        """Supprime les fichiers d'une tentative qui ne sera pas retenue."""
+        for path in self._outputs:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._outputs = []
+
+
+# -----------------------------
+# File d'attente
+# -----------------------------
+def enqueue(nom, params=None, auteur=None):
+    """Enregistre un travail, valide la transaction et réveille l'exécuteur.
+
+    Un travail ``unique`` déjà en attente n'est pas dupliqué.
+    """
+    task = TASKS.get(nom)
+    if task is None:
+        raise JobError(f"Travail inconnu : {nom}")
+    job = None
+    if task.unique:
+        job = db.session.scalars(
+            select(Job).where(Job.type == nom, Job.statut == EN_ATTENTE).limit(1)
+        ).first()
+    if job is None:
+        job = Job(
+            id=uuid.uuid4().hex,
+            type=nom,
+            params=json.dumps(params or {}),
+            statut=EN_ATTENTE,
+            max_tentatives=task.retries + 1,
+            timeout=task.timeout,
+            auteur=auteur,
+            execute_apres=datetime.utcnow(),
+        )
+        db.session.add(job)
+        db.session.commit()
+    runner.notify(current_app._get_current_object())
+    return job
+
+
+def cancel(job_id):
+    """Annule un travail en attente ou en cours (arrêt à sa prochaine étape)."""
+    result = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.statut.in_(ACTIFS))
+        .values(statut=ANNULE, finished_at=datetime.utcnow())
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _claim_next():
+    # Plus ancien travail exécutable, réclamé par UPDATE conditionnel
+    now = datetime.utcnow()
+    candidats = db.session.execute(
+        select(Job.id, Job.timeout)
+        .where(Job.statut == EN_ATTENTE, Job.execute_apres <= now)
+        .order_by(Job.execute_apres, Job.created_at)
+        .limit(5)
+    ).all()
+    for job_id, timeout in candidats:
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.statut == EN_ATTENTE)
+            .values(
+                statut=EN_COURS,
+                tentatives=Job.tentatives + 1,
+                started_at=now,
+                expire_a=now + timedelta(seconds=timeout),
+                message=None,
+                updated_at=now,
+            )
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return job_id
+    return None
+
+
+def _finish(job_id, tentative, **values):
+    # Sans effet si la tentative a été annulée ou a expiré entre-temps
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.statut == EN_COURS, Job.tentatives == tentative)
+        .values(updated_at=now, **values)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _failure(job, erreur):
+    # Nouvelle tentative différée (2, 4, 8… × RETRY_DELAY) ou échec définitif
+    now = datetime.utcnow()
+    if job.tentatives < job.max_tentatives:
+        return {
+            "statut": EN_ATTENTE,
+            "erreur": erreur,
+            "execute_apres": now + timedelta(seconds=RETRY_DELAY * 2**job.tentatives),
+        }
+    return {"statut": ECHEC, "erreur": erreur, "finished_at": now}
+
+
+def expire_overdue():
+    """Traite les tentatives en cours au-delà de leur échéance ; renvoie leur
+    nombre. Le thread éventuellement encore actif s'arrêtera à sa prochaine
+    étape (:meth:`JobContext.progress`)."""
+    now = datetime.utcnow()
+    expires = db.session.scalars(
+        select(Job).where(Job.statut == EN_COURS, Job.expire_a < now)
+    ).all()
+    for job in expires:
+        db.session.execute(
+            update(Job)
+            .where(
+                Job.id == job.id,
+                Job.statut == EN_COURS,
+                Job.tentatives == job.tentatives,
+            )
+            .values(updated_at=now, **_failure(job, "Délai d'exécution dépassé"))
+        )
+    db.session.commit()
+    return len(expires)
+
+
+def _target(nom):
+    module, fonction = TASKS[nom].target.split(":")
+    return getattr(importlib.import_module(module), fonction)
+
+
+def execute(job_id):
+    """Exécute une tentative réclamée (thread du pool ou commande CLI)."""
+    job = db.session.get(Job, job_id)
+    ctx = JobContext(runner, job)
+    try:
+        resultat = _target(job.type)(ctx, **json.loads(job.params))
+    except JobCancelled:
+        db.session.rollback()
+        ctx.discard_outputs()
+        return
+    except Exception as e:
+        db.session.rollback()
+        ctx.discard_outputs()
+        current_app.logger.exception("Échec du travail %s (%s)", job.id, job.type)
+        job = db.session.get(Job, job_id)
+        _finish(job.id, ctx.tentative, **_failure(job, f"{type(e).__name__}: {e}"))
+        return
+    termine = _finish(
+        job_id,
+        ctx.tentative,
+        statut=TERMINE,
+        progression=100,
+        resultat=json.dumps(resultat, default=str),
+        erreur=None,
+        finished_at=datetime.utcnow(),
+    )
+    if not termine:
+        # Tentative annulée, expirée ou remplacée : résultat écarté
+        ctx.discard_outputs()
+
+
+def run_pending():
+    """Exécute la file dans le thread courant ; renvoie le nombre de travaux."""
+    expire_overdue()
+    traites = 0
+    while True:
+        job_id = _claim_next()
+        if job_id is None:
+            return traites
+        execute(job_id)
+        traites += 1
+
+
+# -----------------------------
+# Exécuteur du worker
+# -----------------------------
+class JobRunner:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._dispatcher = None
+        self._threads = None
+        self._processes = None
+        self._slots = None
+
+    @property
+    def started(self):
+        return self._dispatcher is not None
+
+    def notify(self, app):
+        if not app.config["JOBS_ASYNC"]:
+            return
+        with self._lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                concurrency = app.config["JOBS_THREADS"]
+                self._threads = ThreadPoolExecutor(
+                    max_workers=concurrency, thread_name_prefix="jobs"
+                )
+                self._slots = threading.BoundedSemaphore(concurrency)
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch, args=(app,), name="jobs", daemon=True
+                )
+                self._dispatcher.start()
+        self._wake.set()
+
+    def process_pool(self, max_workers):
+        if not max_workers:
+            return None
+        with self._lock:
+            if self._processes is None:
+                # « spawn » : pas de fork d'un processus multi-thread
+                self._processes = ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._processes
+
+    def _dispatch(self, app):
+        while True:
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+            with app.app_context():
+                try:
+                    expire_overdue()
+                    # Un travail réclamé seulement quand un thread est libre
+                    while self._slots.acquire(blocking=False):
+                        job_id = _claim_next()
+                        if job_id is None:
+                            self._slots.release()
+                            break
+                        self._threads.submit(self._run, app, job_id)
+                except Exception:
+                    app.logger.exception("Échec de la distribution des travaux")
+                finally:
+                    db.session.remove()
+
+    def _run(self, app, job_id):
+        try:
+            with app.app_context():
+                try:
+                    execute(job_id)
+                finally:
+                    db.session.remove()
+        finally:
+            self._slots.release()
+            self._wake.set()
+
+
+runner = JobRunner()
+
+
+def purge(now=None):
+    """Supprime les travaux terminés depuis ``RETENTION`` et leurs fichiers."""
+    limite = (now or datetime.utcnow()) - RETENTION
+    anciens = db.session.scalars(
+        select(Job).where(Job.statut.not_in(ACTIFS), Job.finished_at < limite)
+    ).all()
+    dossier = current_app.config["JOBS_FOLDER"]
+    for job in anciens:
+        resultat = json.loads(job.resultat) if job.resultat else {}
+        if isinstance(resultat, dict) and resultat.get("fichier"):
+            try:
+                os.remove(os.path.join(dossier, resultat["fichier"]))
+            except FileNotFoundError:
+                pass
+        db.session.delete(job)
+    db.session.commit()
+    return len(anciens)
+
+
+def init_app(app):
+    @app.before_request
+    def _start_runner():
+        # Travaux laissés en attente (redémarrage, autres workers) : le
+        # thread de distribution démarre avec la première requête du worker
+        if not runner.started:
+            runner.notify(app)
+
+    @app.cli.command("jobs-run")
+    @click.option("--loop", is_flag=True, help="Attendre de nouveaux travaux.")
+    def jobs_run_command(loop):
+        """Exécute les travaux en attente dans ce processus."""
+        while True:
+            traites = run_pending()
+            click.echo(f"✅ {traites} travail(aux) exécuté(s)")
+            if not loop:
+                break
+            time.sleep(POLL_SECONDS)
+
+    @app.cli.command("jobs-purge")
+    def jobs_purge_command():
+        """Supprime les travaux terminés anciens et leurs fichiers."""
+        click.echo(f"✅ {purge()} travail(aux) supprimé(s)")
@@ -0,0 +1,447 @@
+"""Instrumentation des requêtes HTTP et export au format Prometheus.
+
+Chaque requête alimente, par route (``request.endpoint``) :
+
+- ``http_requests_total`` : compteur par méthode et code de statut ;
+- ``http_request_duration_seconds`` : histogramme de latence (le p99 se
+  calcule côté Prometheus avec ``histogram_quantile``) ;
+- ``http_response_size_bytes`` : taille des réponses de longueur connue ;
+- ``http_request_db_queries`` / ``http_request_db_seconds`` : nombre et durée
+  des requêtes SQL émises pendant la requête (événements du moteur) ;
+- ``http_requests_in_flight`` : requêtes en cours.
+
+Les métriques du pool de connexions (``app.database``) sont ajoutées.
+
+Plusieurs workers gunicorn : chaque worker écrit périodiquement ses compteurs
+dans ``METRICS_FOLDER/worker-<pid>.json`` (fil de fond, remplacement
+atomique) et ``/metrics`` additionne tous les fichiers, quel que soit le
+worker qui répond. À la sortie d'un worker (``child_exit`` de gunicorn), ses
+compteurs sont fusionnés dans ``archive.json`` pour ne pas décroître. Sans
+``METRICS_FOLDER`` (serveur de développement), seul le processus courant est
+exporté.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from app import database, db
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de gunicorn, donc un seul processus
+    fcntl = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Nom -> (type, aide, bornes des histogrammes)
+METRICS = {
+    "http_requests_total": ("counter", "Requêtes HTTP traitées", None),
+    "http_requests_in_flight": ("gauge", "Requêtes HTTP en cours", None),
+    "http_request_duration_seconds": (
+        "histogram",
+        "Durée de traitement des requêtes HTTP",
+        LATENCY_BUCKETS,
+    ),
+    "http_response_size_bytes": (
+        "histogram",
+        "Taille des réponses HTTP de longueur connue",
+        SIZE_BUCKETS,
+    ),
+    "http_request_db_queries": (
+        "histogram",
+        "Requêtes SQL émises par requête HTTP",
+        QUERY_BUCKETS,
+    ),
+    "http_request_db_seconds": (
+        "histogram",
+        "Temps SQL cumulé par requête HTTP",
+        LATENCY_BUCKETS,
+    ),
+    "db_pool_wait_seconds": (
+        "histogram",
+        "Attente d'une connexion libre du pool",
+        database.WAIT_BUCKETS,
+    ),
+    "db_pool_timeouts_total": (
+        "counter",
+        "Connexions non obtenues dans le délai du pool",
+        None,
+    ),
+    "db_pool_connections_in_use": ("gauge", "Connexions du pool en usage", None),
+    "db_slow_queries_total": (
+        "counter",
+        "Requêtes SQL au-delà du seuil de lenteur (app.query_profiler)",
+        None,
+    ),
+    "db_repeated_queries_total": (
+        "counter",
+        "Requêtes SQL répétées dans une requête HTTP échantillonnée (N+1)",
+        None,
+    ),
+}
+
+ARCHIVE = "archive.json"
+LOCK = ".lock"
+
+
+# -----------------------------
+# Registre du worker
+# -----------------------------
+class Registry:
+    """Compteurs, jauges et histogrammes d'un processus.
+
+    Les clés sont ``(nom, ((étiquette, valeur), ...))`` ; un histogramme est
+    ``[comptes par tranche (non cumulés, +Inf en dernier), somme]``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+            self.dirty = False
+
+    def _observe(self, nom, labels, valeur):
+        bornes = METRICS[nom][2]
+        histogramme = self.histograms.get((nom, labels))
+        if histogramme is None:
+            histogramme = self.histograms[(nom, labels)] = [
+                [0] * (len(bornes) + 1),
+                0.0,
+            ]
+        for i, borne in enumerate(bornes):
+            if valeur <= borne:
+                histogramme[0][i] += 1
+                break
+        else:
+            histogramme[0][-1] += 1
+        histogramme[1] += valeur
+
+    def inc(self, nom, labels=(), valeur=1):
+        with self._lock:
+            self.counters[(nom, labels)] = self.counters.get((nom, labels), 0) + valeur
+            self.dirty = True
+
+    def add_gauge(self, nom, delta, labels=()):
+        with self._lock:
+            self.gauges[(nom, labels)] = self.gauges.get((nom, labels), 0) + delta
+            self.dirty = True
+
+    def record_request(self, endpoint, method, status, duration, size, stats):
+        route = (("endpoint", endpoint),)
+        with self._lock:
+            cle = (
+                "http_requests_total",
+                route + (("method", method), ("status", status)),
+            )
+            self.counters[cle] = self.counters.get(cle, 0) + 1
+            self._observe(
+                "http_request_duration_seconds", route + (("method", method),), duration
+            )
+            if size is not None:
+                self._observe("http_response_size_bytes", route, size)
+            self._observe("http_request_db_queries", route, stats.queries)
+            self._observe("http_request_db_seconds", route, stats.sql_seconds)
+            self.dirty = True
+
+    def dump(self):
+        with self._lock:
+            self.dirty = False
+            return {
+                "counters": [[n, list(lb), v] for (n, lb), v in self.counters.items()],
+                "gauges": [[n, list(lb), v] for (n, lb), v in self.gauges.items()],
+                "histograms": [
+                    [n, list(lb), list(h[0]), h[1]]
+                    for (n, lb), h in self.histograms.items()
+                ],
+            }
+
+
+# Registre partagé par les threads du worker
+registry = Registry()
+
+
+class RequestStats:
+    """Mesures de la requête en cours (rangées dans ``g``)."""
+
+    __slots__ = ("start", "queries", "sql_seconds")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+
+def current_stats():
+    """Mesures de la requête HTTP en cours, ``None`` hors requête."""
+    if not has_request_context():
+        return None
+    return g.get("request_metrics")
+
+
+def _pool_metrics():
+    # Compteurs cumulés du pool de connexions de ce worker
+    comptes, total = database.metrics.histogram()
+    snapshot = database.metrics.snapshot()
+    return {
+        "counters": [["db_pool_timeouts_total", [], snapshot["timeouts"]]],
+        "gauges": [["db_pool_connections_in_use", [], snapshot["in_use"]]],
+        "histograms": [["db_pool_wait_seconds", [], comptes, total]],
+    }
+
+
+def snapshot():
+    """Métriques de ce processus (registre + pool), au format d'échange."""
+    donnees = registry.dump()
+    for cle, valeurs in _pool_metrics().items():
+        donnees[cle].extend(valeurs)
+    return donnees
+
+
+# -----------------------------
+# Agrégation entre workers
+# -----------------------------
+def _merge(total, donnees, gauges=True):
+    for nom, labels, valeur in donnees.get("counters", []):
+        cle = (nom, tuple(map(tuple, labels)))
+        total["counters"][cle] = total["counters"].get(cle, 0) + valeur
+    if gauges:
+        for nom, labels, valeur in donnees.get("gauges", []):
+            cle = (nom, tuple(map(tuple, labels)))
+            total["gauges"][cle] = total["gauges"].get(cle, 0) + valeur
+    for nom, labels, comptes, somme in donnees.get("histograms", []):
+        cle = (nom, tuple(map(tuple, labels)))
+        courant = total["histograms"].get(cle)
+        if courant is None:
+            total["histograms"][cle] = [list(comptes), somme]
+        else:
+            courant[0] = [a + b for a, b in zip(courant[0], comptes)]
+            courant[1] += somme
+    return total
+
+
+def _empty():
+    return {"counters": {}, "gauges": {}, "histograms": {}}
+
+
+def _export(total):
+    # Forme d'échange (JSON) d'un agrégat
+    return {
+        "counters": [[n, list(lb), v] for (n, lb), v in total["counters"].items()],
+        "histograms": [
+            [n, list(lb), h[0], h[1]] for (n, lb), h in total["histograms"].items()
+        ],
+    }
+
+
+class _FolderLock:
+    """Verrou ``fcntl`` du dossier : partagé en lecture, exclusif à l'archivage."""
+
+    def __init__(self, folder, exclusive=False):
+        self.path = os.path.join(folder, LOCK)
+        self.exclusive = exclusive
+
+    def __enter__(self):
+        self.fichier = open(self.path, "a")
+        if fcntl:
+            fcntl.flock(
+                self.fichier, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH
+            )
+        return self
+
+    def __exit__(self, *exc):
+        self.fichier.close()
+
+
+def _read(path):
+    try:
+        with open(path, encoding="utf-8") as fichier:
+            return json.load(fichier)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write(path, donnees):
+    temporaire = f"{path}.{os.getpid()}.tmp"
+    with open(temporaire, "w", encoding="utf-8") as fichier:
+        json.dump(donnees, fichier, separators=(",", ":"))
+    os.replace(temporaire, path)
+
+
+def _worker_path(folder, pid):
+    return os.path.join(folder, f"worker-{pid}.json")
+
+
+def collect(folder=None):
+    """Agrégat de tous les workers (ou de ce seul processus sans dossier)."""
+    if not folder:
+        return _merge(_empty(), snapshot())
+    flush(folder)
+    total = _empty()
+    with _FolderLock(folder):
+        _merge(total, _read(os.path.join(folder, ARCHIVE)), gauges=False)
+        for nom in os.listdir(folder):
+            if nom.startswith("worker-") and nom.endswith(".json"):
+                _merge(total, _read(os.path.join(folder, nom)))
+    return total
+
+
+def mark_process_dead(folder, pid):
+    """Fusionne les compteurs d'un worker terminé dans l'archive (jauges exclues)."""
+    path = _worker_path(folder, pid)
+    if not os.path.exists(path):
+        return
+    with _FolderLock(folder, exclusive=True):
+        total = _merge(_empty(), _read(os.path.join(folder, ARCHIVE)))
+        _merge(total, _read(path), gauges=False)
+        _write(os.path.join(folder, ARCHIVE), _export(total))
+        os.remove(path)
+
+
+# -----------------------------
+# Écriture périodique (par worker)
+# -----------------------------
+_state = {"folder": None, "interval": 1.0, "pid": None}
+_start_lock = threading.Lock()
+
+
+def flush(folder=None):
+    folder = folder or _state["folder"]
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+        _write(_worker_path(folder, os.getpid()), snapshot())
+
+
+def _flush_loop():
+    while True:
+        time.sleep(_state["interval"])
+        if registry.dirty:
+            try:
+                flush()
+            except OSError:
+                # Dossier supprimé ou plein : nouvel essai au tour suivant
+                pass
+
+
+def _ensure_flusher():
+    # Le fil ne survit pas au fork : démarrage paresseux dans chaque worker
+    if not _state["folder"] or _state["pid"] == os.getpid():
+        return
+    with _start_lock:
+        if _state["pid"] == os.getpid():
+            return
+        _state["pid"] = os.getpid()
+        threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+        atexit.register(flush)
+
+
+# -----------------------------
+# Rendu texte (format d'exposition Prometheus 0.0.4)
+# -----------------------------
+def _escape(valeur):
+    return str(valeur).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, extra=()):
+    paires = tuple(labels) + tuple(extra)
+    if not paires:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in paires) + "}"
+
+
+def _number(valeur):
+    if isinstance(valeur, float):
+        return repr(round(valeur, 9))
+    return str(valeur)
+
+
+def render(folder=None):
+    total = collect(folder if folder is not None else _state["folder"])
+    lignes = []
+    for nom, (type_, aide, bornes) in METRICS.items():
+        lignes.append(f"# HELP {nom} {aide}")
+        lignes.append(f"# TYPE {nom} {type_}")
+        if type_ == "histogram":
+            for (n, labels), (comptes, somme) in sorted(total["histograms"].items()):
+                if n != nom:
+                    continue
+                cumul = 0
+                for borne, compte in zip(tuple(bornes) + ("+Inf",), comptes):
+                    cumul += compte
+                    lignes.append(
+                        f"{nom}_bucket{_labels(labels, [('le', borne)])} {cumul}"
+                    )
+                lignes.append(f"{nom}_sum{_labels(labels)} {_number(somme)}")
+                lignes.append(f"{nom}_count{_labels(labels)} {cumul}")
+        else:
+            source = total["counters" if type_ == "counter" else "gauges"]
+            for (n, labels), valeur in sorted(source.items()):
+                if n == nom:
+                    lignes.append(f"{nom}{_labels(labels)} {_number(valeur)}")
+    return "\n".join(lignes) + "\n"
+
+
+# -----------------------------
+# Branchement sur l'application
+# -----------------------------
+def _before_request():
+    _ensure_flusher()
+    g.request_metrics = RequestStats()
+    registry.add_gauge("http_requests_in_flight", 1)
+
+
+def _after_request(response):
+    stats = g.get("request_metrics")
+    if stats is not None:
+        registry.record_request(
+            request.endpoint or "<unmatched>",
+            request.method,
+            str(response.status_code),
+            time.perf_counter() - stats.start,
+            # Réponses en flux (exports, téléchargements) : taille inconnue ici
+            response.content_length,
+            stats,
+        )
+    return response
+
+
+def _teardown_request(exc):
+    if g.pop("request_metrics", None) is not None:
+        registry.add_gauge("http_requests_in_flight", -1)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    conn.info["metrics_debut"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    stats = current_stats()
+    debut = conn.info.pop("metrics_debut", None)
+    if stats is not None and debut is not None:
+        stats.queries += 1
+        stats.sql_seconds += time.perf_counter() - debut
+
+
+def init_app(app):
+    _state["folder"] = app.config.get("METRICS_FOLDER") or None
+    _state["interval"] = app.config.get("METRICS_FLUSH_SECONDS", 1.0)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
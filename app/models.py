@@ -1,6 +1,14 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import event, literal_column
+from sqlalchemy.orm import Session
+
 from app import db
 from flask_login import UserMixin
 from app import login
+from app import user_cache
+from app.user_cache import UserIdentity
 
 
 class User(UserMixin, db.Model):
@@ -12,4 +20,425 @@ class User(UserMixin, db.Model):
 
 @login.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Identité servie par le cache du worker ; la base n'est lue qu'en cas d'absence
+    user_id = int(user_id)
+    identity = user_cache.cache.get(user_id)
+    if identity is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        identity = user_cache.cache.put(UserIdentity.from_user(user))
+    return identity
+
+
+def _format_date(value):
+    return value.strftime("%Y-%m-%d") if isinstance(value, datetime) else value
+
+
+def _version_column():
+    # Incrémenté par la base à chaque UPDATE (y compris les mises à jour en masse)
+    return db.Column(
+        db.Integer, nullable=False, default=1, onupdate=literal_column("version + 1")
+    )
+
+
+def _updated_at_column():
+    return db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+# -----------------------------
+# Tâches
+# -----------------------------
+class Tache(db.Model):
+    __tablename__ = "taches"
+    # Index composites : filtres + tri par curseur de /api/taches
+    __table_args__ = (
+        db.Index("ix_taches_statut_date_limite", "statut", "date_limite", "id"),
+        db.Index("ix_taches_assignee_date_limite", "assignee", "date_limite", "id"),
+        db.Index("ix_taches_date_limite_id", "date_limite", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    titre = db.Column(db.String(200), nullable=False)
+    date_limite = db.Column(db.DateTime, nullable=False)
+    statut = db.Column(db.String(30), nullable=False, default="En cours")
+    priorite = db.Column(db.String(20), default="Moyenne")
+    description = db.Column(db.Text)
+    projet = db.Column(db.String(200), index=True)
+    assignee = db.Column(db.String(120))
+    version = _version_column()
+    updated_at = _updated_at_column()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "titre": self.titre,
+            "date": _format_date(self.date_limite),
+            "statut": self.statut,
+            "priorite": self.priorite,
+            "description": self.description,
+            "projet": self.projet,
+            "assignee": self.assignee,
+        }
+
+
+# -----------------------------
+# Projets
+# -----------------------------
+class Projet(db.Model):
+    __tablename__ = "projets"
+    __table_args__ = (db.Index("ix_projets_date_debut_id", "date_debut", "id"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    nom = db.Column(db.String(200), nullable=False)
+    date_debut = db.Column(db.DateTime, nullable=False)
+    statut = db.Column(db.String(30), nullable=False, default="En cours", index=True)
+    date_fin = db.Column(db.DateTime)
+    budget = db.Column(db.String(100))
+    progression = db.Column(db.Integer, default=0)
+    description = db.Column(db.Text)
+    type_projet = db.Column(db.String(50), index=True)
+    district = db.Column(db.String(100), index=True)
+    # Suivi d'exécution (montants en Ariary, délais en jours)
+    montant_prevu = db.Column(db.BigInteger)
+    montant_execute = db.Column(db.BigInteger)
+    delai_prevu = db.Column(db.Integer)
+    delai_reel = db.Column(db.Integer)
+    version = _version_column()
+    updated_at = _updated_at_column()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "nom": self.nom,
+            "date_debut": _format_date(self.date_debut),
+            "statut": self.statut,
+            "date_fin": _format_date(self.date_fin),
+            "budget": self.budget,
+            "progression": self.progression,
+            "description": self.description,
+            "type_projet": self.type_projet,
+            "district": self.district,
+            "montant_prevu": self.montant_prevu,
+            "montant_execute": self.montant_execute,
+            "delai_prevu": self.delai_prevu,
+            "delai_reel": self.delai_reel,
+        }
+
+
+# -----------------------------
+# Budgets
+# -----------------------------
+class Budget(db.Model):
+    __tablename__ = "budgets"
+    __table_args__ = (
+        db.Index("ix_budgets_date_allocation_id", "date_allocation", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    nom = db.Column(db.String(200), nullable=False)
+    montant = db.Column(db.String(100), nullable=False)
+    statut = db.Column(db.String(30), nullable=False, index=True)
+    date_allocation = db.Column(db.DateTime, nullable=False)
+    projet_associe = db.Column(db.String(200), index=True)
+    description = db.Column(db.Text)
+    version = _version_column()
+    updated_at = _updated_at_column()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "nom": self.nom,
+            "montant": self.montant,
+            "statut": self.statut,
+            "date": _format_date(self.date_allocation),
+            "projet_associe": self.projet_associe,
+            "description": self.description,
+        }
+
+
+# -----------------------------
+# Documents (métadonnées ; fichiers sur disque, voir app.documents)
+# -----------------------------
+class Document(db.Model):
+    __tablename__ = "documents"
+    # Index composites : tris par curseur de /api/documents
+    __table_args__ = (
+        db.Index("ix_documents_date_ajout_id", "date_ajout", "id"),
+        db.Index("ix_documents_titre_id", "titre", "id"),
+        db.Index("ix_documents_taille_id", "taille", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    titre = db.Column(db.String(200), nullable=False)
+    type_document = db.Column(db.String(30), index=True)
+    projet = db.Column(db.String(200), index=True)
+    description = db.Column(db.Text)
+    # Nom d'origine (téléchargement) et chemin de stockage ; un même contenu
+    # (même empreinte SHA-256) est partagé par plusieurs documents
+    nom_fichier = db.Column(db.String(255), nullable=False)
+    chemin = db.Column(db.String(255), nullable=False, index=True)
+    empreinte = db.Column(db.String(64), index=True)
+    taille = db.Column(db.BigInteger, nullable=False)
+    mime_type = db.Column(db.String(100))
+    auteur = db.Column(db.String(64), index=True)
+    date_ajout = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    version = _version_column()
+    updated_at = _updated_at_column()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "titre": self.titre,
+            "type": self.type_document,
+            "projet": self.projet,
+            "description": self.description,
+            "fichier": self.nom_fichier,
+            "taille": self.taille,
+            "mime_type": self.mime_type,
+            "auteur": self.auteur,
+            "date": _format_date(self.date_ajout),
+            "modifie": _format_date(self.updated_at),
+            "version": self.version,
+        }
+
+
+class DocumentIndex(db.Model):
+    """État de l'indexation plein texte d'un document (voir app.search)."""
+
+    __tablename__ = "document_index"
+
+    document_id = db.Column(
+        db.Integer, db.ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True
+    )
+    # en_attente, en_cours, indexe, erreur, non_supporte
+    statut = db.Column(db.String(20), nullable=False, default="en_attente", index=True)
+    erreur = db.Column(db.String(255))
+    updated_at = _updated_at_column()
+
+
+class DocumentUpload(db.Model):
+    """Envoi par morceaux en cours (reprise après coupure)."""
+
+    __tablename__ = "document_uploads"
+
+    id = db.Column(db.String(32), primary_key=True)
+    nom_fichier = db.Column(db.String(255), nullable=False)
+    taille = db.Column(db.BigInteger, nullable=False)
+    # Octets reçus en séquence : le prochain morceau commence à cet offset
+    recu = db.Column(db.BigInteger, nullable=False, default=0)
+    # Empreinte annoncée par le client (déduplication avant envoi)
+    empreinte = db.Column(db.String(64))
+    # Contenu déjà stocké : aucun morceau à envoyer
+    chemin = db.Column(db.String(255))
+    auteur = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = _updated_at_column()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "fichier": self.nom_fichier,
+            "taille": self.taille,
+            "recu": self.recu,
+            "complet": self.chemin is not None or self.recu == self.taille,
+        }
+
+
+# -----------------------------
+# Tâches de fond (voir app.jobs)
+# -----------------------------
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+class Job(db.Model):
+    __tablename__ = "jobs"
+    # File d'attente : prochains travaux exécutables
+    __table_args__ = (
+        db.Index("ix_jobs_statut_execute_apres", "statut", "execute_apres"),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)
+    type = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=False, default="{}")
+    # en_attente, en_cours, termine, echec, annule
+    statut = db.Column(db.String(20), nullable=False, default="en_attente")
+    progression = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.String(255))
+    resultat = db.Column(db.Text)
+    erreur = db.Column(db.Text)
+    tentatives = db.Column(db.Integer, nullable=False, default=0)
+    max_tentatives = db.Column(db.Integer, nullable=False, default=1)
+    timeout = db.Column(db.Integer, nullable=False)
+    auteur = db.Column(db.String(64), index=True)
+    execute_apres = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    # Échéance de la tentative en cours (délai dépassé ou worker disparu)
+    expire_a = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = _updated_at_column()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "type": self.type,
+            "statut": self.statut,
+            "progression": self.progression,
+            "message": self.message,
+            "resultat": json.loads(self.resultat) if self.resultat else None,
+            "erreur": self.erreur,
+            "tentatives": self.tentatives,
+            "max_tentatives": self.max_tentatives,
+            "cree": _isoformat(self.created_at),
+            "demarre": _isoformat(self.started_at),
+            "termine": _isoformat(self.finished_at),
+        }
+
+
+# -----------------------------
+# Sites de projets (cartographie)
+# -----------------------------
+class Site(db.Model):
+    __tablename__ = "sites"
+
+    id = db.Column(db.Integer, primary_key=True)
+    nom = db.Column(db.String(200), nullable=False)
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    # Cellule de grille (code de Morton), renseignée par app.spatial
+    cellule = db.Column(db.BigInteger, nullable=False, index=True)
+    # District contenant le site, calculé à partir des contours (app.geo)
+    district = db.Column(db.String(120), index=True)
+    projet = db.Column(db.String(200))
+    categorie = db.Column(db.String(50))
+    statut = db.Column(db.String(30))
+    budget = db.Column(db.BigInteger)
+    description = db.Column(db.Text)
+    responsable = db.Column(db.String(200))
+    date_debut = db.Column(db.DateTime)
+    date_fin_prevue = db.Column(db.DateTime)
+    avancement = db.Column(db.Integer, default=0)
+    version = _version_column()
+    updated_at = _updated_at_column()
+
+    def to_dict(self):
+        # Clés attendues par la carte (cartographie.html)
+        return {
+            "id": self.id,
+            "nom": self.nom,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "district": self.district,
+            "projet": self.projet,
+            "category": self.categorie,
+            "status": self.statut,
+            "budget": self.budget,
+            "description": self.description,
+            "responsable": self.responsable,
+            "debut": _format_date(self.date_debut),
+            "fin_prevue": _format_date(self.date_fin_prevue),
+            "avancement": self.avancement,
+        }
+
+
+class District(db.Model):
+    __tablename__ = "districts"
+
+    id = db.Column(db.Integer, primary_key=True)
+    nom = db.Column(db.String(120), unique=True, nullable=False)
+    # Géométrie GeoJSON (Polygon ou MultiPolygon), en texte
+    geometrie = db.Column(db.Text, nullable=False)
+    # Emprise, pour écarter d'emblée les points éloignés
+    min_lon = db.Column(db.Float, nullable=False)
+    min_lat = db.Column(db.Float, nullable=False)
+    max_lon = db.Column(db.Float, nullable=False)
+    max_lat = db.Column(db.Float, nullable=False)
+    version = _version_column()
+    updated_at = _updated_at_column()
+
+    @staticmethod
+    def columns_for(geometry):
+        """Colonnes d'un district (géométrie et emprise) pour un Polygon GeoJSON."""
+        if geometry["type"] == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry["type"] == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            raise ValueError(f"Géométrie non prise en charge : {geometry['type']}")
+        points = [point for polygon in polygons for ring in polygon for point in ring]
+        return {
+            "geometrie": json.dumps(geometry),
+            "min_lon": min(point[0] for point in points),
+            "min_lat": min(point[1] for point in points),
+            "max_lon": max(point[0] for point in points),
+            "max_lat": max(point[1] for point in points),
+        }
+
+
+# -----------------------------
+# Versions des collections (ETag / Last-Modified)
+# -----------------------------
+class CollectionVersion(db.Model):
+    __tablename__ = "collection_versions"
+
+    nom = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SummaryCounter(db.Model):
+    """Agrégat précalculé du tableau de bord (voir ``app.summary``)."""
+
+    __tablename__ = "summary_counters"
+
+    nom = db.Column(db.String(200), primary_key=True)
+    valeur = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+VERSIONED_MODELS = (Tache, Projet, Budget, Document, Site, District)
+
+
+def upsert(connection, table):
+    """``INSERT ... ON CONFLICT`` du dialecte (SQLite et PostgreSQL)."""
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+def touch_collections(connection, noms):
+    """Incrémente la version des collections ``noms`` (toutes les instances).
+
+    Upsert en une instruction : deux premières écritures concurrentes sur une
+    collection ne peuvent pas insérer chacune la ligne de version.
+    """
+    now = datetime.utcnow()
+    table = CollectionVersion.__table__
+    for nom in noms:
+        statement = upsert(connection, table).values(
+            nom=nom, version=1, updated_at=now
+        )
+        connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=[table.c.nom],
+                set_={"version": table.c.version + 1, "updated_at": now},
+            )
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_collection_versions(session, flush_context):
+    # Toute écriture ORM sur une collection versionnée invalide ses ETags
+    noms = {
+        obj.__tablename__
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, VERSIONED_MODELS)
+    }
+    if noms:
+        touch_collections(session.connection(), sorted(noms))
@@ -0,0 +1,111 @@
+"""Pagination par curseur (keyset) pour les API de listes.
+
+Le curseur encode la valeur de la clé de tri et l'identifiant de la dernière
+ligne renvoyée : la page suivante est obtenue par un ``WHERE`` sur l'index,
+sans ``OFFSET``, donc en temps constant quelle que soit la profondeur.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class PaginationError(ValueError):
+    """Paramètre de pagination invalide (curseur, limite ou tri)."""
+
+
+def encode_cursor(sort_key, value, row_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_key, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, sort_key, column):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        key, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if key != sort_key:
+            raise PaginationError("Curseur incompatible avec le tri demandé")
+        if value is not None and column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        return value, int(row_id)
+    except PaginationError:
+        raise
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise PaginationError("Curseur invalide")
+
+
+def parse_limit(raw):
+    if raw in (None, ""):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError("Paramètre 'limit' invalide")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def parse_date(raw, name):
+    if not raw:
+        return None
+    try:
+        return datetime.strptime(raw, "%Y-%m-%d")
+    except ValueError:
+        raise PaginationError(f"Paramètre '{name}' invalide (format AAAA-MM-JJ)")
+
+
+def keyset_page(query, model, sort_keys, args):
+    """Applique tri, curseur et limite à ``query`` et renvoie une page.
+
+    ``sort_keys`` liste les colonnes autorisées pour ``?sort=`` (préfixe ``-``
+    pour un tri décroissant). L'identifiant sert toujours de départage afin
+    que l'ordre soit total et le curseur stable.
+    """
+    sort = args.get("sort") or "id"
+    descending = sort.startswith("-")
+    sort_key = sort.lstrip("-")
+    if sort_key not in sort_keys:
+        raise PaginationError(f"Tri non supporté : {sort_key}")
+
+    column = getattr(model, sort_key)
+    limit = parse_limit(args.get("limit"))
+
+    cursor = args.get("cursor")
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, column)
+        if sort_key == "id":
+            query = query.filter(
+                model.id < last_id if descending else model.id > last_id
+            )
+        elif descending:
+            query = query.filter(
+                or_(column < value, and_(column == value, model.id < last_id))
+            )
+        else:
+            query = query.filter(
+                or_(column > value, and_(column == value, model.id > last_id))
+            )
+
+    if descending:
+        query = query.order_by(column.desc(), model.id.desc())
+    else:
+        query = query.order_by(column.asc(), model.id.asc())
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, getattr(last, sort_key), last.id)
+
+    return {
+        "items": [row.to_dict() for row in rows],
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }
@@ -0,0 +1,171 @@
+"""Détection des requêtes SQL répétées (N+1) et lentes.
+
+Branché sur les événements ``before/after_cursor_execute`` du moteur :
+
+- Requêtes lentes : toute requête au-delà de ``QUERY_SLOW_MS`` est
+  journalisée (route, durée, forme de la requête, pile applicative). La
+  mesure ne coûte que deux lectures d'horloge : toujours active.
+- Requêtes répétées : sur une fraction des requêtes HTTP
+  (``QUERY_PROFILE_SAMPLE``, 1 % par défaut, sans risque en production), chaque
+  requête SQL est réduite à son empreinte (littéraux et listes de paramètres
+  normalisés) ; une même empreinte émise ``QUERY_REPEAT_THRESHOLD`` fois dans
+  une requête HTTP signale un N+1 probable (relation chargée paresseusement
+  dans une boucle).
+
+Un traitement de masse assumé (jeu synthétique, import) peut s'en soustraire
+avec ``with exempt(connection):`` : ses requêtes ne sont ni mesurées ni
+comptées.
+
+Les alertes passent par ``app.logger`` et sont comptées dans ``/metrics``
+(``db_slow_queries_total``, ``db_repeated_queries_total``).
+"""
+
+import os
+import random
+import re
+import time
+import traceback
+from contextlib import contextmanager
+from functools import lru_cache
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+
+from app import db, metrics
+
+_LITTERAUX = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMETRES = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+")
+_LISTES = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ESPACES = re.compile(r"\s+")
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_state = {"sample": 0.01, "threshold": 5, "slow": 0.25}
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement):
+    """Forme normalisée d'une requête : mêmes requêtes aux valeurs près."""
+    forme = _LITTERAUX.sub("?", statement)
+    forme = _PARAMETRES.sub("?", forme)
+    forme = _LISTES.sub("(?...)", forme)
+    return _ESPACES.sub(" ", forme).strip()
+
+
+def stack_summary(limit=4):
+    """Derniers appels dans le code de l'application (hors ce module)."""
+    appels = [
+        frame
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(_APP_DIR)
+        and not frame.filename.endswith(("query_profiler.py", "metrics.py"))
+    ]
+    return " <- ".join(
+        f"{os.path.relpath(frame.filename, os.path.dirname(_APP_DIR))}:"
+        f"{frame.lineno} {frame.name}"
+        for frame in reversed(appels[-limit:])
+    )
+
+
+class QueryProfile:
+    """Empreintes des requêtes SQL d'une requête HTTP échantillonnée."""
+
+    __slots__ = ("counts", "stacks")
+
+    def __init__(self):
+        self.counts = {}
+        self.stacks = {}
+
+    def record(self, statement):
+        empreinte = fingerprint(statement)
+        compte = self.counts[empreinte] = self.counts.get(empreinte, 0) + 1
+        # Pile relevée une seule fois, au franchissement du seuil
+        if compte == _state["threshold"]:
+            self.stacks[empreinte] = stack_summary()
+
+    def repeated(self):
+        return [
+            (empreinte, compte, self.stacks.get(empreinte, ""))
+            for empreinte, compte in self.counts.items()
+            if compte >= _state["threshold"]
+        ]
+
+
+@contextmanager
+def exempt(connection):
+    """Requêtes de ``connection`` ignorées par le profileur le temps du bloc."""
+    precedent = connection.info.get("profiler_exempt", False)
+    connection.info["profiler_exempt"] = True
+    try:
+        yield connection
+    finally:
+        connection.info["profiler_exempt"] = precedent
+
+
+def _endpoint():
+    if has_request_context():
+        return request.endpoint or "<unmatched>"
+    return "<hors requête>"
+
+
+# -----------------------------
+# Événements
+# -----------------------------
+def _before_request():
+    if _state["sample"] and random.random() < _state["sample"]:
+        g.query_profile = QueryProfile()
+
+
+def _teardown_request(exc):
+    profil = g.pop("query_profile", None)
+    if profil is None:
+        return
+    endpoint = _endpoint()
+    for empreinte, compte, pile in profil.repeated():
+        metrics.registry.inc("db_repeated_queries_total", (("endpoint", endpoint),))
+        current_app.logger.warning(
+            "Requête SQL répétée %d fois (N+1 probable) sur %s : %s | %s",
+            compte,
+            endpoint,
+            empreinte[:300],
+            pile or "-",
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    if not conn.info.get("profiler_exempt"):
+        conn.info["profiler_debut"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    debut = conn.info.pop("profiler_debut", None)
+    if debut is None:
+        return
+    duree = time.perf_counter() - debut
+    if has_request_context():
+        profil = g.get("query_profile")
+        if profil is not None:
+            profil.record(statement)
+    if duree >= _state["slow"] and has_app_context():
+        endpoint = _endpoint()
+        metrics.registry.inc("db_slow_queries_total", (("endpoint", endpoint),))
+        current_app.logger.warning(
+            "Requête SQL lente (%.1f ms) sur %s : %s | %s",
+            duree * 1000,
+            endpoint,
+            fingerprint(statement)[:300],
+            stack_summary() or "-",
+        )
+
+
+def init_app(app):
+    _state["sample"] = app.config.get("QUERY_PROFILE_SAMPLE", 0.01)
+    _state["threshold"] = app.config.get("QUERY_REPEAT_THRESHOLD", 5)
+    _state["slow"] = app.config.get("QUERY_SLOW_MS", 250) / 1000
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
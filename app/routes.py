@@ -1,33 +1,53 @@
+import hmac
 from datetime import datetime
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    render_template,
+    request,
+    jsonify,
+    flash,
+    make_response,
+    redirect,
+    Response,
+    send_from_directory,
+    session,
+    stream_with_context,
+    url_for,
+)
+from sqlalchemy.exc import SQLAlchemyError
 from flask_login import login_user, logout_user, current_user, login_required
-from werkzeug.security import check_password_hash, generate_password_hash
-import pandas as pd
 
-from app import db
+from app import (
+    budget_batch,
+    database,
+    db,
+    hashing,
+    jobs,
+    metrics,
+    search,
+    spatial,
+    summary,
+    user_cache,
+)
+from app import documents as document_store
 from app.forms import LoginForm, PasswordResetForm
-from app.models import User
+from app.exports import FORMATS as EXPORT_FORMATS, export_stream
+from app.http_cache import (
+    collection_etag,
+    entity_etag,
+    is_not_modified,
+    not_modified,
+    with_validators,
+)
+from app.hashing import HashingBusy
+from app.models import Budget, Document, DocumentUpload, Job, Projet, Tache, User
+from app.pagination import PaginationError, keyset_page, parse_date, parse_limit
 
 # Définition unique du Blueprint
 bp = Blueprint("routes", __name__)
 
-# Exemple de statistiques (tableau de bord)
-DEMO_STATS = {
-    "total_documents": 15,
-    "budget_executed": 85,
-    "districts_covered": 22,
-    "delayed_projects": 3,
-    "completed_projects": 18,
-    "total_budget": "2.4B",
-}
-
-# Données fictives pour documents (à remplacer par DB)
-MOCK_DOCUMENTS = [
-    {"id": 1, "titre": "Rapport Budget 2024", "fichier": "budget2024.pdf"},
-    {"id": 2, "titre": "Plan d’Action 2025", "fichier": "plan_action_2025.pdf"},
-    {"id": 3, "titre": "Compte rendu réunion", "fichier": "reunion.docx"},
-]
-
 
 # -----------------------------
 # Tableau de bord
@@ -36,7 +56,10 @@ MOCK_DOCUMENTS = [
 @bp.route("/dashboard")
 @login_required
 def index():
-    return render_template("index.html", user=current_user, stats=DEMO_STATS)
+    # Chiffres précalculés (table de synthèse), sans agrégat à l'affichage
+    return render_template(
+        "index.html", user=current_user, stats=summary.dashboard_stats()
+    )
 
 
 # -----------------------------
@@ -49,7 +72,15 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(username=form.username.data).first()
-        if user and check_password_hash(user.password, form.password.data):
+        try:
+            valid = user is not None and hashing.pool.verify_and_update(
+                user, form.password.data
+            )
+        except HashingBusy:
+            return _hashing_busy("login.html", form)
+        if valid:
+            # Persiste un éventuel re-hachage avec le paramétrage courant
+            db.session.commit()
             login_user(user)
             return redirect(url_for("routes.index"))
         else:
@@ -57,6 +88,14 @@ def login():
     return render_template("login.html", form=form)
 
 
+def _hashing_busy(template, form):
+    # Capacité de hachage saturée : rejet immédiat plutôt que file d'attente
+    flash("⏳ Trop de demandes simultanées, réessayez dans un instant.", "error")
+    response = make_response(render_template(template, form=form), 429)
+    response.headers["Retry-After"] = str(HashingBusy.retry_after)
+    return response
+
+
 @bp.route("/logout")
 @login_required
 def logout():
@@ -70,8 +109,12 @@ def mot_de_passe_oublie():
     if form.validate_on_submit():
         user = User.query.filter_by(username=form.username.data).first()
         if user:
-            user.password = generate_password_hash(form.new_password.data)
+            try:
+                user.password = hashing.pool.generate(form.new_password.data)
+            except HashingBusy:
+                return _hashing_busy("mot_de_passe_oublie.html", form)
             db.session.commit()
+            user_cache.invalidate(user.id)
             flash("✔️ Mot de passe réinitialisé avec succès.", "success")
             return redirect(url_for("routes.login"))
         else:
@@ -79,6 +122,42 @@ def mot_de_passe_oublie():
     return render_template("mot_de_passe_oublie.html", form=form)
 
 
+@bp.route("/api/user_cache/stats")
+@login_required
+def api_user_cache_stats():
+    # Compteurs du cache d'identités de ce worker
+    return jsonify(user_cache.cache.stats())
+
+
+@bp.route("/api/hashing/stats")
+@login_required
+def api_hashing_stats():
+    # Métriques du pool de hachage de ce worker
+    return jsonify(hashing.pool.stats())
+
+
+@bp.route("/api/db/pool/stats")
+@login_required
+def api_db_pool_stats():
+    # Occupation et temps d'attente du pool de connexions de ce worker
+    return jsonify(database.stats())
+
+
+@bp.route("/metrics")
+def prometheus_metrics():
+    # Agrégat de tous les workers ; jeton Bearer pour le collecteur Prometheus
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        fourni = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(fourni.encode(), f"Bearer {token}".encode()):
+            abort(401)
+    elif not current_user.is_authenticated:
+        abort(401)
+    response = Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
 @bp.route("/profile")
 @login_required
 def profile():
@@ -101,19 +180,23 @@ def gestion_utilisateurs():
 @bp.route("/documents")
 @login_required
 def documents():
-    return render_template("documents.html", user=current_user, files=MOCK_DOCUMENTS)
+    # La liste est chargée par la page via /api/documents (pagination par curseur)
+    return render_template("documents.html", user=current_user)
 
 
 @bp.route("/add_document", methods=["GET", "POST"])
 @login_required
 def add_document():
     if request.method == "POST":
-        titre = request.form.get("titre")
-        fichier = request.files.get("fichier")
-
-        # ✅ On simule l'utilisation des variables pour éviter les erreurs flake8
-        if titre and fichier:
-            pass  # À remplacer plus tard par l'enregistrement dans la DB
+        try:
+            document_store.create_document(
+                request.form, request.files.get("fichier"), current_user.username
+            )
+        except document_store.DocumentError as e:
+            flash(f"❌ {e}", "danger")
+            return redirect(url_for("routes.documents"))
+        db.session.commit()
+        search.notify()
 
         flash("✔️ Document ajouté avec succès", "success")
         return redirect(url_for("routes.documents"))
@@ -124,141 +207,244 @@ def add_document():
 @bp.route("/edit_document/<int:id>", methods=["GET", "POST"])
 @login_required
 def edit_document(id):
-    doc = next((d for d in MOCK_DOCUMENTS if d["id"] == id), None)
+    doc = db.session.get(Document, id)
     if not doc:
         flash("❌ Document introuvable", "danger")
         return redirect(url_for("routes.documents"))
 
     if request.method == "POST":
-        titre = request.form.get("titre")
-        fichier = request.files.get("fichier")
-
-        # ✅ Utilisation simulée pour éviter flake8
-        if titre or fichier:
-            pass  # À remplacer plus tard par la modification dans la DB
+        try:
+            ancien = document_store.update_document(
+                doc, request.form, request.files.get("fichier")
+            )
+        except document_store.DocumentError as e:
+            flash(f"❌ {e}", "danger")
+            return redirect(url_for("routes.documents"))
+        db.session.commit()
+        if ancien:
+            search.notify()
+            document_store.release_file(ancien)
 
         flash("✔️ Document modifié avec succès", "success")
         return redirect(url_for("routes.documents"))
 
-    return render_template("edit_document.html", user=current_user, document=doc)
+    return render_template(
+        "edit_document.html", user=current_user, document=doc.to_dict()
+    )
 
 
 @bp.route("/delete_document/<int:id>", methods=["POST"])
 @login_required
 def delete_document(id):
-    # TODO: Supprimer document dans DB
+    doc = db.session.get(Document, id)
+    if doc:
+        chemin = doc.chemin
+        db.session.delete(doc)
+        db.session.commit()
+        # Fichier supprimé après validation, s'il n'est plus partagé
+        document_store.release_file(chemin)
     flash("❌ Document supprimé avec succès", "danger")
     return redirect(url_for("routes.documents"))
 
 
-# -----------------------------
-# Gestion des tâches - Région Haute Matsiatra
-# -----------------------------
+@bp.route("/documents/<int:id>/download")
+@login_required
+def download_document(id):
+    doc = db.session.get(Document, id)
+    if not doc:
+        abort(404)
+    # Requêtes conditionnelles (304) et partielles (Range) gérées par send_file
+    return document_store.download_response(
+        doc, as_attachment=request.args.get("attachment") == "1"
+    )
 
 
-# Modèle de données pour les tâches
-class Tache:
-    def __init__(
-        self,
-        id,
-        titre,
-        date_limite,
-        statut,
-        priorite=None,
-        description=None,
-        projet=None,
-        assignee=None,
-    ):
-        self.id = id
-        self.titre = titre
-        self.date_limite = date_limite
-        self.statut = statut
-        self.priorite = priorite
-        self.description = description
-        self.projet = projet
-        self.assignee = assignee
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "titre": self.titre,
-            "date": (
-                self.date_limite.strftime("%Y-%m-%d")
-                if isinstance(self.date_limite, datetime)
-                else self.date_limite
-            ),
-            "statut": self.statut,
-            "priorite": self.priorite,
-            "description": self.description,
-            "projet": self.projet,
-            "assignee": self.assignee,
-        }
+# Clés de tri autorisées pour /api/documents
+DOCUMENT_SORT_KEYS = ("id", "date_ajout", "titre", "taille")
 
 
-# Données fictives pour tâches
-MOCK_TASKS = [
-    Tache(
-        1,
-        "Préparer rapport annuel",
-        datetime(2025, 9, 10),
-        "En cours",
-        "Haute",
-        "Rapport des activités de l'année 2025",
-        "Projet Développement Rural",
-        "Jean Dupont",
-    ),
-    Tache(
-        2,
-        "Réunion projet infrastructure",
-        datetime(2025, 9, 12),
-        "Planifié",
-        "Moyenne",
-        "Réunion de coordination pour le projet d'infrastructure",
-        "Projet Infrastructure Routière",
-        "Marie Lambert",
-    ),
-    Tache(
-        3,
-        "Vérifier budget santé",
-        datetime(2025, 9, 15),
-        "Terminé",
-        "Basse",
-        "Vérification du budget alloué au projet santé",
-        "Projet Santé Communautaire",
-        "Paul Martin",
-    ),
-    Tache(
-        4,
-        "Commander matériel construction",
-        datetime(2025, 9, 5),
-        "En cours",
-        "Haute",
-        "Commande des matériaux pour la construction de l'école",
-        "Construction école primaire",
-        "Jean Dupont",
-    ),
-    Tache(
-        5,
-        "Contacter fournisseurs eau",
-        datetime(2025, 9, 8),
-        "En retard",
-        "Moyenne",
-        "Prise de contact avec les fournisseurs pour le projet eau potable",
-        "Installation eau potable",
-        "Marie Lambert",
-    ),
-]
+def filter_documents(args):
+    """Construit la requête des documents filtrée selon les paramètres d'URL."""
+    query = Document.query
+    if args.get("type"):
+        query = query.filter(Document.type_document == args["type"])
+    if args.get("projet"):
+        query = query.filter(Document.projet == args["projet"])
+    if args.get("auteur"):
+        query = query.filter(Document.auteur == args["auteur"])
+    date_from = parse_date(args.get("date_from"), "date_from")
+    if date_from:
+        query = query.filter(Document.date_ajout >= date_from)
+    date_to = parse_date(args.get("date_to"), "date_to")
+    if date_to:
+        query = query.filter(Document.date_ajout <= date_to)
+    return query
+
+
+@bp.route("/api/documents", methods=["GET", "POST"])
+@login_required
+def api_documents():
+    if request.method == "GET":
+        etag, last_modified = collection_etag("documents")
+        if is_not_modified(etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        # Retourner une page de documents en JSON (pagination par curseur)
+        try:
+            page = keyset_page(
+                filter_documents(request.args),
+                Document,
+                DOCUMENT_SORT_KEYS,
+                request.args,
+            )
+        except PaginationError as e:
+            return jsonify({"error": str(e)}), 400
+        return with_validators(jsonify(page), etag, last_modified)
+
+    # Envoi multipart : fichier + métadonnées
+    try:
+        doc = document_store.create_document(
+            request.form, request.files.get("fichier"), current_user.username
+        )
+    except document_store.DocumentError as e:
+        return jsonify({"error": str(e)}), 400
+    db.session.commit()
+    search.notify()
+    return jsonify(doc.to_dict()), 201
+
+
+@bp.route("/api/documents/search")
+@login_required
+def api_documents_search():
+    # Résultats classés par pertinence, avec extraits surlignés (<mark>)
+    try:
+        limit, offset = search.parse_window(request.args)
+        return jsonify(
+            search.search(
+                request.args.get("q"), limit, offset, request.args.get("type") or None
+            )
+        )
+    except search.SearchError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@bp.route("/api/documents/<int:id>", methods=["GET", "PUT", "DELETE"])
+@login_required
+def api_document(id):
+    doc = db.session.get(Document, id)
+    if not doc:
+        return jsonify({"error": "Document non trouvé"}), 404
+
+    if request.method == "GET":
+        etag, last_modified = entity_etag(doc)
+        if is_not_modified(etag, last_modified):
+            return not_modified(etag, last_modified)
+        return with_validators(jsonify(doc.to_dict()), etag, last_modified)
+
+    elif request.method == "PUT":
+        # Métadonnées seulement (le fichier se remplace par /edit_document)
+        try:
+            document_store.update_document(doc, request.get_json() or {})
+        except document_store.DocumentError as e:
+            return jsonify({"error": str(e)}), 400
+        db.session.commit()
+        return jsonify(doc.to_dict())
+
+    elif request.method == "DELETE":
+        chemin = doc.chemin
+        db.session.delete(doc)
+        db.session.commit()
+        document_store.release_file(chemin)
+        return jsonify({"message": "Document supprimé avec succès"})
+
+
+def _own_upload(upload_id):
+    # Un envoi n'est visible que de son auteur
+    upload = db.session.get(DocumentUpload, upload_id)
+    if upload is None or upload.auteur != current_user.username:
+        abort(404)
+    return upload
+
+
+@bp.route("/api/documents/uploads", methods=["POST"])
+@login_required
+def api_upload_start():
+    # {nom, taille, sha256?} : envoi déjà complet si le contenu est connu
+    try:
+        upload = document_store.start_upload(
+            request.get_json(silent=True) or request.form, current_user.username
+        )
+    except document_store.DocumentError as e:
+        return jsonify({"error": str(e)}), 400
+    db.session.commit()
+    return jsonify({**upload.to_dict(), "morceau": document_store.MAX_CHUNK}), 201
+
+
+@bp.route("/api/documents/uploads/<upload_id>", methods=["GET", "PUT", "DELETE"])
+@login_required
+def api_upload(upload_id):
+    upload = _own_upload(upload_id)
+
+    if request.method == "GET":
+        # État pour la reprise : le prochain morceau commence à ``recu``
+        return jsonify(upload.to_dict())
+
+    elif request.method == "PUT":
+        # Corps brut lu par blocs et écrit à son offset (Content-Range)
+        try:
+            document_store.append_chunk(
+                upload,
+                request.stream,
+                request.headers.get("Content-Range"),
+                request.content_length,
+            )
+        except document_store.UploadConflict as e:
+            return jsonify({"error": str(e), "recu": e.recu}), 409
+        except document_store.DocumentError as e:
+            return jsonify({"error": str(e)}), 400
+        db.session.commit()
+        return jsonify(upload.to_dict())
+
+    elif request.method == "DELETE":
+        document_store.abort_upload(upload)
+        db.session.commit()
+        return jsonify({"message": "Envoi annulé"})
+
+
+@bp.route("/api/documents/uploads/<upload_id>/commit", methods=["POST"])
+@login_required
+def api_upload_commit(upload_id):
+    upload = _own_upload(upload_id)
+    try:
+        doc = document_store.commit_upload(
+            upload, request.get_json(silent=True) or request.form
+        )
+    except document_store.DocumentError as e:
+        return jsonify({"error": str(e)}), 400
+    db.session.commit()
+    search.notify()
+    return jsonify(doc.to_dict()), 201
+
+
+# -----------------------------
+# Gestion des tâches - Région Haute Matsiatra
+# -----------------------------
 
 
 @bp.route("/taches")
 @login_required
 def taches():
-    # Convertir les objets Tache en dictionnaires pour le template
-    tasks_data = [tache.to_dict() for tache in MOCK_TASKS]
     today = datetime.now().strftime("%Y-%m-%d")
-    return render_template(
+    etag, last_modified = collection_etag("taches", current_user.get_id(), today)
+    if not session.get("_flashes") and is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    # Convertir les objets Tache en dictionnaires pour le template
+    tasks_data = [tache.to_dict() for tache in Tache.query.order_by(Tache.id)]
+    html = render_template(
         "taches.html", user=current_user, tasks=tasks_data, today=today
     )
+    return with_validators(make_response(html), etag, last_modified)
 
 
 @bp.route("/add_task", methods=["POST"])
@@ -272,12 +458,8 @@ def add_task():
     projet = request.form.get("projet")
     assignee = request.form.get("assignee")
 
-    # Créer un nouvel ID
-    new_id = max(tache.id for tache in MOCK_TASKS) + 1 if MOCK_TASKS else 1
-
-    # Créer la nouvelle tâche
+    # Créer la nouvelle tâche (l'ID est attribué par la base)
     new_task = Tache(
-        id=new_id,
         titre=titre,
         date_limite=datetime.strptime(date_limite, "%Y-%m-%d"),
         statut=statut,
@@ -287,8 +469,8 @@ def add_task():
         assignee=assignee,
     )
 
-    # Ajouter à la liste
-    MOCK_TASKS.append(new_task)
+    db.session.add(new_task)
+    db.session.commit()
 
     flash("Tâche ajoutée avec succès", "success")
     return redirect(url_for("routes.taches"))
@@ -297,8 +479,8 @@ def add_task():
 @bp.route("/edit_task/<int:task_id>", methods=["GET", "POST"])
 @login_required
 def edit_task(task_id):
-    # Trouver la tâche
-    tache = next((t for t in MOCK_TASKS if t.id == task_id), None)
+    # Trouver la tâche (recherche par clé primaire)
+    tache = db.session.get(Tache, task_id)
 
     if not tache:
         flash("Tâche introuvable", "danger")
@@ -313,6 +495,7 @@ def edit_task(task_id):
         tache.description = request.form.get("description")
         tache.projet = request.form.get("projet")
         tache.assignee = request.form.get("assignee")
+        db.session.commit()
 
         flash("Tâche modifiée avec succès", "success")
         return redirect(url_for("routes.taches"))
@@ -325,8 +508,10 @@ def edit_task(task_id):
 @bp.route("/delete_task/<int:task_id>", methods=["POST"])
 @login_required
 def delete_task(task_id):
-    global MOCK_TASKS
-    MOCK_TASKS = [t for t in MOCK_TASKS if t.id != task_id]
+    tache = db.session.get(Tache, task_id)
+    if tache:
+        db.session.delete(tache)
+        db.session.commit()
     flash("Tâche supprimée avec succès", "danger")
     return redirect(url_for("routes.taches"))
 
@@ -335,21 +520,55 @@ def delete_task(task_id):
 @login_required
 def complete_task(task_id):
     # Trouver la tâche
-    tache = next((t for t in MOCK_TASKS if t.id == task_id), None)
+    tache = db.session.get(Tache, task_id)
 
     if tache:
         tache.statut = "Terminé"
+        db.session.commit()
         flash("Tâche marquée comme terminée", "success")
 
     return redirect(url_for("routes.taches"))
 
 
+# Clés de tri autorisées pour /api/taches
+TASK_SORT_KEYS = ("id", "date_limite", "statut", "titre")
+
+
+def filter_tasks(args):
+    """Construit la requête des tâches filtrée selon les paramètres d'URL."""
+    query = Tache.query
+    if args.get("statut"):
+        query = query.filter(Tache.statut == args["statut"])
+    if args.get("priorite"):
+        query = query.filter(Tache.priorite == args["priorite"])
+    if args.get("assignee"):
+        query = query.filter(Tache.assignee == args["assignee"])
+    if args.get("projet"):
+        query = query.filter(Tache.projet == args["projet"])
+    date_from = parse_date(args.get("date_from"), "date_from")
+    if date_from:
+        query = query.filter(Tache.date_limite >= date_from)
+    date_to = parse_date(args.get("date_to"), "date_to")
+    if date_to:
+        query = query.filter(Tache.date_limite <= date_to)
+    return query
+
+
 @bp.route("/api/taches", methods=["GET"])
 @login_required
 def api_taches():
-    # Retourner la liste des tâches en JSON
-    tasks_data = [tache.to_dict() for tache in MOCK_TASKS]
-    return jsonify(tasks_data)
+    etag, last_modified = collection_etag("taches")
+    if is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    # Retourner une page de tâches en JSON (pagination par curseur)
+    try:
+        page = keyset_page(
+            filter_tasks(request.args), Tache, TASK_SORT_KEYS, request.args
+        )
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    return with_validators(jsonify(page), etag, last_modified)
 
 
 # -----------------------------
@@ -357,90 +576,17 @@ def api_taches():
 # -----------------------------
 
 
-# Modèle de données pour les projets
-class Projet:
-    def __init__(
-        self,
-        id,
-        nom,
-        date_debut,
-        statut,
-        date_fin=None,
-        budget=None,
-        progression=0,
-        description=None,
-    ):
-        self.id = id
-        self.nom = nom
-        self.date_debut = date_debut
-        self.statut = statut
-        self.date_fin = date_fin
-        self.budget = budget
-        self.progression = progression
-        self.description = description
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "nom": self.nom,
-            "date_debut": (
-                self.date_debut.strftime("%Y-%m-%d")
-                if isinstance(self.date_debut, datetime)
-                else self.date_debut
-            ),
-            "statut": self.statut,
-            "date_fin": (
-                self.date_fin.strftime("%Y-%m-%d")
-                if isinstance(self.date_fin, datetime)
-                else self.date_fin
-            ),
-            "budget": self.budget,
-            "progression": self.progression,
-            "description": self.description,
-        }
-
-
-# Données fictives pour projets
-MOCK_PROJECTS = [
-    Projet(
-        1,
-        "Construction école primaire",
-        datetime(2025, 9, 1),
-        "En cours",
-        datetime(2025, 12, 15),
-        "150 000 Ariary",
-        65,
-        "Construction d'une école primaire dans le village d'Ankazo",
-    ),
-    Projet(
-        2,
-        "Réhabilitation route RN7",
-        datetime(2025, 8, 15),
-        "Planifié",
-        datetime(2026, 2, 28),
-        "850 000 Ariary",
-        0,
-        "Réhabilitation de 15km de la Route Nationale 7",
-    ),
-    Projet(
-        3,
-        "Installation eau potable",
-        datetime(2025, 7, 20),
-        "Terminé",
-        datetime(2025, 10, 5),
-        "120 000 Ariary",
-        100,
-        "Installation de système d'eau potable dans 3 villages",
-    ),
-]
-
-
 @bp.route("/projets")
 @login_required
 def projets():
+    etag, last_modified = collection_etag("projets", current_user.get_id())
+    if not session.get("_flashes") and is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+
     # Convertir les objets Projet en dictionnaires pour le template
-    projets_data = [projet.to_dict() for projet in MOCK_PROJECTS]
-    return render_template("projets.html", user=current_user, projets=projets_data)
+    projets_data = [projet.to_dict() for projet in Projet.query.order_by(Projet.id)]
+    html = render_template("projets.html", user=current_user, projets=projets_data)
+    return with_validators(make_response(html), etag, last_modified)
 
 
 @bp.route("/add_project", methods=["POST"])
@@ -454,23 +600,19 @@ def add_project():
     progression = request.form.get("progression", 0)
     description = request.form.get("description")
 
-    # Créer un nouvel ID
-    new_id = max(projet.id for projet in MOCK_PROJECTS) + 1 if MOCK_PROJECTS else 1
-
-    # Créer le nouveau projet
+    # Créer le nouveau projet (l'ID est attribué par la base)
     new_project = Projet(
-        id=new_id,
         nom=nom,
         date_debut=datetime.strptime(date_debut, "%Y-%m-%d"),
         statut=statut,
         date_fin=datetime.strptime(date_fin, "%Y-%m-%d") if date_fin else None,
         budget=budget,
-        progression=progression,
+        progression=int(progression or 0),
         description=description,
     )
 
-    # Ajouter à la liste
-    MOCK_PROJECTS.append(new_project)
+    db.session.add(new_project)
+    db.session.commit()
 
     flash("Projet ajouté avec succès", "success")
     return redirect(url_for("routes.projets"))
@@ -479,8 +621,8 @@ def add_project():
 @bp.route("/edit_project/<int:project_id>", methods=["GET", "POST"])
 @login_required
 def edit_project(project_id):
-    # Trouver le projet
-    projet = next((p for p in MOCK_PROJECTS if p.id == project_id), None)
+    # Trouver le projet (recherche par clé primaire)
+    projet = db.session.get(Projet, project_id)
 
     if not projet:
         flash("Projet introuvable", "danger")
@@ -498,8 +640,9 @@ def edit_project(project_id):
         projet.date_fin = datetime.strptime(date_fin, "%Y-%m-%d") if date_fin else None
 
         projet.budget = request.form.get("budget")
-        projet.progression = request.form.get("progression", 0)
+        projet.progression = int(request.form.get("progression") or 0)
         projet.description = request.form.get("description")
+        db.session.commit()
 
         flash("Projet modifié avec succès", "success")
         return redirect(url_for("routes.projets"))
@@ -512,30 +655,63 @@ def edit_project(project_id):
 @bp.route("/delete_project/<int:project_id>", methods=["POST"])
 @login_required
 def delete_project(project_id):
-    global MOCK_PROJECTS
-    MOCK_PROJECTS = [p for p in MOCK_PROJECTS if p.id != project_id]
+    projet = db.session.get(Projet, project_id)
+    if projet:
+        db.session.delete(projet)
+        db.session.commit()
     flash("Projet supprimé avec succès", "danger")
     return redirect(url_for("routes.projets"))
 
 
+# Clés de tri autorisées pour /api/projets
+PROJECT_SORT_KEYS = ("id", "date_debut", "statut", "nom")
+
+
+def filter_projects(args):
+    """Construit la requête des projets filtrée selon les paramètres d'URL."""
+    query = Projet.query
+    if args.get("statut"):
+        query = query.filter(Projet.statut == args["statut"])
+    date_from = parse_date(args.get("date_from"), "date_from")
+    if date_from:
+        query = query.filter(Projet.date_debut >= date_from)
+    date_to = parse_date(args.get("date_to"), "date_to")
+    if date_to:
+        query = query.filter(Projet.date_debut <= date_to)
+    return query
+
+
 @bp.route("/api/projets", methods=["GET"])
 @login_required
 def api_projets():
-    # Retourner la liste des projets en JSON
-    projets_data = [projet.to_dict() for projet in MOCK_PROJECTS]
-    return jsonify(projets_data)
+    etag, last_modified = collection_etag("projets")
+    if is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    # Retourner une page de projets en JSON (pagination par curseur)
+    try:
+        page = keyset_page(
+            filter_projects(request.args), Projet, PROJECT_SORT_KEYS, request.args
+        )
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    return with_validators(jsonify(page), etag, last_modified)
 
 
 @bp.route("/api/projets/<int:project_id>", methods=["GET"])
 @login_required
 def api_projet(project_id):
     # Trouver le projet
-    projet = next((p for p in MOCK_PROJECTS if p.id == project_id), None)
+    projet = db.session.get(Projet, project_id)
 
     if not projet:
         return jsonify({"error": "Projet non trouvé"}), 404
 
-    return jsonify(projet.to_dict())
+    etag, last_modified = entity_etag(projet)
+    if is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    return with_validators(jsonify(projet.to_dict()), etag, last_modified)
 
 
 # -----------------------------
@@ -543,89 +719,55 @@ def api_projet(project_id):
 # -----------------------------
 
 
-# Modèle de données pour les budgets
-class Budget:
-    def __init__(
-        self,
-        id,
-        nom,
-        montant,
-        statut,
-        date_allocation,
-        projet_associe=None,
-        description=None,
-    ):
-        self.id = id
-        self.nom = nom
-        self.montant = montant
-        self.statut = statut
-        self.date_allocation = date_allocation
-        self.projet_associe = projet_associe
-        self.description = description
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "nom": self.nom,
-            "montant": self.montant,
-            "statut": self.statut,
-            "date": (
-                self.date_allocation.strftime("%Y-%m-%d")
-                if isinstance(self.date_allocation, datetime)
-                else self.date_allocation
-            ),
-            "projet_associe": self.projet_associe,
-            "description": self.description,
-        }
-
-
-# Données fictives pour budgets
-MOCK_BUDGETS = [
-    Budget(
-        1,
-        "Budget Développement Rural",
-        "500 000 Ariary",
-        "Approuvé",
-        datetime(2025, 1, 15),
-        "Projet Développement Rural",
-        "Budget alloué au développement des zones rurales de la région",
-    ),
-    Budget(
-        2,
-        "Budget Santé Communautaire",
-        "750 000 Ariary",
-        "En cours",
-        datetime(2025, 2, 10),
-        "Projet Santé Communautaire",
-        "Financement des centres de santé communautaires",
-    ),
-    Budget(
-        3,
-        "Budget Infrastructure Routière",
-        "1 200 000 Ariary",
-        "Planifié",
-        datetime(2025, 3, 5),
-        "Projet Infrastructure Routière",
-        "Développement et entretien des routes régionales",
-    ),
-]
-
-
 @bp.route("/budgets")
 @login_required
 def budgets():
+    etag, last_modified = collection_etag("budgets", current_user.get_id())
+    if not session.get("_flashes") and is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+
     # Convertir les objets Budget en dictionnaires pour le template
-    budgets_data = [budget.to_dict() for budget in MOCK_BUDGETS]
-    return render_template("budgets.html", user=current_user, budgets=budgets_data)
+    budgets_data = [budget.to_dict() for budget in Budget.query.order_by(Budget.id)]
+    html = render_template("budgets.html", user=current_user, budgets=budgets_data)
+    return with_validators(make_response(html), etag, last_modified)
+
+
+# Clés de tri autorisées pour /api/budgets
+BUDGET_SORT_KEYS = ("id", "date_allocation", "statut", "nom")
+
+
+def filter_budgets(args):
+    """Construit la requête des budgets filtrée selon les paramètres d'URL."""
+    query = Budget.query
+    if args.get("statut"):
+        query = query.filter(Budget.statut == args["statut"])
+    if args.get("projet"):
+        query = query.filter(Budget.projet_associe == args["projet"])
+    date_from = parse_date(args.get("date_from"), "date_from")
+    if date_from:
+        query = query.filter(Budget.date_allocation >= date_from)
+    date_to = parse_date(args.get("date_to"), "date_to")
+    if date_to:
+        query = query.filter(Budget.date_allocation <= date_to)
+    return query
 
 
 @bp.route("/api/budgets", methods=["GET", "POST"])
 @login_required
 def api_budgets():
     if request.method == "GET":
-        # Retourner la liste des budgets en JSON
-        budgets_data = [budget.to_dict() for budget in MOCK_BUDGETS]
-        return jsonify(budgets_data)
+        etag, last_modified = collection_etag("budgets")
+        if is_not_modified(etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        # Retourner une page de budgets en JSON (pagination par curseur)
+        try:
+            page = keyset_page(
+                filter_budgets(request.args), Budget, BUDGET_SORT_KEYS, request.args
+            )
+        except PaginationError as e:
+            return jsonify({"error": str(e)}), 400
+        return with_validators(jsonify(page), etag, last_modified)
 
     elif request.method == "POST":
         # Créer un nouveau budget
@@ -637,12 +779,8 @@ def api_budgets():
         ):
             return jsonify({"error": "Données manquantes"}), 400
 
-        # Créer un nouvel ID
-        new_id = max(budget.id for budget in MOCK_BUDGETS) + 1 if MOCK_BUDGETS else 1
-
-        # Créer le nouveau budget
+        # Créer le nouveau budget (l'ID est attribué par la base)
         new_budget = Budget(
-            id=new_id,
             nom=data["nom"],
             montant=data["montant"],
             statut=data["statut"],
@@ -651,24 +789,75 @@ def api_budgets():
             description=data.get("description"),
         )
 
-        # Ajouter à la liste (dans une vraie application, on sauvegarderait en
-        # base de données)
-        MOCK_BUDGETS.append(new_budget)
+        db.session.add(new_budget)
+        db.session.commit()
 
         return jsonify(new_budget.to_dict()), 201
 
 
+@bp.route("/api/budgets/batch", methods=["POST"])
+@login_required
+def api_budgets_batch():
+    # Créations / mises à jour / suppressions en lot, dans une seule transaction
+    data = request.get_json(silent=True)
+    if not data or "operations" not in data:
+        return jsonify({"error": "Données manquantes"}), 400
+
+    try:
+        creates, updates, deletes, errors = budget_batch.validate(data["operations"])
+    except budget_batch.BatchError as e:
+        return jsonify({"error": str(e)}), 400
+    if errors:
+        return (
+            jsonify(
+                {"error": "Lot invalide, aucune opération appliquée", "results": errors}
+            ),
+            400,
+        )
+
+    try:
+        results = budget_batch.apply(creates, updates, deletes)
+        db.session.commit()
+    except budget_batch.BatchRejected as e:
+        # Budget supprimé entre la validation et le verrouillage des lignes
+        db.session.rollback()
+        return (
+            jsonify(
+                {
+                    "error": "Lot invalide, aucune opération appliquée",
+                    "results": e.errors,
+                }
+            ),
+            400,
+        )
+    except SQLAlchemyError:
+        db.session.rollback()
+        return jsonify({"error": "Échec de l'enregistrement du lot"}), 500
+
+    return jsonify(
+        {
+            "created": len(creates),
+            "updated": len(updates),
+            "deleted": len(deletes),
+            "results": results,
+        }
+    )
+
+
 @bp.route("/api/budgets/<int:budget_id>", methods=["GET", "PUT", "DELETE"])
 @login_required
 def api_budget(budget_id):
     # Trouver le budget
-    budget = next((b for b in MOCK_BUDGETS if b.id == budget_id), None)
+    budget = db.session.get(Budget, budget_id)
 
     if not budget:
         return jsonify({"error": "Budget non trouvé"}), 404
 
     if request.method == "GET":
-        return jsonify(budget.to_dict())
+        etag, last_modified = entity_etag(budget)
+        if is_not_modified(etag, last_modified):
+            return not_modified(etag, last_modified)
+        return with_validators(jsonify(budget.to_dict()), etag, last_modified)
 
     elif request.method == "PUT":
         # Mettre à jour le budget
@@ -686,61 +875,161 @@ def api_budget(budget_id):
             budget.projet_associe = data["projet_associe"]
         if "description" in data:
             budget.description = data["description"]
+        db.session.commit()
 
         return jsonify(budget.to_dict())
 
     elif request.method == "DELETE":
         # Supprimer le budget
-        MOCK_BUDGETS.remove(budget)
+        db.session.delete(budget)
+        db.session.commit()
         return jsonify({"message": "Budget supprimé avec succès"})
 
 
+# -----------------------------
+# Exports CSV / XLSX (en flux)
+# -----------------------------
+def _export_response(collection, filter_query):
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Format non supporté : {fmt}"}), 400
+    try:
+        query = filter_query(request.args)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if request.args.get("async") == "1":
+        # Gros exports : fichier produit en tâche de fond, suivi par /api/jobs
+        return _job_accepted(
+            jobs.enqueue(
+                "exports.export",
+                {
+                    "collection": collection,
+                    "fmt": fmt,
+                    "args": request.args.to_dict(),
+                },
+                current_user.username,
+            )
+        )
+
+    filename = f"{collection}_{datetime.now():%Y%m%d}.{fmt}"
+    return Response(
+        stream_with_context(export_stream(query, collection, fmt)),
+        content_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @bp.route("/budgets/export")
 @login_required
 def export_budgets():
-    # Exporter les budgets (simulation)
-    flash("Export des budgets réalisé avec succès", "success")
-    return redirect(url_for("routes.budgets"))
+    return _export_response("budgets", filter_budgets)
+
+
+@bp.route("/taches/export")
+@login_required
+def export_taches():
+    return _export_response("taches", filter_tasks)
+
+
+@bp.route("/projets/export")
+@login_required
+def export_projets():
+    return _export_response("projets", filter_projects)
+
+
+# Filtres des exports exécutés en tâche de fond (app.exports.export_job)
+EXPORT_FILTERS = {
+    "budgets": filter_budgets,
+    "taches": filter_tasks,
+    "projets": filter_projects,
+}
 
 
 # -----------------------------
 # Gestion de la cartographie
 # -----------------------------
+@bp.route("/cartographie")
+@login_required
+def cartographie():
+    # Les sites sont chargés par la carte via /api/points (emprise visible)
+    return render_template("cartographie.html", user=current_user)
 
-# Données fictives pour cartes / points des projets
-MOCK_MAP_POINTS = [
-    {
-        "id": 1,
-        "nom": "École A",
-        "latitude": -21.45,
-        "longitude": 47.08,
-        "projet": "Construction école",
-    },
-    {
-        "id": 2,
-        "nom": "Route B",
-        "latitude": -21.47,
-        "longitude": 47.05,
-        "projet": "Réhabilitation route",
-    },
-    {
-        "id": 3,
-        "nom": "Pompe C",
-        "latitude": -21.49,
-        "longitude": 47.10,
-        "projet": "Installation eau potable",
-    },
-]
 
+@bp.route("/api/points", methods=["GET"])
+@login_required
+def api_points():
+    etag, last_modified = collection_etag("sites")
+    if is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    # Sites visibles dans l'emprise, regroupés côté serveur à faible zoom
+    try:
+        bbox = spatial.parse_bbox(request.args.get("bbox"))
+        zoom = spatial.parse_zoom(request.args.get("zoom"))
+    except spatial.SpatialError as e:
+        return jsonify({"error": str(e)}), 400
+    payload = spatial.points_payload(bbox, zoom, request.args)
+    return with_validators(jsonify(payload), etag, last_modified)
+
+
+@bp.route("/api/sites/nearest", methods=["GET"])
+@login_required
+def api_sites_nearest():
+    from app import geo
 
-@bp.route("/cartographie")
+    etag, last_modified = collection_etag("sites")
+    if is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    # Les k sites les plus proches d'un point (distance haversine)
+    try:
+        lat, lon = geo.parse_point(request.args)
+        k = geo.parse_number(request.args.get("k"), "k", geo.DEFAULT_K, geo.MAX_K, int)
+    except geo.GeoError as e:
+        return jsonify({"error": str(e)}), 400
+    sites = geo.with_sites(geo.nearest(lat, lon, k, request.args))
+    return with_validators(jsonify({"items": sites}), etag, last_modified)
+
+
+@bp.route("/api/sites/radius", methods=["GET"])
 @login_required
-def cartographie():
-    return render_template(
-        "cartographie.html", user=current_user, points=MOCK_MAP_POINTS
+def api_sites_radius():
+    from app import geo
+
+    etag, last_modified = collection_etag("sites")
+    if is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    # Sites à moins de `km` kilomètres d'un point, du plus proche au plus lointain
+    try:
+        lat, lon = geo.parse_point(request.args)
+        km = geo.parse_number(request.args.get("km"), "km", None, geo.MAX_RADIUS_KM)
+        limit = geo.parse_number(
+            request.args.get("limit"), "limit", geo.MAX_RESULTS, geo.MAX_RESULTS, int
+        )
+    except geo.GeoError as e:
+        return jsonify({"error": str(e)}), 400
+    found = geo.within_radius(lat, lon, km, limit + 1, request.args)
+    return with_validators(
+        jsonify(
+            {
+                "items": geo.with_sites(found[:limit]),
+                "truncated": len(found) > limit,
+            }
+        ),
+        etag,
+        last_modified,
     )
 
 
+@bp.route("/api/districts/coverage", methods=["GET"])
+@login_required
+def api_districts_coverage():
+    # Couverture lue dans la table de synthèse (aucun calcul géométrique)
+    return jsonify(summary.district_coverage())
+
+
 # -----------------------------
 # Gestion de la Analytics
 # -----------------------------
@@ -793,10 +1082,13 @@ def parametres():
         # Récupérer les données du formulaire
         username = request.form.get("username")
         email = request.form.get("email")
-        # Mettre à jour l'utilisateur actuel
-        current_user.username = username
-        current_user.email = email
+        # Mettre à jour l'utilisateur actuel (current_user est une identité
+        # en cache : on modifie l'enregistrement en base)
+        user = db.session.get(User, current_user.id)
+        user.username = username
+        user.email = email
         db.session.commit()
+        user_cache.invalidate(user.id)
         flash("✔️ Paramètres mis à jour avec succès.", "success")
         return redirect(url_for("routes.parametres"))
 
@@ -807,61 +1099,113 @@ def parametres():
 # Analytics IA - Détection anomalies & prédictions
 # -----------------------------
 
-# Données fictives pour les projets
-PROJECTS_DATA = [
-    {
-        "id": 1,
-        "nom": "Projet A",
-        "budget": 500000,
-        "executed": 520000,
-        "delai": 30,
-        "delai_real": 40,
-    },
-    {
-        "id": 2,
-        "nom": "Projet B",
-        "budget": 300000,
-        "executed": 250000,
-        "delai": 20,
-        "delai_real": 18,
-    },
-    {
-        "id": 3,
-        "nom": "Projet C",
-        "budget": 400000,
-        "executed": 600000,
-        "delai": 25,
-        "delai_real": 50,
-    },
-]
-
 
 @bp.route("/analytics_ia")
 @login_required
 def analytics_ia():
-    df = pd.DataFrame(PROJECTS_DATA)
+    # Import différé : pandas / NumPy ne sont chargés qu'à la première analyse
+    from app.analytics import analyse_projets
 
-    # Détection d’anomalies
-    df["anomalie_budget"] = df["executed"] > df["budget"] * 1.1
-    df["anomalie_delai"] = df["delai_real"] > df["delai"] * 1.1
+    # Calcul vectorisé, mis en cache tant que les données ne changent pas
+    resultat = analyse_projets()
+    return render_template(
+        "analytics_ia.html",
+        user=current_user,
+        anomalies=resultat["anomalies"],
+        recommandations=resultat["recommandations"],
+    )
 
-    anomalies = df[(df["anomalie_budget"]) | (df["anomalie_delai"])]
 
-    # Recommandations simples
-    def recommander_reallocation(row):
-        if row["anomalie_budget"] and not row["anomalie_delai"]:
-            return "Réduire budget futur ou reporter fonds"
-        elif row["anomalie_delai"]:
-            return "Allouer ressources supplémentaires"
-        return "Aucune action nécessaire"
+@bp.route("/api/analytics/anomalies")
+@login_required
+def api_analytics_anomalies():
+    # Détection statistique sur tout le portefeuille (?method=zscore|iqr|...)
+    from app.analytics import DetectorError, anomalies_portefeuille, check_parameters
+
+    try:
+        seuil = request.args.get("threshold", type=float)
+        limit = parse_limit(request.args.get("limit"))
+        if request.args.get("async") == "1":
+            # Calcul dans le pool de processus, suivi par /api/jobs/<id>
+            params = {
+                "methode": request.args.get("method", "zscore"),
+                "metrique": request.args.get("metric", "budget"),
+                "groupe": request.args.get("group_by", "type_projet"),
+            }
+            check_parameters(**params)
+            return _job_accepted(
+                jobs.enqueue(
+                    "analytics.anomalies",
+                    {**params, "seuil": seuil, "limit": limit},
+                    current_user.username,
+                )
+            )
+        anomalies = anomalies_portefeuille(
+            request.args.get("method", "zscore"),
+            request.args.get("metric", "budget"),
+            request.args.get("group_by", "type_projet"),
+            seuil,
+        )
+    except (DetectorError, PaginationError) as e:
+        return jsonify({"error": str(e)}), 400
 
-    df["recommandation"] = df.apply(recommander_reallocation, axis=1)
+    return jsonify(
+        {
+            "method": request.args.get("method", "zscore"),
+            "count": len(anomalies),
+            "anomalies": anomalies.head(limit).to_dict(orient="records"),
+        }
+    )
 
-    return render_template(
-        "analytics_ia.html",
-        user=current_user,
-        anomalies=anomalies.to_dict(orient="records"),
-        recommandations=df["recommandation"].tolist(),
+
+# -----------------------------
+# Tâches de fond
+# -----------------------------
+def _job_accepted(job):
+    # 202 : le client suit l'avancement à l'adresse indiquée
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers["Location"] = url_for("routes.api_job", job_id=job.id)
+    return response
+
+
+def _own_job(job_id):
+    # Un travail n'est visible que de son auteur (et des administrateurs)
+    job = db.session.get(Job, job_id)
+    if job is None or (
+        job.auteur != current_user.username and current_user.role != "admin"
+    ):
+        abort(404)
+    return job
+
+
+@bp.route("/api/jobs/<job_id>", methods=["GET", "DELETE"])
+@login_required
+def api_job(job_id):
+    job = _own_job(job_id)
+    if request.method == "DELETE":
+        if not jobs.cancel(job.id):
+            return jsonify({"error": "Travail déjà terminé"}), 409
+        db.session.refresh(job)
+    response = jsonify(job.to_dict())
+    # État changeant : jamais servi depuis un cache
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@bp.route("/api/jobs/<job_id>/download")
+@login_required
+def api_job_download(job_id):
+    job = _own_job(job_id)
+    resultat = job.to_dict()["resultat"] or {}
+    if job.statut != jobs.TERMINE or "fichier" not in resultat:
+        return jsonify({"error": "Aucun fichier disponible"}), 404
+    return send_from_directory(
+        current_app.config["JOBS_FOLDER"],
+        resultat["fichier"],
+        mimetype=resultat.get("mime"),
+        as_attachment=True,
+        download_name=resultat.get("nom"),
     )
 
 
@@ -0,0 +1,443 @@
+"""Recherche plein texte dans les documents.
+
+L'index inversé est la table ``document_search`` : table virtuelle FTS5 sous
+SQLite, colonne ``tsvector`` générée (index GIN) sous PostgreSQL. Il est tenu
+à jour de façon incrémentale :
+
+- métadonnées (titre, projet, description) écrites dans la transaction de la
+  fiche (événements du modèle ``Document``), suppression comprise ;
+- texte du fichier extrait hors requête (``app.extraction``) par le travail
+  de fond ``documents.index`` (``app.jobs``), planifié après chaque envoi,
+  qui vide la file ``document_index``. Un contenu déjà extrait (même
+  empreinte) est recopié sans relire le fichier.
+
+La recherche classe les résultats (BM25 / ``ts_rank_cd``) et ne calcule les
+extraits surlignés que pour la page demandée.
+"""
+
+import html
+import re
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import event, func, inspect, or_, select, text, update
+
+from app import db
+from app.extraction import ExtractionError, UnsupportedFormat, extract_text
+from app.models import Document, DocumentIndex
+
+TABLE = "document_search"
+METADATA = ("titre", "projet", "description")
+
+EN_ATTENTE = "en_attente"
+EN_COURS = "en_cours"
+INDEXE = "indexe"
+ERREUR = "erreur"
+NON_SUPPORTE = "non_supporte"
+
+INDEX_BATCH = 20
+# Traitement interrompu (worker arrêté) : repris après ce délai
+STALE_AFTER = timedelta(minutes=10)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+MAX_OFFSET = 1000
+
+# Marqueurs des extraits, remplacés après échappement HTML
+_DEBUT, _FIN = "\x02", "\x03"
+_TERME = re.compile(r"\w+", re.UNICODE)
+
+_SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "titre, projet, description, contenu, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+)
+_POSTGRES_DDL = (
+    f"""CREATE TABLE IF NOT EXISTS {TABLE} (
+        document_id INTEGER PRIMARY KEY REFERENCES documents (id) ON DELETE CASCADE,
+        titre TEXT,
+        projet TEXT,
+        description TEXT,
+        contenu TEXT,
+        vecteur tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('french', coalesce(titre, '')), 'A')
+            || setweight(to_tsvector('french', coalesce(projet, '') || ' '
+                                     || coalesce(description, '')), 'B')
+            || setweight(to_tsvector('french', coalesce(contenu, '')), 'C')
+        ) STORED
+    )""",
+    f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_vecteur ON {TABLE} USING GIN (vecteur)",
+)
+
+
+class SearchError(ValueError):
+    """Requête de recherche invalide (termes, limite ou décalage)."""
+
+
+def _postgres(connection):
+    return connection.dialect.name == "postgresql"
+
+
+def _key(connection):
+    # Identifiant du document : rowid de la table FTS5, colonne sous PostgreSQL
+    return "document_id" if _postgres(connection) else "rowid"
+
+
+# -----------------------------
+# Table d'index (créée avec le schéma)
+# -----------------------------
+@event.listens_for(db.metadata, "after_create")
+def _create_search_table(target, connection, **kw):
+    for ddl in _POSTGRES_DDL if _postgres(connection) else _SQLITE_DDL:
+        connection.exec_driver_sql(ddl)
+
+
+@event.listens_for(db.metadata, "before_drop")
+def _drop_search_table(target, connection, **kw):
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+# -----------------------------
+# Mise à jour incrémentale (événements du modèle)
+# -----------------------------
+@event.listens_for(Document, "after_insert")
+def _index_new(mapper, connection, target):
+    valeurs = {column: getattr(target, column) for column in METADATA}
+    connection.execute(
+        text(
+            f"INSERT INTO {TABLE} ({_key(connection)}, titre, projet, description)"
+            " VALUES (:id, :titre, :projet, :description)"
+        ),
+        {"id": target.id, **valeurs},
+    )
+    connection.execute(
+        DocumentIndex.__table__.insert().values(
+            document_id=target.id, statut=EN_ATTENTE, updated_at=datetime.utcnow()
+        )
+    )
+
+
+@event.listens_for(Document, "after_update")
+def _index_changes(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if any(attrs[column].history.has_changes() for column in METADATA):
+        connection.execute(
+            text(
+                f"UPDATE {TABLE} SET titre = :titre, projet = :projet,"
+                f" description = :description WHERE {_key(connection)} = :id"
+            ),
+            {"id": target.id, **{c: getattr(target, c) for c in METADATA}},
+        )
+    if attrs.chemin.history.has_changes():
+        # Nouveau fichier : l'ancien texte reste cherchable jusqu'à l'extraction
+        connection.execute(
+            update(DocumentIndex.__table__)
+            .where(DocumentIndex.document_id == target.id)
+            .values(statut=EN_ATTENTE, erreur=None, updated_at=datetime.utcnow())
+        )
+
+
+@event.listens_for(Document, "after_delete")
+def _unindex(mapper, connection, target):
+    connection.execute(
+        text(f"DELETE FROM {TABLE} WHERE {_key(connection)} = :id"),
+        {"id": target.id},
+    )
+    connection.execute(
+        DocumentIndex.__table__.delete().where(DocumentIndex.document_id == target.id)
+    )
+
+
+# -----------------------------
+# Extraction du texte (hors requête)
+# -----------------------------
+def _claim(document_id):
+    # Un seul worker traite un document donné : en attente, ou traitement
+    # abandonné (EN_COURS au-delà de STALE_AFTER) ; jamais un traitement actif
+    result = db.session.execute(
+        update(DocumentIndex)
+        .where(DocumentIndex.document_id == document_id, _pending_clause())
+        .values(statut=EN_COURS, updated_at=datetime.utcnow())
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _known_text(connection, empreinte, document_id):
+    # Texte déjà extrait pour le même contenu (fichiers dédupliqués)
+    if not empreinte:
+        return None
+    source = db.session.execute(
+        select(Document.id)
+        .join(DocumentIndex, DocumentIndex.document_id == Document.id)
+        .where(
+            Document.empreinte == empreinte,
+            Document.id != document_id,
+            DocumentIndex.statut == INDEXE,
+        )
+        .limit(1)
+    ).scalar()
+    if source is None:
+        return None
+    return connection.execute(
+        text(f"SELECT contenu FROM {TABLE} WHERE {_key(connection)} = :id"),
+        {"id": source},
+    ).scalar()
+
+
+def index_document(document_id):
+    """Extrait et indexe le texte d'un document ; renvoie son nouveau statut."""
+    from app.documents import storage_path
+
+    if not _claim(document_id):
+        return None
+    document = db.session.get(Document, document_id)
+    if document is None:
+        return None
+    connection = db.session.connection()
+    statut, erreur = INDEXE, None
+    contenu = _known_text(connection, document.empreinte, document_id)
+    if contenu is None:
+        try:
+            contenu = extract_text(storage_path(document.chemin), document.nom_fichier)
+        except UnsupportedFormat as e:
+            contenu, statut, erreur = "", NON_SUPPORTE, str(e)
+        except ExtractionError as e:
+            contenu, statut, erreur = "", ERREUR, str(e)[:255]
+
+    # Fichier remplacé pendant l'extraction : le texte est écarté
+    result = db.session.execute(
+        update(DocumentIndex)
+        .where(
+            DocumentIndex.document_id == document_id,
+            DocumentIndex.statut == EN_COURS,
+        )
+        .values(statut=statut, erreur=erreur, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 1:
+        connection.execute(
+            text(
+                f"UPDATE {TABLE} SET contenu = :contenu WHERE {_key(connection)} = :id"
+            ),
+            {"id": document_id, "contenu": contenu},
+        )
+        db.session.commit()
+        return statut
+    db.session.rollback()
+    return None
+
+
+def _pending_clause():
+    abandon = datetime.utcnow() - STALE_AFTER
+    return or_(
+        DocumentIndex.statut == EN_ATTENTE,
+        (DocumentIndex.statut == EN_COURS) & (DocumentIndex.updated_at < abandon),
+    )
+
+
+def pending(limit=INDEX_BATCH):
+    """Identifiants des documents à indexer (y compris traitements abandonnés)."""
+    return db.session.scalars(
+        select(DocumentIndex.document_id)
+        .where(_pending_clause())
+        .order_by(DocumentIndex.document_id)
+        .limit(limit)
+    ).all()
+
+
+def pending_count():
+    return db.session.scalar(
+        select(func.count()).select_from(DocumentIndex).where(_pending_clause())
+    )
+
+
+def index_pending(batch=INDEX_BATCH, progress=None):
+    """Traite toute la file d'indexation ; renvoie le nombre de documents.
+
+    ``progress(traites)`` est appelé après chaque document (travail de fond).
+    """
+    traites = 0
+    while True:
+        ids = pending(batch)
+        if not ids:
+            return traites
+        for document_id in ids:
+            if index_document(document_id):
+                traites += 1
+            if progress:
+                progress(traites)
+        if len(ids) < batch:
+            return traites
+
+
+def rebuild():
+    """Réécrit l'index à partir de la table ``documents`` ; tout est réextrait."""
+    connection = db.session.connection()
+    connection.execute(text(f"DELETE FROM {TABLE}"))
+    db.session.execute(DocumentIndex.__table__.delete())
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Document.id, *(getattr(Document, c) for c in METADATA))
+            .where(Document.id > last_id)
+            .order_by(Document.id)
+            .limit(1000)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        connection.execute(
+            text(
+                f"INSERT INTO {TABLE} ({_key(connection)}, titre, projet, description)"
+                " VALUES (:id, :titre, :projet, :description)"
+            ),
+            [row._asdict() for row in rows],
+        )
+        db.session.execute(
+            DocumentIndex.__table__.insert(),
+            [
+                {
+                    "document_id": row.id,
+                    "statut": EN_ATTENTE,
+                    "updated_at": datetime.utcnow(),
+                }
+                for row in rows
+            ],
+        )
+    db.session.commit()
+
+
+def index_job(ctx):
+    """Travail de fond ``documents.index`` : vide la file d'indexation."""
+    total = pending_count()
+
+    def progress(traites):
+        # La file peut grossir pendant le travail : 99 % au plus
+        ctx.progress(100 * traites / max(total, 1), f"{traites}/{total} document(s)")
+
+    return {"documents": index_pending(progress=progress)}
+
+
+def notify():
+    """Planifie l'indexation des nouveaux documents (à appeler après le commit).
+
+    Un seul travail en attente suffit : il traite toute la file.
+    """
+    from app import jobs
+
+    jobs.enqueue("documents.index")
+
+
+# -----------------------------
+# Recherche
+# -----------------------------
+def _fts5_query(q):
+    # Termes entre guillemets (syntaxe FTS5 neutralisée), le dernier en préfixe
+    termes = _TERME.findall(q)
+    if not termes:
+        raise SearchError("Paramètre 'q' requis (au moins un mot)")
+    return " ".join(f'"{terme}"' for terme in termes) + "*"
+
+
+def _highlight(extrait):
+    extrait = html.escape(extrait or "")
+    return extrait.replace(_DEBUT, "<mark>").replace(_FIN, "</mark>")
+
+
+def parse_window(args):
+    """Lit ``limit`` et ``offset`` (pagination des résultats classés)."""
+    try:
+        limit = int(args.get("limit") or DEFAULT_LIMIT)
+        offset = int(args.get("offset") or 0)
+    except ValueError:
+        raise SearchError("Paramètres 'limit' et 'offset' entiers attendus")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise SearchError(
+            f"Le paramètre 'limit' doit être compris entre 1 et {MAX_LIMIT}"
+        )
+    if not 0 <= offset <= MAX_OFFSET:
+        raise SearchError(
+            f"Le paramètre 'offset' doit être compris entre 0 et {MAX_OFFSET}"
+        )
+    return limit, offset
+
+
+def search(q, limit=DEFAULT_LIMIT, offset=0, type_document=None):
+    """Documents correspondant à ``q``, du plus pertinent au moins pertinent."""
+    connection = db.session.connection()
+    filtre = " AND d.type_document = :type" if type_document else ""
+    params = {"limit": limit + 1, "offset": offset, "type": type_document}
+    if _postgres(connection):
+        if not _TERME.search(q or ""):
+            raise SearchError("Paramètre 'q' requis (au moins un mot)")
+        params.update(
+            q=q,
+            options=f"StartSel={_DEBUT}, StopSel={_FIN}, MaxWords=30, MinWords=10",
+        )
+        # Extraits (ts_headline, coûteux) calculés pour la page seulement
+        sql = f"""
+            WITH requete AS (SELECT websearch_to_tsquery('french', :q) AS q),
+            page AS (
+                SELECT s.document_id, ts_rank_cd(s.vecteur, requete.q) AS score,
+                       coalesce(nullif(s.contenu, ''), s.description, '') AS texte
+                FROM {TABLE} s
+                JOIN documents d ON d.id = s.document_id, requete
+                WHERE s.vecteur @@ requete.q{filtre}
+                ORDER BY score DESC, s.document_id
+                LIMIT :limit OFFSET :offset
+            )
+            SELECT page.document_id, page.score,
+                   ts_headline('french', page.texte, requete.q, :options) AS extrait
+            FROM page, requete
+            ORDER BY page.score DESC, page.document_id
+        """
+    else:
+        params["q"] = _fts5_query(q or "")
+        # bm25 : plus petit = plus pertinent ; poids titre > projet > description
+        # (fonctions auxiliaires FTS5 : la table ne doit pas être renommée)
+        sql = f"""
+            SELECT {TABLE}.rowid AS document_id,
+                   -bm25({TABLE}, 10.0, 4.0, 2.0, 1.0) AS score,
+                   snippet({TABLE}, -1, '{_DEBUT}', '{_FIN}', '…', 16) AS extrait
+            FROM {TABLE}
+            JOIN documents d ON d.id = {TABLE}.rowid
+            WHERE {TABLE} MATCH :q{filtre}
+            ORDER BY bm25({TABLE}, 10.0, 4.0, 2.0, 1.0), {TABLE}.rowid
+            LIMIT :limit OFFSET :offset
+        """
+    rows = connection.execute(text(sql), params).all()
+    suite = len(rows) > limit
+    rows = rows[:limit]
+
+    documents = {
+        document.id: document
+        for document in db.session.scalars(
+            select(Document).where(Document.id.in_([row.document_id for row in rows]))
+        )
+    }
+    return {
+        "items": [
+            {
+                **documents[row.document_id].to_dict(),
+                "score": round(float(row.score), 4),
+                "extrait": _highlight(row.extrait),
+            }
+            for row in rows
+            if row.document_id in documents
+        ],
+        "next_offset": offset + limit if suite else None,
+        "limit": limit,
+    }
+
+
+def init_app(app):
+    @app.cli.command("documents-index")
+    @click.option(
+        "--rebuild", "rebuild_all", is_flag=True, help="Réindexer tous les documents."
+    )
+    def documents_index_command(rebuild_all):
+        """Extrait le texte des documents en attente d'indexation."""
+        if rebuild_all:
+            rebuild()
+        traites = index_pending()
+        click.echo(f"✅ {traites} document(s) indexé(s)")
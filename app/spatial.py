@@ -0,0 +1,269 @@
+"""Index spatial des sites et requêtes par emprise (bbox) et niveau de zoom.
+
+Chaque site porte une cellule de grille : le code de Morton (ordre Z) de sa
+position sur une grille de 2^24 × 2^24 cellules couvrant le globe. Des
+cellules voisines ont des codes proches, si bien qu'une emprise se décompose
+en quelques intervalles de codes parcourus par l'index B-tree ``cellule`` :
+même requête sous SQLite et PostgreSQL, sans extension spatiale.
+
+Aux petits niveaux de zoom, les sites sont regroupés en base par cellule
+parente (``GROUP BY cellule // 4^k``) : la réponse contient quelques dizaines
+de groupes au lieu de milliers de points.
+"""
+
+import json
+
+import click
+from sqlalchemy import event, func, inspect, or_, select
+
+from app import db
+from app.models import District, Site
+
+NIVEAU = 24
+CELLULES = 1 << NIVEAU
+# Nombre maximal de cellules pour décomposer une emprise en intervalles
+MAX_CELLULES_BBOX = 16
+
+DEFAULT_ZOOM = 12
+MAX_ZOOM = 22
+# Jusqu'à ce zoom inclus, les sites sont regroupés côté serveur
+CLUSTER_MAX_ZOOM = 13
+# Une tuile de 256 px couvre 2^zoom cellules : +2 niveaux, groupes de ~64 px
+CLUSTER_FINESSE = 2
+# Au-delà, même à fort zoom, la réponse est regroupée
+MAX_POINTS = 2000
+
+
+class SpatialError(ValueError):
+    """Paramètre ``bbox`` ou ``zoom`` invalide."""
+
+
+# -----------------------------
+# Grille et codes de Morton
+# -----------------------------
+def _spread(value):
+    # Intercale un bit nul entre chaque bit de ``value`` (32 bits)
+    value &= 0xFFFFFFFF
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    return (value | (value << 1)) & 0x5555555555555555
+
+
+def morton(x, y):
+    return _spread(x) | (_spread(y) << 1)
+
+
+def grid_xy(latitude, longitude, niveau=NIVEAU):
+    """Coordonnées entières de la cellule contenant le point, au ``niveau``."""
+    x = int((longitude + 180.0) / 360.0 * CELLULES)
+    y = int((latitude + 90.0) / 180.0 * CELLULES)
+    shift = NIVEAU - niveau
+    return min(max(x, 0), CELLULES - 1) >> shift, min(max(y, 0), CELLULES - 1) >> shift
+
+
+def cell_of(latitude, longitude):
+    """Cellule d'un site (à renseigner aussi lors des insertions en masse)."""
+    return morton(*grid_xy(latitude, longitude))
+
+
+@event.listens_for(Site, "before_insert")
+@event.listens_for(Site, "before_update")
+def _assign_cell(mapper, connection, target):
+    # Cellule et district ne changent qu'avec la position du site
+    attrs = inspect(target).attrs
+    if inspect(target).has_identity and not (
+        attrs.latitude.history.has_changes() or attrs.longitude.history.has_changes()
+    ):
+        return
+    from app import geo
+
+    target.cellule = cell_of(target.latitude, target.longitude)
+    target.district = geo.district_of(connection, target.latitude, target.longitude)
+
+
+def covering_ranges(bbox):
+    """Intervalles ``(début, fin)`` de cellules couvrant l'emprise ``bbox``.
+
+    L'emprise est découpée au niveau le plus fin qui la couvre avec au plus
+    ``MAX_CELLULES_BBOX`` cellules ; les codes consécutifs sont fusionnés.
+    """
+    west, south, east, north = bbox
+    for niveau in range(NIVEAU, -1, -1):
+        x0, y0 = grid_xy(south, west, niveau)
+        x1, y1 = grid_xy(north, east, niveau)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= MAX_CELLULES_BBOX:
+            break
+
+    ranges = []
+    codes = sorted(morton(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1))
+    for code in codes:
+        if ranges and ranges[-1][1] == code - 1:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+    shift = 2 * (NIVEAU - niveau)
+    return [(start << shift, ((end + 1) << shift) - 1) for start, end in ranges]
+
+
+# -----------------------------
+# Paramètres de requête
+# -----------------------------
+def parse_bbox(raw):
+    """Lit ``ouest,sud,est,nord`` (degrés décimaux)."""
+    if not raw:
+        raise SpatialError("Paramètre 'bbox' requis (ouest,sud,est,nord)")
+    try:
+        west, south, east, north = (float(value) for value in raw.split(","))
+    except ValueError:
+        raise SpatialError("bbox invalide : ouest,sud,est,nord attendus")
+    if not (-180 <= west <= east <= 180 and -90 <= south <= north <= 90):
+        raise SpatialError("bbox hors limites ou inversée")
+    return west, south, east, north
+
+
+def parse_zoom(raw):
+    if raw in (None, ""):
+        return DEFAULT_ZOOM
+    try:
+        zoom = int(raw)
+    except ValueError:
+        raise SpatialError("Le paramètre 'zoom' doit être un entier")
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise SpatialError(
+            f"Le paramètre 'zoom' doit être compris entre 0 et {MAX_ZOOM}"
+        )
+    return zoom
+
+
+# -----------------------------
+# Requêtes
+# -----------------------------
+def in_bbox(query, bbox, filtres):
+    """Restreint ``query`` aux sites de l'emprise (index ``cellule``)."""
+    west, south, east, north = bbox
+    query = query.where(
+        or_(*(Site.cellule.between(a, b) for a, b in covering_ranges(bbox))),
+        Site.longitude.between(west, east),
+        Site.latitude.between(south, north),
+    )
+    if filtres.get("category"):
+        query = query.where(Site.categorie == filtres["category"])
+    if filtres.get("status"):
+        query = query.where(Site.statut == filtres["status"])
+    return query
+
+
+def visible_sites(bbox, filtres, limit=MAX_POINTS):
+    """Sites de l'emprise ; renvoie ``(sites, tronqué)``."""
+    query = in_bbox(select(Site), bbox, filtres).order_by(Site.id).limit(limit + 1)
+    sites = db.session.scalars(query).all()
+    return sites[:limit], len(sites) > limit
+
+
+def visible_clusters(bbox, zoom, filtres):
+    """Regroupe en base les sites de l'emprise par cellule parente.
+
+    Renvoie ``(points, groupes)`` : les cellules ne contenant qu'un site sont
+    renvoyées comme points, les autres comme groupes (effectif, centre, emprise).
+    """
+    niveau = min(zoom + CLUSTER_FINESSE, NIVEAU)
+    parent = Site.cellule // (4 ** (NIVEAU - niveau))
+    query = in_bbox(
+        select(
+            func.count().label("nombre"),
+            func.min(Site.id).label("id"),
+            func.avg(Site.latitude).label("latitude"),
+            func.avg(Site.longitude).label("longitude"),
+            func.min(Site.longitude).label("west"),
+            func.min(Site.latitude).label("south"),
+            func.max(Site.longitude).label("east"),
+            func.max(Site.latitude).label("north"),
+        ),
+        bbox,
+        filtres,
+    ).group_by(parent)
+    rows = db.session.execute(query).all()
+
+    seuls = [row.id for row in rows if row.nombre == 1]
+    points = []
+    if seuls:
+        points = db.session.scalars(
+            select(Site).where(Site.id.in_(seuls)).order_by(Site.id)
+        ).all()
+    groupes = [
+        {
+            "count": row.nombre,
+            "latitude": row.latitude,
+            "longitude": row.longitude,
+            "bbox": [row.west, row.south, row.east, row.north],
+        }
+        for row in rows
+        if row.nombre > 1
+    ]
+    groupes.sort(key=lambda groupe: groupe["count"], reverse=True)
+    return points, groupes
+
+
+def points_payload(bbox, zoom, filtres):
+    """Réponse de ``/api/points`` : points visibles, regroupés à faible zoom."""
+    if zoom > CLUSTER_MAX_ZOOM:
+        sites, tronque = visible_sites(bbox, filtres)
+        if not tronque:
+            return {
+                "zoom": zoom,
+                "clustered": False,
+                "points": [site.to_dict() for site in sites],
+                "clusters": [],
+            }
+    points, groupes = visible_clusters(bbox, zoom, filtres)
+    return {
+        "zoom": zoom,
+        "clustered": True,
+        "points": [site.to_dict() for site in points],
+        "clusters": groupes,
+    }
+
+
+# -----------------------------
+# Contours des districts (commandes CLI)
+# -----------------------------
+def import_districts(collection, champ_nom="nom"):
+    """Crée ou remplace les districts d'une FeatureCollection GeoJSON."""
+    existants = {district.nom: district for district in District.query}
+    for feature in collection.get("features", []):
+        nom = (feature.get("properties") or {}).get(champ_nom)
+        if not nom:
+            raise click.ClickException(f"Propriété '{champ_nom}' manquante")
+        columns = District.columns_for(feature["geometry"])
+        district = existants.get(nom)
+        if district is None:
+            db.session.add(District(nom=nom, **columns))
+        else:
+            for key, value in columns.items():
+                setattr(district, key, value)
+    db.session.flush()
+
+
+def init_app(app):
+    @app.cli.command("districts-import")
+    @click.argument("fichier", type=click.File(encoding="utf-8"))
+    @click.option("--champ-nom", default="nom", help="Propriété portant le nom.")
+    def districts_import_command(fichier, champ_nom):
+        """Importe des contours de districts (GeoJSON) et réaffecte les sites."""
+        from app import geo
+
+        import_districts(json.load(fichier), champ_nom)
+        modifies = geo.assign_all_sites()
+        db.session.commit()
+        click.echo(f"✅ Districts importés, {modifies} site(s) réaffecté(s)")
+
+    @app.cli.command("districts-assign")
+    def districts_assign_command():
+        """Recalcule le district de tous les sites (par lots vectorisés)."""
+        from app import geo
+
+        modifies = geo.assign_all_sites()
+        db.session.commit()
+        click.echo(f"✅ {modifies} site(s) réaffecté(s)")
@@ -0,0 +1,588 @@
+// Sites de l'emprise visible, chargés par /api/points
+let projectsData = [];
+let serverClusters = [];
+let pointsRequest = null;
+
+// Variables globales
+let map;
+let markersGroup;
+let markerClusterGroup;
+let currentLayer = 'osm';
+let isClusterEnabled = true;
+let allMarkers = [];
+let filteredProjects = [];
+
+// Couleurs par catégorie
+const categoryColors = {
+    education: '#22c55e',
+    infrastructure: '#3b82f6',
+    sante: '#ef4444',
+    eau: '#06b6d4',
+    agriculture: '#84cc16'
+};
+
+// Initialisation de la carte
+function initializeMap() {
+    // Créer la carte centrée sur la région Haute Matsiatra
+    map = L.map('map', {
+        center: [-21.46, 47.07],
+        zoom: 12,
+        zoomControl: false
+    });
+
+    // Ajouter les contrôles de zoom personnalisés
+    L.control.zoom({
+        position: 'bottomleft'
+    }).addTo(map);
+
+    // Couches de base
+    const osmLayer = L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+        attribution: '© OpenStreetMap contributors'
+    });
+
+    const satelliteLayer = L.tileLayer('https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}', {
+        attribution: '© Esri'
+    });
+
+    // Ajouter la couche par défaut
+    osmLayer.addTo(map);
+
+    // Initialiser les groupes de marqueurs
+    markersGroup = L.layerGroup().addTo(map);
+    markerClusterGroup = L.markerClusterGroup({
+        chunkedLoading: true,
+        spiderfyOnMaxZoom: false,
+        showCoverageOnHover: false,
+        zoomToBoundsOnClick: false,
+        iconCreateFunction: function(cluster) {
+            const childCount = cluster.getChildCount();
+            let className = 'marker-cluster-';
+
+            if (childCount < 3) {
+                className += 'small';
+            } else if (childCount < 6) {
+                className += 'medium';
+            } else {
+                className += 'large';
+            }
+
+            return new L.DivIcon({
+                html: '<div><span>' + childCount + '</span></div>',
+                className: 'marker-cluster ' + className,
+                iconSize: new L.Point(40, 40)
+            });
+        }
+    }).addTo(map);
+
+    // Gestionnaire pour basculer entre les couches
+    document.getElementById('satellite-toggle').addEventListener('click', function() {
+        if (currentLayer === 'osm') {
+            map.removeLayer(osmLayer);
+            satelliteLayer.addTo(map);
+            currentLayer = 'satellite';
+            this.classList.add('active');
+            this.querySelector('i').className = 'fas fa-map';
+            this.title = 'Vue carte';
+        } else {
+            map.removeLayer(satelliteLayer);
+            osmLayer.addTo(map);
+            currentLayer = 'osm';
+            this.classList.remove('active');
+            this.querySelector('i').className = 'fas fa-satellite';
+            this.title = 'Vue satellite';
+        }
+    });
+
+    // Gestionnaire pour le groupement des marqueurs
+    document.getElementById('cluster-toggle').addEventListener('click', function() {
+        toggleClusterMode();
+    });
+
+    // Gestionnaire pour la localisation
+    document.getElementById('locate-btn').addEventListener('click', function() {
+        locateUser();
+    });
+
+    // Gestionnaire pour le plein écran
+    document.getElementById('fullscreen-btn').addEventListener('click', function() {
+        toggleFullscreen();
+    });
+
+    // Charger les sites visibles, puis à chaque déplacement de la carte
+    map.on('moveend', loadVisiblePoints);
+    loadVisiblePoints();
+
+    // Afficher le message de bienvenue
+    setTimeout(() => {
+        showWelcomeMessage();
+    }, 1000);
+}
+
+// Créer un marqueur personnalisé
+function createCustomMarker(project) {
+    const color = categoryColors[project.category] || '#6b7280';
+
+    // Icône selon la catégorie
+    const icons = {
+        education: 'fa-graduation-cap',
+        infrastructure: 'fa-road',
+        sante: 'fa-hospital',
+        eau: 'fa-tint',
+        agriculture: 'fa-seedling'
+    };
+
+    const icon = L.divIcon({
+        className: 'custom-marker',
+        html: `
+            <div class="marker-pin" style="background-color: ${color};">
+                <i class="fas ${icons[project.category] || 'fa-map-pin'}" style="color: white; font-size: 14px;"></i>
+            </div>
+        `,
+        iconSize: [30, 40],
+        iconAnchor: [15, 40],
+        popupAnchor: [0, -40]
+    });
+
+    const marker = L.marker([project.latitude, project.longitude], { icon });
+
+    // Contenu du popup personnalisé
+    const popupContent = `
+        <div class="custom-popup">
+            <div class="popup-header">
+                <div class="popup-title">${project.nom}</div>
+                <div class="popup-subtitle">${project.projet}</div>
+            </div>
+            <div class="popup-content">
+                <div class="popup-info">
+                    <div class="popup-icon"><i class="fas fa-info-circle"></i></div>
+                    <div class="popup-text">${project.description}</div>
+                </div>
+                <div class="popup-info">
+                    <div class="popup-icon"><i class="fas fa-user-tie"></i></div>
+                    <div class="popup-text">${project.responsable}</div>
+                </div>
+                <div class="popup-info">
+                    <div class="popup-icon"><i class="fas fa-money-bill-wave"></i></div>
+                    <div class="popup-text">${formatCurrency(project.budget)} Ar</div>
+                </div>
+                <div class="popup-info">
+                    <div class="popup-icon"><i class="fas fa-chart-line"></i></div>
+                    <div class="popup-text">Avancement: ${project.avancement}%</div>
+                </div>
+                <div class="popup-info">
+                    <div class="popup-icon"><i class="fas ${getStatusIcon(project.status)}"></i></div>
+                    <div class="popup-text">${getStatusText(project.status)}</div>
+                </div>
+                <div class="popup-actions">
+                    <a href="#" class="btn btn-primary" onclick="viewProjectDetails(${project.id})">
+                        <i class="fas fa-eye"></i> Détails
+                    </a>
+                    <a href="#" class="btn btn-secondary" onclick="editProject(${project.id})">
+                        <i class="fas fa-edit"></i> Modifier
+                    </a>
+                </div>
+            </div>
+        </div>
+    `;
+
+    marker.bindPopup(popupContent, {
+        maxWidth: 320,
+        className: 'custom-popup-wrapper'
+    });
+
+    // Événements du marqueur
+    marker.on('click', function() {
+        highlightProjectInList(project.id);
+    });
+
+    return marker;
+}
+
+// Charger les sites de l'emprise visible (groupés côté serveur à faible zoom)
+function loadVisiblePoints() {
+    const bounds = map.getBounds();
+    const params = new URLSearchParams({
+        bbox: [
+            Math.max(bounds.getWest(), -180), Math.max(bounds.getSouth(), -90),
+            Math.min(bounds.getEast(), 180), Math.min(bounds.getNorth(), 90)
+        ].join(','),
+        zoom: map.getZoom()
+    });
+    const category = document.getElementById('category-filter').value;
+    const status = document.getElementById('status-filter').value;
+    if (category) params.set('category', category);
+    if (status) params.set('status', status);
+
+    // Seule la dernière requête compte (déplacements rapides)
+    if (pointsRequest) pointsRequest.abort();
+    pointsRequest = new AbortController();
+    showLoading(true);
+
+    fetch(`/api/points?${params}`, { signal: pointsRequest.signal })
+        .then(response => response.json())
+        .then(data => {
+            projectsData = data.points;
+            serverClusters = data.clusters;
+            filterProjects();
+        })
+        .catch(error => {
+            if (error.name !== 'AbortError') {
+                showNotification('Erreur de chargement des sites', 'error');
+            }
+        })
+        .finally(() => showLoading(false));
+}
+
+// Marqueur d'un groupe calculé par le serveur : un clic zoome dessus
+function createServerClusterMarker(cluster) {
+    let className = 'marker-cluster-';
+    if (cluster.count < 10) {
+        className += 'small';
+    } else if (cluster.count < 100) {
+        className += 'medium';
+    } else {
+        className += 'large';
+    }
+
+    const marker = L.marker([cluster.latitude, cluster.longitude], {
+        icon: new L.DivIcon({
+            html: '<div><span>' + cluster.count + '</span></div>',
+            className: 'marker-cluster ' + className,
+            iconSize: new L.Point(40, 40)
+        })
+    });
+    marker.on('click', function() {
+        const [west, south, east, north] = cluster.bbox;
+        map.fitBounds([[south, west], [north, east]], { padding: [40, 40] });
+    });
+    return marker;
+}
+
+// Afficher les marqueurs des sites chargés
+function loadMarkers() {
+    allMarkers = [];
+    markersGroup.clearLayers();
+    markerClusterGroup.clearLayers();
+
+    filteredProjects.forEach(project => {
+        const marker = createCustomMarker(project);
+        allMarkers.push({ marker, project });
+
+        if (isClusterEnabled) {
+            markerClusterGroup.addLayer(marker);
+        } else {
+            markersGroup.addLayer(marker);
+        }
+    });
+
+    serverClusters.forEach(cluster => {
+        markersGroup.addLayer(createServerClusterMarker(cluster));
+    });
+
+    updateStats();
+}
+
+// Basculer le mode clustering
+function toggleClusterMode() {
+    const button = document.getElementById('cluster-toggle');
+
+    // Les deux groupes restent sur la carte : seule la répartition change
+    isClusterEnabled = !isClusterEnabled;
+    loadMarkers();
+
+    if (isClusterEnabled) {
+        button.classList.add('active');
+        button.title = 'Désactiver le groupement';
+        showNotification('Groupement des marqueurs activé', 'info');
+    } else {
+        button.classList.remove('active');
+        button.title = 'Activer le groupement';
+        showNotification('Groupement des marqueurs désactivé', 'info');
+    }
+}
+
+// Localiser l'utilisateur
+function locateUser() {
+    const button = document.getElementById('locate-btn');
+    const icon = button.querySelector('i');
+
+    button.classList.add('active');
+    icon.className = 'fas fa-spinner fa-spin';
+
+    map.locate({
+        setView: true,
+        maxZoom: 16,
+        timeout: 10000
+    });
+
+    map.on('locationfound', function(e) {
+        L.circle(e.latlng, {
+            color: '#3b82f6',
+            fillColor: '#3b82f6',
+            fillOpacity: 0.2,
+            radius: e.accuracy / 2
+        }).addTo(map);
+
+        L.marker(e.latlng, {
+            icon: L.divIcon({
+                className: 'user-location-marker',
+                html: '<div style="background: #3b82f6; width: 12px; height: 12px; border-radius: 50%; border: 3px solid white; box-shadow: 0 2px 4px rgba(0,0,0,0.3);"></div>',
+                iconSize: [18, 18],
+                iconAnchor: [9, 9]
+            })
+        }).addTo(map).bindPopup('Vous êtes ici').openPopup();
+
+        button.classList.remove('active');
+        icon.className = 'fas fa-location-arrow';
+        showNotification('Position trouvée!', 'success');
+    });
+
+    map.on('locationerror', function(e) {
+        button.classList.remove('active');
+        icon.className = 'fas fa-location-arrow';
+        showNotification('Impossible de vous localiser', 'error');
+    });
+}
+
+// Plein écran
+function toggleFullscreen() {
+    const mapContainer = document.getElementById('map');
+
+    if (!document.fullscreenElement) {
+        mapContainer.requestFullscreen().then(() => {
+            mapContainer.style.height = '100vh';
+            map.invalidateSize();
+            document.getElementById('fullscreen-btn').querySelector('i').className = 'fas fa-compress';
+        });
+    } else {
+        document.exitFullscreen().then(() => {
+            mapContainer.style.height = 'calc(100vh - 120px)';
+            map.invalidateSize();
+            document.getElementById('fullscreen-btn').querySelector('i').className = 'fas fa-expand';
+        });
+    }
+}
+
+// Filtrage des projets
+function filterProjects() {
+    const searchTerm = document.getElementById('search-input').value.toLowerCase();
+    const categoryFilter = document.getElementById('category-filter').value;
+    const statusFilter = document.getElementById('status-filter').value;
+    const budgetFilter = document.getElementById('budget-filter').value;
+
+    filteredProjects = projectsData.filter(project => {
+        const matchesSearch = project.nom.toLowerCase().includes(searchTerm) ||
+                            project.description.toLowerCase().includes(searchTerm);
+        const matchesCategory = !categoryFilter || project.category === categoryFilter;
+        const matchesStatus = !statusFilter || project.status === statusFilter;
+
+        let matchesBudget = true;
+        if (budgetFilter) {
+            const budget = project.budget;
+            switch (budgetFilter) {
+                case '0-100M':
+                    matchesBudget = budget <= 100000000;
+                    break;
+                case '100M-500M':
+                    matchesBudget = budget > 100000000 && budget <= 500000000;
+                    break;
+                case '500M+':
+                    matchesBudget = budget > 500000000;
+                    break;
+            }
+        }
+
+        return matchesSearch && matchesCategory && matchesStatus && matchesBudget;
+    });
+
+    loadMarkers();
+    updateProjectsList();
+}
+
+// Mettre à jour la liste des projets
+function updateProjectsList() {
+    const projectsList = document.querySelector('.projects-list');
+    const existingItems = projectsList.querySelectorAll('.project-item');
+
+    existingItems.forEach(item => {
+        const projectId = parseInt(item.dataset.id);
+        const isVisible = filteredProjects.some(p => p.id === projectId);
+        item.style.display = isVisible ? 'block' : 'none';
+    });
+}
+
+// Mettre à jour les statistiques
+function updateStats() {
+    const activeProjects = filteredProjects.filter(p => p.status === 'en-cours').length;
+    const completedProjects = filteredProjects.filter(p => p.status === 'termine').length;
+    const totalBudget = filteredProjects.reduce((sum, p) => sum + p.budget, 0);
+    const avgProgress = filteredProjects.length ? Math.round(
+        filteredProjects.reduce((sum, p) => sum + p.avancement, 0) / filteredProjects.length
+    ) : 0;
+
+    document.querySelectorAll('.stat-card .stat-number')[0].textContent = activeProjects;
+    document.querySelectorAll('.stat-card .stat-number')[1].textContent = completedProjects;
+    document.querySelectorAll('.stat-card .stat-number')[2].textContent = formatBudget(totalBudget);
+    document.querySelectorAll('.stat-card .stat-number')[3].textContent = avgProgress + '%';
+}
+
+// Fonctions utilitaires
+function formatCurrency(amount) {
+    return new Intl.NumberFormat('fr-FR').format(amount);
+}
+
+function formatBudget(amount) {
+    if (amount >= 1000000000) {
+        return (amount / 1000000000).toFixed(1) + 'B';
+    } else if (amount >= 1000000) {
+        return (amount / 1000000).toFixed(0) + 'M';
+    } else {
+        return (amount / 1000).toFixed(0) + 'K';
+    }
+}
+
+function getStatusIcon(status) {
+    const icons = {
+        'planifie': 'fa-calendar',
+        'en-cours': 'fa-clock',
+        'termine': 'fa-check-circle'
+    };
+    return icons[status] || 'fa-question';
+}
+
+function getStatusText(status) {
+    const texts = {
+        'planifie': 'Planifié',
+        'en-cours': 'En cours',
+        'termine': 'Terminé'
+    };
+    return texts[status] || 'Inconnu';
+}
+
+function showLoading(show) {
+    const overlay = document.getElementById('loading-overlay');
+    if (show) {
+        overlay.classList.add('active');
+    } else {
+        overlay.classList.remove('active');
+    }
+}
+
+function showNotification(message, type = 'info') {
+    // Créer une notification toast simple
+    const notification = document.createElement('div');
+    notification.className = `notification ${type}`;
+    notification.innerHTML = `
+        <i class="fas ${type === 'success' ? 'fa-check-circle' : type === 'error' ? 'fa-exclamation-circle' : 'fa-info-circle'}"></i>
+        ${message}
+    `;
+
+    // Styles pour la notification
+    Object.assign(notification.style, {
+        position: 'fixed',
+        top: '2rem',
+        right: '2rem',
+        background: type === 'success' ? '#22c55e' : type === 'error' ? '#ef4444' : '#3b82f6',
+        color: 'white',
+        padding: '1rem',
+        borderRadius: '8px',
+        boxShadow: '0 4px 12px rgba(0,0,0,0.15)',
+        zIndex: '10000',
+        display: 'flex',
+        alignItems: 'center',
+        gap: '0.5rem',
+        fontSize: '0.9rem',
+        fontWeight: '500',
+        transform: 'translateX(100%)',
+        transition: 'transform 0.3s ease'
+    });
+
+    document.body.appendChild(notification);
+
+    // Animation d'entrée
+    setTimeout(() => {
+        notification.style.transform = 'translateX(0)';
+    }, 100);
+
+    // Suppression automatique
+    setTimeout(() => {
+        notification.style.transform = 'translateX(100%)';
+        setTimeout(() => {
+            document.body.removeChild(notification);
+        }, 300);
+    }, 3000);
+}
+
+function showWelcomeMessage() {
+    const popup = L.popup()
+        .setLatLng([-21.46, 47.07])
+        .setContent(`
+            <div style="text-align: center; padding: 1rem;">
+                <h3 style="color: var(--primary-color); margin-bottom: 0.5rem;">
+                    <i class="fas fa-map-marked-alt"></i> Bienvenue!
+                </h3>
+                <p style="margin-bottom: 1rem; color: var(--text-secondary);">
+                    Explorez les projets de développement de la région Haute Matsiatra
+                </p>
+                <button onclick="map.closePopup()" class="btn btn-primary">
+                    <i class="fas fa-search"></i> Explorer
+                </button>
+            </div>
+        `)
+        .openOn(map);
+}
+
+function highlightProjectInList(projectId) {
+    document.querySelectorAll('.project-item').forEach(item => {
+        item.classList.remove('selected');
+    });
+
+    const projectElement = document.querySelector(`[data-id="${projectId}"]`);
+    if (projectElement) {
+        projectElement.classList.add('selected');
+        projectElement.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+    }
+}
+
+function viewProjectDetails(projectId) {
+    showNotification(`Affichage des détails du projet #${projectId}`, 'info');
+}
+
+function editProject(projectId) {
+    showNotification(`Édition du projet #${projectId}`, 'info');
+}
+
+// Event listeners
+document.addEventListener('DOMContentLoaded', function() {
+    // Initialiser la carte
+    initializeMap();
+
+    // Filtres
+    document.getElementById('search-input').addEventListener('input', filterProjects);
+    document.getElementById('category-filter').addEventListener('change', loadVisiblePoints);
+    document.getElementById('status-filter').addEventListener('change', loadVisiblePoints);
+    document.getElementById('budget-filter').addEventListener('change', filterProjects);
+
+    // Clic sur les projets de la liste
+    document.querySelectorAll('.project-item').forEach(item => {
+        item.addEventListener('click', function() {
+            const projectId = parseInt(this.dataset.id);
+            const project = projectsData.find(p => p.id === projectId);
+            if (project) {
+                map.setView([project.latitude, project.longitude], 15);
+                highlightProjectInList(projectId);
+            }
+        });
+    });
+
+    // Clic sur les éléments de la légende
+    document.querySelectorAll('.legend-item').forEach(item => {
+        item.addEventListener('click', function() {
+            const category = this.dataset.category;
+            if (category) {
+                document.getElementById('category-filter').value = category;
+                filterProjects();
+            }
+        });
+    });
+});
@@ -0,0 +1,437 @@
+// Global variables
+// Documents chargés page par page depuis /api/documents (curseur)
+let documents = [];
+let nextCursor = null;
+let editingId = null;
+
+function formatSize(bytes) {
+    if (bytes >= 1024 * 1024) return (bytes / (1024 * 1024)).toFixed(1) + ' MB';
+    if (bytes >= 1024) return Math.round(bytes / 1024) + ' KB';
+    return bytes + ' o';
+}
+
+function fromApi(doc) {
+    return {
+        id: doc.id,
+        title: doc.titre,
+        type: doc.type || '',
+        project: doc.projet || 'Non spécifié',
+        version: doc.version,
+        size: formatSize(doc.taille),
+        date: doc.modifie ? new Date(doc.modifie).toLocaleDateString('fr-FR') : '',
+        author: doc.auteur || '',
+        description: doc.description || '',
+        file: doc.fichier,
+        mime: doc.mime_type
+    };
+}
+
+async function loadDocuments(append = false) {
+    const params = new URLSearchParams({ sort: '-date_ajout', limit: 50 });
+    const typeFilter = document.getElementById('type-filter').value;
+    if (typeFilter) params.set('type', typeFilter);
+    if (append && nextCursor) params.set('cursor', nextCursor);
+
+    const response = await fetch(`/api/documents?${params}`);
+    if (!response.ok) {
+        showToast('error', 'Erreur', 'Impossible de charger les documents');
+        return;
+    }
+    const page = await response.json();
+    const items = page.items.map(fromApi);
+    documents = append ? documents.concat(items) : items;
+    nextCursor = page.next_cursor;
+    document.getElementById('load-more').style.display = nextCursor ? 'inline-flex' : 'none';
+    applySearch();
+}
+
+// Document management functions
+let searchRequest = null;
+
+function applySearch() {
+    const searchTerm = document.getElementById('search').value.trim();
+    if (searchTerm.length < 2) {
+        renderDocuments(documents);
+        return documents;
+    }
+    // Recherche plein texte côté serveur (titre, métadonnées et contenu)
+    if (searchRequest) searchRequest.abort();
+    searchRequest = new AbortController();
+    const params = new URLSearchParams({ q: searchTerm, limit: 50 });
+    const typeFilter = document.getElementById('type-filter').value;
+    if (typeFilter) params.set('type', typeFilter);
+    return fetch(`/api/documents/search?${params}`, { signal: searchRequest.signal })
+        .then(response => response.json())
+        .then(page => {
+            const results = (page.items || []).map(doc => ({ ...fromApi(doc), snippet: doc.extrait }));
+            renderDocuments(results);
+            return results;
+        })
+        .catch(error => {
+            if (error.name !== 'AbortError') showToast('error', 'Erreur', 'Recherche impossible');
+            return [];
+        });
+}
+
+async function filterDocuments() {
+    await loadDocuments();
+    const filteredDocs = await applySearch();
+    showToast('success', 'Filtres appliqués', `${filteredDocs.length} document(s) trouvé(s)`);
+}
+
+function renderDocuments(docsToRender) {
+    const tbody = document.getElementById('documents-tbody');
+    document.getElementById('documents-count').textContent =
+        `${docsToRender.length} document${docsToRender.length > 1 ? 's' : ''} affiché${docsToRender.length > 1 ? 's' : ''}`;
+
+    if (docsToRender.length === 0) {
+        tbody.innerHTML = `
+            <tr>
+                <td colspan="5">
+                    <div class="empty-state">
+                        <i class="fas fa-search"></i>
+                        <h3>Aucun document trouvé</h3>
+                        <p>Essayez de modifier vos critères de recherche</p>
+                    </div>
+                </td>
+            </tr>
+        `;
+        return;
+    }
+
+    tbody.innerHTML = docsToRender.map(doc => `
+        <tr class="fade-in">
+            <td>
+                <div class="document-info">
+                    <div class="document-icon">
+                        <i class="fas fa-file-${doc.type === 'rapport' ? 'alt' : doc.type === 'contrat' ? 'contract' : 'code'}"></i>
+                    </div>
+                    <div class="document-details">
+                        <h4>${escapeHtml(doc.title)}</h4>
+                        <div class="document-meta">${escapeHtml(doc.project)} • ${doc.size}</div>
+                        ${doc.snippet ? `<div class="document-meta">${doc.snippet}</div>` : ''}
+                    </div>
+                </div>
+            </td>
+            <td>
+                <span class="document-type ${doc.type}">${getTypeLabel(doc.type)}</span>
+            </td>
+            <td>
+                <div class="document-version">
+                    <span class="version-badge">v${doc.version}</span>
+                    <small>${escapeHtml(doc.file)}</small>
+                </div>
+            </td>
+            <td>
+                <div>${doc.date}</div>
+                <small>par ${escapeHtml(doc.author)}</small>
+            </td>
+            <td>
+                <div class="document-actions">
+                    <button class="action-btn view" title="Visualiser" onclick="viewDocument(${doc.id})">
+                        <i class="fas fa-eye"></i>
+                    </button>
+                    <button class="action-btn edit" title="Modifier" onclick="editDocument(${doc.id})">
+                        <i class="fas fa-edit"></i>
+                    </button>
+                    <button class="action-btn delete" title="Supprimer" onclick="deleteDocument(${doc.id})">
+                        <i class="fas fa-trash"></i>
+                    </button>
+                </div>
+            </td>
+        </tr>
+    `).join('');
+}
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text || '';
+    return div.innerHTML;
+}
+
+function getTypeLabel(type) {
+    const labels = {
+        'rapport': 'Rapport d\'avancement',
+        'contrat': 'Document contractuel',
+        'technique': 'Document technique'
+    };
+    return labels[type] || type;
+}
+
+function viewDocument(id) {
+    const doc = documents.find(d => d.id === id);
+    if (doc) {
+        const url = `/documents/${doc.id}/download`;
+        document.getElementById('preview-download').href = `${url}?attachment=1`;
+        showModal('preview-modal');
+        // Les PDF et textes sont affichés par le navigateur (requêtes Range)
+        const inline = doc.mime === 'application/pdf' || doc.mime === 'text/plain';
+        document.getElementById('document-preview').innerHTML = `
+            <div style="text-align: center; padding: ${inline ? '0' : '3rem'};">
+                ${inline
+                    ? `<iframe src="${url}" title="Aperçu" style="width: 100%; height: 70vh; border: none;"></iframe>`
+                    : `<i class="fas fa-file-alt" style="font-size: 4rem; color: #3b82f6; margin-bottom: 1rem;"></i>`}
+                <h3>${escapeHtml(doc.title)}</h3>
+                <p style="color: #6b7280; margin: 1rem 0;">Version ${doc.version} • ${doc.size}</p>
+                <p style="background: #f3f4f6; padding: 1rem; border-radius: 8px; margin-top: 2rem;">
+                    ${escapeHtml(doc.description)}
+                </p>
+            </div>
+        `;
+    }
+}
+
+function editDocument(id) {
+    const doc = documents.find(d => d.id === id);
+    if (doc) {
+        editingId = id;
+        document.getElementById('edit-title').value = doc.title;
+        document.getElementById('edit-type').value = doc.type;
+        document.getElementById('edit-project').value = doc.project === 'Non spécifié' ? '' : doc.project;
+        document.getElementById('edit-description').value = doc.description;
+        showModal('edit-modal');
+    }
+}
+
+async function deleteDocument(id) {
+    if (confirm('Êtes-vous sûr de vouloir supprimer ce document ? Cette action est irréversible.')) {
+        const response = await fetch(`/api/documents/${id}`, { method: 'DELETE' });
+        if (!response.ok) {
+            showToast('error', 'Erreur', 'La suppression a échoué');
+            return;
+        }
+        documents = documents.filter(d => d.id !== id);
+        applySearch();
+        showToast('success', 'Document supprimé', 'Le document a été supprimé avec succès');
+    }
+}
+
+async function saveDocument() {
+    const response = await fetch(`/api/documents/${editingId}`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            titre: document.getElementById('edit-title').value,
+            type: document.getElementById('edit-type').value,
+            projet: document.getElementById('edit-project').value,
+            description: document.getElementById('edit-description').value
+        })
+    });
+    const data = await response.json();
+    if (!response.ok) {
+        showToast('error', 'Erreur', data.error);
+        return;
+    }
+    documents = documents.map(d => d.id === data.id ? fromApi(data) : d);
+    applySearch();
+    closeModal('edit-modal');
+    showToast('success', 'Document modifié', 'Les modifications ont été enregistrées');
+}
+
+// File upload handling
+function setupFileUpload() {
+    const fileInput = document.getElementById('file-input');
+    const uploadArea = document.querySelector('.file-upload-area');
+    const form = document.getElementById('upload-form');
+
+    // Drag and drop
+    uploadArea.addEventListener('dragover', (e) => {
+        e.preventDefault();
+        uploadArea.classList.add('dragover');
+    });
+
+    uploadArea.addEventListener('dragleave', () => {
+        uploadArea.classList.remove('dragover');
+    });
+
+    uploadArea.addEventListener('drop', (e) => {
+        e.preventDefault();
+        uploadArea.classList.remove('dragover');
+        const files = e.dataTransfer.files;
+        fileInput.files = files;
+        handleFiles(files);
+    });
+
+    fileInput.addEventListener('change', (e) => {
+        handleFiles(e.target.files);
+    });
+
+    form.addEventListener('submit', (e) => {
+        e.preventDefault();
+        uploadDocument();
+    });
+}
+
+function handleFiles(files) {
+    if (files.length > 0) {
+        document.querySelector('.upload-text').innerHTML =
+            `<strong>${files.length} fichier(s) sélectionné(s)</strong>`;
+    }
+}
+
+// Envoi par morceaux : reprise au dernier octet reçu après une coupure
+const HASH_MAX_SIZE = 64 * 1024 * 1024;
+const MAX_RETRIES = 5;
+
+async function sha256(file) {
+    // Empreinte calculée dans le navigateur (contexte sécurisé) : un
+    // contenu déjà stocké n'est pas renvoyé
+    if (!window.crypto || !crypto.subtle || file.size > HASH_MAX_SIZE) return null;
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function jsonOrThrow(response) {
+    const data = await response.json();
+    if (!response.ok && response.status !== 409) throw new Error(data.error || 'Envoi impossible');
+    return data;
+}
+
+async function openUpload(file) {
+    const key = `upload:${file.name}:${file.size}:${file.lastModified}`;
+    const saved = localStorage.getItem(key);
+    if (saved) {
+        const response = await fetch(`/api/documents/uploads/${saved}`);
+        if (response.ok) return { key, upload: await response.json() };
+    }
+    const upload = await jsonOrThrow(await fetch('/api/documents/uploads', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ nom: file.name, taille: file.size, sha256: await sha256(file) })
+    }));
+    localStorage.setItem(key, upload.id);
+    return { key, upload };
+}
+
+async function sendChunks(file, upload, onProgress) {
+    const chunkSize = upload.morceau || 8 * 1024 * 1024;
+    let recu = upload.recu;
+    let retries = 0;
+    while (!upload.complet && recu < file.size) {
+        const fin = Math.min(recu + chunkSize, file.size);
+        try {
+            const response = await fetch(`/api/documents/uploads/${upload.id}`, {
+                method: 'PUT',
+                headers: { 'Content-Range': `bytes ${recu}-${fin - 1}/${file.size}` },
+                body: file.slice(recu, fin)
+            });
+            const data = await jsonOrThrow(response);
+            recu = data.recu;
+            retries = 0;
+            onProgress(recu / file.size);
+        } catch (error) {
+            if (++retries > MAX_RETRIES) throw error;
+            await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** retries));
+            // Reprise au dernier octet confirmé par le serveur
+            const state = await fetch(`/api/documents/uploads/${upload.id}`);
+            if (state.ok) recu = (await state.json()).recu;
+        }
+    }
+}
+
+async function uploadDocument() {
+    const fileInput = document.getElementById('file-input');
+    const title = document.getElementById('document-title').value;
+    const type = document.getElementById('document-type').value;
+
+    if (!title || !type || !fileInput.files.length) {
+        showToast('error', 'Erreur', 'Veuillez remplir tous les champs obligatoires');
+        return;
+    }
+
+    const file = fileInput.files[0];
+    document.getElementById('upload-progress').style.display = 'block';
+    const progressFill = document.querySelector('.progress-fill');
+    try {
+        const { key, upload } = await openUpload(file);
+        await sendChunks(file, upload, ratio => {
+            progressFill.style.width = (100 * ratio) + '%';
+        });
+        const doc = await jsonOrThrow(await fetch(`/api/documents/uploads/${upload.id}/commit`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                titre: title,
+                type: type,
+                projet: document.getElementById('project-ref').value,
+                description: document.getElementById('description').value
+            })
+        }));
+        localStorage.removeItem(key);
+
+        documents.unshift(fromApi(doc));
+        applySearch();
+
+        // Reset form
+        document.getElementById('upload-form').reset();
+        document.querySelector('.upload-text').innerHTML =
+            '<strong>Cliquez pour sélectionner</strong> ou glissez-déposez vos fichiers';
+
+        showToast('success', 'Document ajouté', 'Le document a été téléchargé avec succès');
+    } catch (error) {
+        // L'envoi reste ouvert : le relancer avec le même fichier reprend
+        showToast('error', 'Erreur', error.message);
+    } finally {
+        document.getElementById('upload-progress').style.display = 'none';
+        progressFill.style.width = '0%';
+    }
+}
+
+// Modal functions
+function showModal(modalId) {
+    const modal = document.getElementById(modalId);
+    modal.classList.add('show');
+    document.body.style.overflow = 'hidden';
+}
+
+function closeModal(modalId) {
+    const modal = document.getElementById(modalId);
+    modal.classList.remove('show');
+    document.body.style.overflow = 'auto';
+}
+
+// Toast notifications
+function showToast(type, title, message) {
+    const toast = document.createElement('div');
+    toast.className = `toast ${type}`;
+    toast.innerHTML = `
+        <div class="toast-content">
+            <div class="toast-icon">
+                <i class="fas fa-${type === 'success' ? 'check-circle' : 'exclamation-circle'}"></i>
+            </div>
+            <div class="toast-text">
+                <div class="toast-title">${title}</div>
+                <div class="toast-message">${message}</div>
+            </div>
+        </div>
+    `;
+
+    document.body.appendChild(toast);
+
+    setTimeout(() => toast.classList.add('show'), 100);
+    setTimeout(() => {
+        toast.classList.remove('show');
+        setTimeout(() => document.body.removeChild(toast), 300);
+    }, 4000);
+}
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function() {
+    setupFileUpload();
+    loadDocuments();
+
+    // Close modals when clicking outside
+    document.addEventListener('click', function(e) {
+        if (e.target.classList.contains('modal')) {
+            e.target.classList.remove('show');
+            document.body.style.overflow = 'auto';
+        }
+    });
+
+    // Real-time search
+    let searchTimer = null;
+    document.getElementById('search').addEventListener('input', function() {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(applySearch, 300);
+    });
+});
@@ -0,0 +1,224 @@
+// Sidebar toggle functionality
+function toggleSidebar() {
+    const sidebar = document.getElementById('sidebar');
+    const mainContent = document.getElementById('mainContent');
+    const toggleIcon = document.getElementById('toggleIcon');
+
+    sidebar.classList.toggle('collapsed');
+    mainContent.classList.toggle('expanded');
+
+    if (sidebar.classList.contains('collapsed')) {
+        toggleIcon.innerHTML = '&rsaquo;';
+    } else {
+        toggleIcon.innerHTML = '&lsaquo;';
+    }
+
+    // Save state to localStorage
+    localStorage.setItem('sidebarCollapsed', sidebar.classList.contains('collapsed'));
+}
+
+// Mobile sidebar toggle
+function toggleMobileSidebar() {
+    const sidebar = document.getElementById('sidebar');
+    sidebar.classList.toggle('open');
+}
+
+// User dropdown toggle
+const userMenuButton = document.getElementById('userMenuButton');
+const userDropdown = document.getElementById('userDropdown');
+
+userMenuButton.addEventListener('click', function(e) {
+    e.stopPropagation();
+    userDropdown.classList.toggle('active');
+});
+
+// Close dropdown when clicking outside
+document.addEventListener('click', function() {
+    userDropdown.classList.remove('active');
+});
+
+// Notification dropdown toggle
+const notificationBtn = document.querySelector('.notification-btn');
+const notificationDropdown = document.querySelector('.notification-dropdown');
+
+notificationBtn.addEventListener('click', function(e) {
+    e.stopPropagation();
+    notificationDropdown.classList.toggle('active');
+});
+
+// Close notification dropdown when clicking outside
+document.addEventListener('click', function() {
+    notificationDropdown.classList.remove('active');
+});
+
+// Search functionality
+document.querySelector('.search-input').addEventListener('input', function(e) {
+    const searchTerm = e.target.value.toLowerCase();
+    // TODO: Implement search functionality
+    console.log('Recherche:', searchTerm);
+});
+
+// Chart filter buttons
+document.querySelectorAll('.tab-btn').forEach(btn => {
+    btn.addEventListener('click', function() {
+        // Remove active class from all buttons in same container
+        this.parentElement.querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
+        // Add active class to clicked button
+        this.classList.add('active');
+        // TODO: Update chart data
+        console.log('Filtre sélectionné:', this.textContent);
+    });
+});
+
+// Activity filter buttons
+document.querySelectorAll('.activity-filter').forEach(btn => {
+    btn.addEventListener('click', function() {
+        // Remove active class from all buttons
+        document.querySelectorAll('.activity-filter').forEach(b => b.classList.remove('active'));
+        // Add active class to clicked button
+        this.classList.add('active');
+        // TODO: Filter activities
+        console.log('Filtre activité:', this.textContent);
+    });
+});
+
+// Theme toggle
+const themeToggle = document.querySelector('.theme-toggle');
+themeToggle.addEventListener('click', function() {
+    document.body.classList.toggle('dark-mode');
+    const icon = this.querySelector('i');
+    if (document.body.classList.contains('dark-mode')) {
+        icon.classList.remove('fa-moon');
+        icon.classList.add('fa-sun');
+        localStorage.setItem('theme', 'dark');
+    } else {
+        icon.classList.remove('fa-sun');
+        icon.classList.add('fa-moon');
+        localStorage.setItem('theme', 'light');
+    }
+});
+
+// Check for saved theme preference
+if (localStorage.getItem('theme') === 'dark') {
+    document.body.classList.add('dark-mode');
+    themeToggle.querySelector('i').classList.remove('fa-moon');
+    themeToggle.querySelector('i').classList.add('fa-sun');
+}
+
+// Check for saved sidebar state
+if (localStorage.getItem('sidebarCollapsed') === 'true') {
+    document.getElementById('sidebar').classList.add('collapsed');
+    document.getElementById('mainContent').classList.add('expanded');
+    document.getElementById('toggleIcon').innerHTML = '&rsaquo;';
+}
+
+// Auto-refresh stats every 30 seconds
+setInterval(function() {
+    // TODO: Fetch updated statistics via AJAX
+    console.log('Mise à jour des statistiques...');
+}, 30000);
+
+// Responsive handling
+function handleResize() {
+    const width = window.innerWidth;
+    const sidebar = document.getElementById('sidebar');
+    const mainContent = document.getElementById('mainContent');
+
+    if (width <= 768) {
+        sidebar.classList.add('collapsed');
+        mainContent.classList.add('expanded');
+    } else if (width > 768 && !sidebar.classList.contains('collapsed')) {
+        mainContent.classList.remove('expanded');
+    }
+}
+
+window.addEventListener('resize', handleResize);
+handleResize(); // Call on page load
+
+// Initialize tooltips
+document.querySelectorAll('.stat-tooltip').forEach(tooltip => {
+    tooltip.addEventListener('mouseenter', function() {
+        this.querySelector('.stat-tooltip-text').style.opacity = '1';
+        this.querySelector('.stat-tooltip-text').style.visibility = 'visible';
+        this.querySelector('.stat-tooltip-text').style.transform = 'translateY(0)';
+    });
+
+    tooltip.addEventListener('mouseleave', function() {
+        this.querySelector('.stat-tooltip-text').style.opacity = '0';
+        this.querySelector('.stat-tooltip-text').style.visibility = 'hidden';
+        this.querySelector('.stat-tooltip-text').style.transform = 'translateY(10px)';
+    });
+});
+
+// Initialize animations
+document.addEventListener('DOMContentLoaded', function() {
+    // Add loading animation to stat cards
+    const statCards = document.querySelectorAll('.stat-card');
+    statCards.forEach((card, index) => {
+        setTimeout(() => {
+            card.style.opacity = '0';
+            card.style.transform = 'translateY(20px)';
+            setTimeout(() => {
+                card.style.transition = 'all 0.5s ease';
+                card.style.opacity = '1';
+                card.style.transform = 'translateY(0)';
+            }, 100);
+        }, index * 100);
+    });
+
+    // Simulate real-time updates
+    setInterval(() => {
+        const badges = document.querySelectorAll('.nav-badge');
+        badges.forEach(badge => {
+            const current = parseInt(badge.textContent) || 0;
+            // Randomly update some badges
+            if (Math.random() > 0.95) {
+                badge.textContent = current + 1;
+                badge.style.background = 'var(--success-color)';
+                setTimeout(() => {
+                    badge.style.background = 'var(--warning-color)';
+                }, 1000);
+            }
+        });
+
+        // Simulate new notification
+        if (Math.random() > 0.98) {
+            const notificationCount = document.querySelector('.notification-badge');
+            const current = parseInt(notificationCount.textContent) || 0;
+            notificationCount.textContent = current + 1;
+
+            // Add new notification to dropdown
+            const notifications = [
+                {
+                    icon: 'success',
+                    iconClass: 'fa-check',
+                    text: 'Nouveau projet approuvé par la direction',
+                    time: 'À l\'instant'
+                },
+                {
+                    icon: 'warning',
+                    iconClass: 'fa-exclamation',
+                    text: 'Budget dépassé sur le projet "Route Rurale"',
+                    time: 'À l\'instant'
+                }
+            ];
+
+            const randomNotif = notifications[Math.floor(Math.random() * notifications.length)];
+            const notificationList = document.querySelector('.notification-list');
+
+            const newNotif = document.createElement('div');
+            newNotif.className = 'notification-item unread';
+            newNotif.innerHTML = `
+                <div class="notification-icon ${randomNotif.icon}">
+                    <i class="fas ${randomNotif.iconClass}"></i>
+                </div>
+                <div class="notification-content">
+                    <div class="notification-text">${randomNotif.text}</div>
+                    <div class="notification-time">${randomNotif.time}</div>
+                </div>
+            `;
+
+            notificationList.insertBefore(newNotif, notificationList.firstChild);
+        }
+    }, 5000);
+});
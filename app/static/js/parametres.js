@@ -0,0 +1,410 @@
+// Variables globales
+let currentSection = 'profil';
+
+// Fonction pour afficher les sections
+function showSection(sectionId) {
+    // Cacher toutes les sections
+    document.querySelectorAll('.settings-section').forEach(section => {
+        section.style.display = 'none';
+    });
+
+    // Afficher la section sélectionnée
+    const targetSection = document.getElementById(sectionId + '-section');
+    if (targetSection) {
+        targetSection.style.display = 'block';
+        currentSection = sectionId;
+    }
+
+    // Mettre à jour le lien actif
+    document.querySelectorAll('.nav-link').forEach(link => {
+        link.classList.remove('active');
+    });
+
+    const activeLink = document.querySelector(`[data-section="${sectionId}"]`);
+    if (activeLink) {
+        activeLink.classList.add('active');
+    }
+}
+
+// Fonction pour afficher les notifications toast
+function showToast(message, type = 'success') {
+    const toast = document.getElementById('toast');
+    const toastMessage = document.getElementById('toast-message');
+    const icon = toast.querySelector('i');
+
+    // Définir le message et l'icône selon le type
+    toastMessage.textContent = message;
+    toast.className = `toast ${type}`;
+
+    switch (type) {
+        case 'success':
+            icon.className = 'fas fa-check-circle';
+            icon.style.color = 'var(--success-color)';
+            break;
+        case 'error':
+            icon.className = 'fas fa-exclamation-circle';
+            icon.style.color = 'var(--danger-color)';
+            break;
+        case 'warning':
+            icon.className = 'fas fa-exclamation-triangle';
+            icon.style.color = 'var(--warning-color)';
+            break;
+    }
+
+    // Afficher le toast
+    toast.classList.add('show');
+
+    // Masquer après 3 secondes
+    setTimeout(() => {
+        toast.classList.remove('show');
+    }, 3000);
+}
+
+// Fonction pour vérifier la force du mot de passe
+function checkPasswordStrength(password) {
+    const strengthBar = document.getElementById('password-strength');
+    if (!strengthBar) return;
+
+    let strength = 0;
+    if (password.length >= 8) strength++;
+    if (/[a-z]/.test(password)) strength++;
+    if (/[A-Z]/.test(password)) strength++;
+    if (/\d/.test(password)) strength++;
+    if (/[^a-zA-Z\d]/.test(password)) strength++;
+
+    strengthBar.className = 'password-strength';
+    if (strength >= 3) strengthBar.classList.add('medium');
+    if (strength >= 4) strengthBar.classList.add('strong');
+    if (strength < 3) strengthBar.classList.add('weak');
+}
+
+// Fonction pour gérer l'upload d'avatar
+function handleAvatarUpload(file) {
+    if (file) {
+        const reader = new FileReader();
+        reader.onload = function(e) {
+            const avatar = document.querySelector('.avatar');
+            avatar.innerHTML = `<img src="${e.target.result}" alt="Avatar">`;
+            showToast('Photo de profil mise à jour avec succès!');
+        };
+        reader.readAsDataURL(file);
+    }
+}
+
+// Fonction pour supprimer l'avatar
+function removeAvatar() {
+    const avatar = document.querySelector('.avatar');
+    avatar.innerHTML = '<i class="fas fa-user"></i><div class="avatar-overlay"><i class="fas fa-camera" style="color: white; font-size: 1.5rem;"></i></div>';
+    showToast('Photo de profil supprimée', 'warning');
+}
+
+// Event listeners
+document.addEventListener('DOMContentLoaded', function() {
+    // Navigation dans la sidebar
+    document.querySelectorAll('[data-section]').forEach(link => {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            const section = this.getAttribute('data-section');
+            showSection(section);
+        });
+    });
+
+    // Gestion du formulaire de profil
+    const profileForm = document.getElementById('profile-form');
+    if (profileForm) {
+        profileForm.addEventListener('submit', function(e) {
+            e.preventDefault();
+            showToast('Informations personnelles mises à jour!');
+        });
+    }
+
+    // Gestion du formulaire de mot de passe
+    const passwordForm = document.getElementById('password-form');
+    if (passwordForm) {
+        passwordForm.addEventListener('submit', function(e) {
+            e.preventDefault();
+            const newPassword = document.getElementById('new-password').value;
+            const confirmPassword = document.getElementById('confirm-password').value;
+
+            if (newPassword !== confirmPassword) {
+                showToast('Les mots de passe ne correspondent pas!', 'error');
+                return;
+            }
+
+            showToast('Mot de passe mis à jour avec succès!');
+            passwordForm.reset();
+            document.getElementById('password-strength').className = 'password-strength';
+        });
+    }
+
+    // Vérification de la force du mot de passe
+    const newPasswordInput = document.getElementById('new-password');
+    if (newPasswordInput) {
+        newPasswordInput.addEventListener('input', function() {
+            checkPasswordStrength(this.value);
+        });
+    }
+
+    // Gestion de l'upload d'avatar
+    const avatarInput = document.getElementById('avatar-input');
+    if (avatarInput) {
+        avatarInput.addEventListener('change', function() {
+            handleAvatarUpload(this.files[0]);
+        });
+    }
+
+    // Gestion des options de thème
+    document.querySelectorAll('.theme-option').forEach(option => {
+        option.addEventListener('click', function() {
+            document.querySelectorAll('.theme-option').forEach(opt => opt.classList.remove('active'));
+            this.classList.add('active');
+            showToast('Thème appliqué!');
+        });
+    });
+
+    // Gestion des couleurs d'accent
+    document.querySelectorAll('.color-option').forEach(option => {
+        option.addEventListener('click', function() {
+            document.querySelectorAll('.color-option').forEach(opt => opt.classList.remove('active'));
+            this.classList.add('active');
+            const color = this.getAttribute('data-color');
+            document.documentElement.style.setProperty('--primary-color', color);
+            showToast('Couleur d\'accent mise à jour!');
+        });
+    });
+
+    // Gestion des toggles
+    document.querySelectorAll('.toggle-switch input').forEach(toggle => {
+        toggle.addEventListener('change', function() {
+            const label = this.closest('.toggle-container').querySelector('.toggle-label').textContent;
+            const status = this.checked ? 'activée' : 'désactivée';
+            showToast(`${label} ${status}`);
+        });
+    });
+
+    // Bouton de sauvegarde globale
+    const saveAllBtn = document.getElementById('save-all-btn');
+    if (saveAllBtn) {
+        saveAllBtn.addEventListener('click', function() {
+            const spinner = this.querySelector('.spinner');
+            const icon = this.querySelector('.fas');
+
+            // Animation de chargement
+            this.classList.add('loading');
+            spinner.style.display = 'block';
+            icon.style.display = 'none';
+
+            // Simuler une sauvegarde
+            setTimeout(() => {
+                this.classList.remove('loading');
+                spinner.style.display = 'none';
+                icon.style.display = 'inline';
+                showToast('Tous les paramètres ont été enregistrés!');
+            }, 2000);
+        });
+    }
+
+    // Gestion du header sticky avec effet de flou
+    let lastScrollY = window.scrollY;
+    const header = document.querySelector('header');
+
+    window.addEventListener('scroll', () => {
+        if (window.scrollY > lastScrollY && window.scrollY > 100) {
+            header.style.transform = 'translateY(-100%)';
+        } else {
+            header.style.transform = 'translateY(0)';
+        }
+        lastScrollY = window.scrollY;
+
+        // Effet de flou sur le header selon le scroll
+        const opacity = Math.min(window.scrollY / 100, 0.95);
+        header.style.backdropFilter = `blur(${Math.min(window.scrollY / 10, 20)}px)`;
+    });
+
+    // Animation des cartes au scroll
+    const observerOptions = {
+        threshold: 0.1,
+        rootMargin: '0px 0px -50px 0px'
+    };
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.style.animationDelay = `${Math.random() * 0.3}s`;
+                entry.target.classList.add('animate-in');
+            }
+        });
+    }, observerOptions);
+
+    document.querySelectorAll('.settings-card').forEach(card => {
+        observer.observe(card);
+    });
+
+    // Validation en temps réel des formulaires
+    const inputs = document.querySelectorAll('.form-input');
+    inputs.forEach(input => {
+        input.addEventListener('blur', function() {
+            validateInput(this);
+        });
+
+        input.addEventListener('focus', function() {
+            this.classList.remove('error');
+        });
+    });
+
+    // Raccourcis clavier
+    document.addEventListener('keydown', function(e) {
+        // Ctrl/Cmd + S pour sauvegarder
+        if ((e.ctrlKey || e.metaKey) && e.key === 's') {
+            e.preventDefault();
+            const saveBtn = document.getElementById('save-all-btn');
+            if (saveBtn) saveBtn.click();
+        }
+
+        // Échap pour fermer les modales ou réinitialiser
+        if (e.key === 'Escape') {
+            // Logique pour fermer les modales si nécessaire
+        }
+    });
+
+    // Auto-sauvegarde locale (simulation)
+    setInterval(() => {
+        const formData = new FormData();
+        inputs.forEach(input => {
+            if (input.value) {
+                formData.append(input.id, input.value);
+            }
+        });
+        // Ici on pourrait sauvegarder en local ou envoyer au serveur
+        console.log('Auto-sauvegarde effectuée');
+    }, 30000); // Toutes les 30 secondes
+
+    // Initialisation de la section par défaut
+    showSection('profil');
+});
+
+// Fonction de validation des entrées
+function validateInput(input) {
+    const value = input.value.trim();
+    let isValid = true;
+
+    switch (input.type) {
+        case 'email':
+            isValid = /^[^\s@]+@[^\s@]+\.[^\s@]+$/.test(value);
+            break;
+        case 'tel':
+            isValid = /^[\+]?[0-9\s\-\(\)]{10,}$/.test(value) || value === '';
+            break;
+        case 'password':
+            isValid = value.length >= 8;
+            break;
+        default:
+            if (input.required) {
+                isValid = value !== '';
+            }
+    }
+
+    if (!isValid) {
+        input.classList.add('error');
+        return false;
+    } else {
+        input.classList.remove('error');
+        return true;
+    }
+}
+
+// Fonction pour gérer les animations fluides
+function animateElement(element, animation) {
+    element.style.animation = animation;
+    element.addEventListener('animationend', () => {
+        element.style.animation = '';
+    }, { once: true });
+}
+
+// Gestion responsive avancée
+function handleResponsiveChanges() {
+    const sidebar = document.querySelector('.sidebar');
+    const main = document.querySelector('main');
+
+    if (window.innerWidth <= 1024) {
+        sidebar.classList.add('mobile');
+    } else {
+        sidebar.classList.remove('mobile');
+    }
+}
+
+window.addEventListener('resize', handleResponsiveChanges);
+
+// Gestion des états de chargement
+function setLoadingState(element, isLoading) {
+    if (isLoading) {
+        element.classList.add('loading');
+        element.style.pointerEvents = 'none';
+    } else {
+        element.classList.remove('loading');
+        element.style.pointerEvents = 'auto';
+    }
+}
+
+// Simulation d'API calls avec gestion d'erreurs
+async function saveSettings(data) {
+    try {
+        // Simulation d'un appel API
+        const response = await fetch('/api/settings', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(data)
+        });
+
+        if (!response.ok) {
+            throw new Error('Erreur lors de la sauvegarde');
+        }
+
+        return await response.json();
+    } catch (error) {
+        console.error('Erreur:', error);
+        showToast('Erreur lors de la sauvegarde des paramètres', 'error');
+        throw error;
+    }
+}
+
+// Gestion des préférences utilisateur
+const userPreferences = {
+    theme: localStorage.getItem('theme') || 'light',
+    accentColor: localStorage.getItem('accentColor') || '#2563eb',
+    density: localStorage.getItem('density') || 'normal',
+    notifications: JSON.parse(localStorage.getItem('notifications') || '{}')
+};
+
+// Appliquer les préférences au chargement
+function applyUserPreferences() {
+    // Appliquer le thème
+    document.body.setAttribute('data-theme', userPreferences.theme);
+
+    // Appliquer la couleur d'accent
+    document.documentElement.style.setProperty('--primary-color', userPreferences.accentColor);
+
+    // Sélectionner les options correspondantes dans l'interface
+    const themeOption = document.querySelector(`[data-theme="${userPreferences.theme}"]`);
+    if (themeOption) {
+        document.querySelectorAll('.theme-option').forEach(opt => opt.classList.remove('active'));
+        themeOption.classList.add('active');
+    }
+
+    const colorOption = document.querySelector(`[data-color="${userPreferences.accentColor}"]`);
+    if (colorOption) {
+        document.querySelectorAll('.color-option').forEach(opt => opt.classList.remove('active'));
+        colorOption.classList.add('active');
+    }
+}
+
+// Sauvegarder les préférences
+function savePreference(key, value) {
+    userPreferences[key] = value;
+    localStorage.setItem(key, typeof value === 'object' ? JSON.stringify(value) : value);
+}
+
+// Initialisation des préférences au chargement de la page
+document.addEventListener('DOMContentLoaded', applyUserPreferences);
@@ -0,0 +1,373 @@
+"""Statistiques du tableau de bord, maintenues de façon incrémentale.
+
+Chaque flush ORM touchant une tâche, un projet, un budget, un document ou un
+site ajuste les compteurs de la table ``summary_counters`` dans la même transaction : la
+contribution de l'ancienne ligne est retirée (``before_flush``), celle de la
+nouvelle ajoutée (``after_flush``). Le tableau de bord lit ainsi quelques
+chiffres précalculés au lieu d'agréger les tables à chaque affichage.
+
+Les écritures en masse qui contournent le flush appliquent leurs propres
+incréments (:func:`add_row` puis :func:`apply_deltas`, lots de budgets) ou
+recalculent la section de leur collection (jeu synthétique, districts) ; et
+:func:`reconcile`, lancé périodiquement
+(``flask --app wsgi summary-reconcile --interval 3600``), répare toute dérive.
+"""
+
+import re
+import time
+from collections import Counter
+from datetime import datetime
+
+import click
+from sqlalchemy import event, func, inspect, or_, select, update
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import (
+    Budget,
+    District,
+    Document,
+    Projet,
+    Site,
+    SummaryCounter,
+    Tache,
+    upsert,
+)
+
+# Colonnes dont dépendent les compteurs, par modèle
+TRACKED = {
+    Tache: ("statut",),
+    Projet: ("statut", "district", "montant_prevu", "montant_execute"),
+    Budget: ("statut", "montant"),
+    Document: ("type_document",),
+    # La position est suivie : le district d'un site en dépend (app.geo)
+    Site: ("statut", "district", "latitude", "longitude"),
+}
+SECTIONS = tuple(model.__tablename__ for model in TRACKED)
+
+_PENDING = "summary_deltas"
+_NOMBRE = re.compile(r"\d+")
+
+
+def parse_montant(value):
+    """Montant saisi librement (« 1 200 000 Ariary ») converti en entier."""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    # Séparateurs de milliers (espaces, points) retirés, décimales ignorées
+    texte = re.sub(r"[\s.]", "", str(value)).split(",")[0]
+    match = _NOMBRE.search(texte)
+    return int(match.group()) if match else 0
+
+
+def format_montant(valeur):
+    """Montant abrégé pour l'affichage (``2400000000`` -> ``2.4B``)."""
+    for seuil, suffixe in ((10**9, "B"), (10**6, "M"), (10**3, "K")):
+        if abs(valeur) >= seuil:
+            return f"{valeur / seuil:.1f}".rstrip("0").rstrip(".") + suffixe
+    return str(valeur)
+
+
+# -----------------------------
+# Mise à jour incrémentale (événements de session)
+# -----------------------------
+def _contributions(model, values):
+    # Compteurs auxquels contribue une ligne, avec leur incrément
+    section = model.__tablename__
+    yield f"{section}:total", 1
+    if values.get("statut"):
+        yield f"{section}:statut:{values['statut']}", 1
+    if model is Document and values["type_document"]:
+        yield f"documents:type:{values['type_document']}", 1
+    if model in (Projet, Site) and values["district"]:
+        yield f"{section}:district:{values['district']}", 1
+    if model is Projet:
+        yield "projets:montant_prevu", values["montant_prevu"] or 0
+        yield "projets:montant_execute", values["montant_execute"] or 0
+    elif model is Budget:
+        yield "budgets:montant", parse_montant(values["montant"])
+
+
+def add_row(deltas, model, values, signe=1):
+    """Ajoute à ``deltas`` la contribution d'une ligne (écritures en masse)."""
+    for nom, valeur in _contributions(model, values):
+        deltas[nom] += signe * valeur
+
+
+def _add(deltas, obj, values, signe):
+    add_row(deltas, type(obj), values, signe)
+
+
+def _committed_values(session, obj):
+    # Valeurs en base d'une ligne modifiée ou supprimée
+    model = type(obj)
+    state = inspect(obj)
+    values, missing = {}, []
+    for attr in TRACKED[model]:
+        history = state.attrs[attr].history
+        if history.deleted:
+            values[attr] = history.deleted[0]
+        elif history.unchanged:
+            values[attr] = history.unchanged[0]
+        elif history.added:
+            # Modifié sans avoir été chargé : l'ancienne valeur est relue
+            missing.append(attr)
+        else:
+            values[attr] = getattr(obj, attr)
+    if missing:
+        row = session.execute(
+            select(*(getattr(model, attr) for attr in missing)).where(
+                model.id == obj.id
+            )
+        ).one()
+        values.update(zip(missing, row))
+    return values
+
+
+def _tracked_changes(obj):
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in TRACKED[type(obj)])
+
+
+@event.listens_for(Session, "before_flush")
+def _retire_old_values(session, flush_context, instances):
+    deltas = Counter()
+    modified = []
+    for obj in session.dirty:
+        if type(obj) in TRACKED and _tracked_changes(obj):
+            _add(deltas, obj, _committed_values(session, obj), -1)
+            modified.append(obj)
+    for obj in session.deleted:
+        if type(obj) in TRACKED:
+            _add(deltas, obj, _committed_values(session, obj), -1)
+    session.info[_PENDING] = (deltas, modified)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_new_values(session, flush_context):
+    deltas, modified = session.info.pop(_PENDING, (Counter(), []))
+    for obj in (*session.new, *modified):
+        if type(obj) in TRACKED:
+            values = {attr: getattr(obj, attr) for attr in TRACKED[type(obj)]}
+            _add(deltas, obj, values, +1)
+    apply_deltas(session.connection(), deltas)
+
+
+def apply_deltas(connection, deltas):
+    """Ajoute ``deltas`` (nom -> incrément) aux compteurs, dans la transaction."""
+    now = datetime.utcnow()
+    table = SummaryCounter.__table__
+    # Ordre fixe : deux transactions concurrentes verrouillent dans le même ordre
+    for nom, delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        # Upsert : deux premières écritures concurrentes d'un même compteur
+        connection.execute(
+            upsert(connection, table)
+            .values(nom=nom, valeur=delta, updated_at=now)
+            .on_conflict_do_update(
+                index_elements=[table.c.nom],
+                set_={"valeur": table.c.valeur + delta, "updated_at": now},
+            )
+        )
+
+
+# -----------------------------
+# Recalcul complet et réconciliation
+# -----------------------------
+def _compute_taches(connection):
+    query = select(Tache.statut, func.count()).group_by(Tache.statut)
+    for statut, nombre in connection.execute(query):
+        yield "taches:total", nombre
+        if statut:
+            yield f"taches:statut:{statut}", nombre
+
+
+def _compute_projets(connection):
+    query = select(
+        Projet.statut,
+        Projet.district,
+        func.count(),
+        func.coalesce(func.sum(Projet.montant_prevu), 0),
+        func.coalesce(func.sum(Projet.montant_execute), 0),
+    ).group_by(Projet.statut, Projet.district)
+    for statut, district, nombre, prevu, execute in connection.execute(query):
+        yield "projets:total", nombre
+        if statut:
+            yield f"projets:statut:{statut}", nombre
+        if district:
+            yield f"projets:district:{district}", nombre
+        yield "projets:montant_prevu", prevu
+        yield "projets:montant_execute", execute
+
+
+def _compute_budgets(connection):
+    # Montants en texte libre : regroupés en base, convertis une fois par valeur
+    query = select(Budget.statut, Budget.montant, func.count()).group_by(
+        Budget.statut, Budget.montant
+    )
+    for statut, montant, nombre in connection.execute(query):
+        yield "budgets:total", nombre
+        if statut:
+            yield f"budgets:statut:{statut}", nombre
+        yield "budgets:montant", parse_montant(montant) * nombre
+
+
+def _compute_documents(connection):
+    query = select(Document.type_document, func.count()).group_by(
+        Document.type_document
+    )
+    for type_document, nombre in connection.execute(query):
+        yield "documents:total", nombre
+        if type_document:
+            yield f"documents:type:{type_document}", nombre
+
+
+def _compute_sites(connection):
+    query = select(Site.statut, Site.district, func.count()).group_by(
+        Site.statut, Site.district
+    )
+    for statut, district, nombre in connection.execute(query):
+        yield "sites:total", nombre
+        if statut:
+            yield f"sites:statut:{statut}", nombre
+        if district:
+            yield f"sites:district:{district}", nombre
+
+
+COMPUTE = {
+    "taches": _compute_taches,
+    "projets": _compute_projets,
+    "budgets": _compute_budgets,
+    "documents": _compute_documents,
+    "sites": _compute_sites,
+}
+
+
+def compute(connection, sections=SECTIONS):
+    """Valeurs attendues des compteurs, recalculées par agrégats SQL."""
+    expected = Counter()
+    for section in sections:
+        for nom, valeur in COMPUTE[section](connection):
+            expected[nom] += int(valeur)
+    return expected
+
+
+def reconcile(connection, sections=SECTIONS):
+    """Aligne les compteurs de ``sections`` sur les tables ; renvoie la dérive.
+
+    Les compteurs existants sont verrouillés avant le recalcul (PostgreSQL) :
+    une écriture concurrente attend la fin de la réconciliation pour appliquer
+    son incrément, qui n'est donc ni perdu ni compté deux fois.
+    """
+    table = SummaryCounter.__table__
+    stored = dict(
+        connection.execute(
+            select(table.c.nom, table.c.valeur)
+            .where(or_(*(table.c.nom.startswith(f"{s}:") for s in sections)))
+            .with_for_update()
+        ).all()
+    )
+    expected = compute(connection, sections)
+
+    now = datetime.utcnow()
+    drift = {}
+    for nom in sorted(stored.keys() | expected.keys()):
+        attendu = expected.get(nom, 0)
+        actuel = stored.get(nom)
+        if actuel == attendu or (actuel is None and not attendu):
+            continue
+        drift[nom] = {"stocke": actuel, "attendu": attendu}
+        if actuel is None:
+            connection.execute(
+                table.insert().values(nom=nom, valeur=attendu, updated_at=now)
+            )
+        else:
+            connection.execute(
+                update(table)
+                .where(table.c.nom == nom)
+                .values(valeur=attendu, updated_at=now)
+            )
+    return drift
+
+
+# -----------------------------
+# Lecture pour le tableau de bord
+# -----------------------------
+def counters():
+    """Tous les compteurs (quelques dizaines de lignes), en une requête."""
+    query = select(SummaryCounter.nom, SummaryCounter.valeur)
+    return dict(db.session.execute(query).all())
+
+
+def dashboard_stats():
+    """Chiffres du tableau de bord, lus dans la table de synthèse."""
+    c = counters()
+    prevu = c.get("projets:montant_prevu", 0)
+    execute = c.get("projets:montant_execute", 0)
+    return {
+        "total_projects": c.get("projets:total", 0),
+        "active_projects": c.get("projets:statut:En cours", 0),
+        "completed_projects": c.get("projets:statut:Terminé", 0),
+        "delayed_projects": c.get("projets:statut:En retard", 0),
+        "districts_covered": len(_covered_districts(c)),
+        "budget_executed": round(100 * execute / prevu) if prevu else 0,
+        "total_budget": format_montant(c.get("budgets:montant", 0)),
+        "total_tasks": c.get("taches:total", 0),
+        "completed_tasks": c.get("taches:statut:Terminé", 0),
+        "total_documents": c.get("documents:total", 0),
+        "total_sites": c.get("sites:total", 0),
+    }
+
+
+def _covered_districts(c):
+    # Districts ayant au moins un site ou un projet
+    return {
+        nom.split(":", 2)[2]
+        for nom, valeur in c.items()
+        if valeur > 0 and nom.startswith(("sites:district:", "projets:district:"))
+    }
+
+
+def district_coverage():
+    """Sites et projets par district, à partir des compteurs précalculés."""
+    c = counters()
+    noms = set(db.session.scalars(select(District.nom))) | _covered_districts(c)
+    districts = [
+        {
+            "district": nom,
+            "sites": c.get(f"sites:district:{nom}", 0),
+            "projets": c.get(f"projets:district:{nom}", 0),
+        }
+        for nom in sorted(noms)
+    ]
+    return {
+        "districts": districts,
+        "total": len(districts),
+        "couverts": sum(1 for d in districts if d["sites"] or d["projets"]),
+        "sites_hors_district": c.get("sites:total", 0)
+        - sum(d["sites"] for d in districts),
+    }
+
+
+def init_app(app):
+    @app.cli.command("summary-reconcile")
+    @click.option(
+        "--interval",
+        type=int,
+        default=0,
+        help="Relancer toutes les N secondes (0 : une seule passe).",
+    )
+    def reconcile_command(interval):
+        """Recalcule les statistiques du tableau de bord et corrige la dérive."""
+        while True:
+            drift = reconcile(db.session.connection())
+            db.session.commit()
+            if drift:
+                for nom, ecart in drift.items():
+                    click.echo(f"⚠️  {nom} : {ecart['stocke']} -> {ecart['attendu']}")
+            click.echo(f"✅ Statistiques réconciliées ({len(drift)} correction(s))")
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,386 @@
+"""Jeu de données synthétique à grande échelle : ``flask --app wsgi synthetic-data``.
+
+Produit des projets, tâches, budgets et sites cohérents entre eux, à la taille
+d'une production (``--taches 1000000 --projets 100000 --sites 50000``), pour
+mesurer la couche données, les analyses et la carte sur des volumes réalistes :
+
+- les tâches, budgets et sites référencent des projets existants (par nom) ;
+- un site est placé dans l'emprise du district de son projet, à l'intérieur
+  de la région Haute Matsiatra, et hérite de son type et de son avancement ;
+- un tirage pseudo-aléatoire à graine fixe rend le jeu reproductible.
+
+Les lignes sont insérées par lots avec ``INSERT`` en masse (executemany), sans
+objets ORM : la cellule de grille (``app.spatial``) et le district
+(``app.geo``, vectorisé par lot) sont donc calculés ici, puis les versions des
+collections et les statistiques du tableau de bord sont mises à jour une fois
+pour toutes à la fin.
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import delete, func, insert, select
+
+from app import db, query_profiler, spatial, summary
+from app.demo_data import DEMO_DISTRICTS
+from app.models import Budget, District, Projet, Site, Tache, touch_collections
+
+BATCH_SIZE = 10_000
+# Emprise de la région Haute Matsiatra (ouest, sud, est, nord)
+BBOX = (46.6, -21.9, 47.5, -21.0)
+
+# Type de projet : (catégorie des sites sur la carte, libellé des ouvrages)
+TYPES_PROJET = {
+    "Éducation": ("education", ("École primaire", "Lycée", "CEG")),
+    "Santé": ("sante", ("Centre de santé", "Maternité", "CSB II")),
+    "Infrastructure": ("infrastructure", ("Route", "Pont", "Marché")),
+    "Eau et assainissement": ("eau", ("Adduction d'eau", "Forage", "Latrines")),
+    "Agriculture": ("agriculture", ("Périmètre irrigué", "Barrage", "Canal")),
+}
+COMMUNES = (
+    "Fianarantsoa",
+    "Ambalavao",
+    "Ambohimahasoa",
+    "Ikalamavony",
+    "Isorana",
+    "Alakamisy Itenina",
+    "Sahambavy",
+    "Andrainjato",
+    "Talata Ampano",
+    "Vohitrafeno",
+    "Ialamarina",
+    "Ambalakely",
+    "Mahasoabe",
+    "Ankarinarivo",
+    "Andoharanomaitso",
+    "Soatanana",
+)
+PRENOMS = ("Jean", "Marie", "Paul", "Hery", "Voahangy", "Rivo", "Lalao", "Tiana")
+NOMS = ("Rakoto", "Rabe", "Randria", "Rasoa", "Andriamanana", "Razafy", "Dupont")
+RESPONSABLES = (
+    "Ministère de l'Éducation",
+    "Ministère de la Santé",
+    "Ministère des Travaux Publics",
+    "Ministère de l'Agriculture",
+    "Région Haute Matsiatra",
+    "Commune",
+)
+ACTIONS = (
+    "Préparer le rapport",
+    "Valider le devis",
+    "Commander le matériel",
+    "Visite de chantier",
+    "Réunion de coordination",
+    "Contrôler les travaux",
+    "Réceptionner l'ouvrage",
+)
+
+STATUTS_PROJET = ("En cours", "Planifié", "Terminé", "En retard")
+STATUTS_TACHE = ("En cours", "Planifié", "Terminé", "En retard")
+STATUTS_BUDGET = ("Approuvé", "En cours", "Planifié")
+# Statut d'un site (carte) selon celui de son projet
+STATUTS_SITE = {
+    "En cours": "en-cours",
+    "Planifié": "planifie",
+    "Terminé": "termine",
+    "En retard": "en-cours",
+}
+PRIORITES = ("Haute", "Moyenne", "Basse")
+
+DEBUT = datetime(2022, 1, 1)
+PERIODE_JOURS = 5 * 365
+
+
+def _ariary(montant):
+    return f"{montant:,}".replace(",", " ") + " Ariary"
+
+
+def _personne(rng):
+    return f"{rng.choice(PRENOMS)} {rng.choice(NOMS)}"
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# -----------------------------
+# Générateurs de lignes
+# -----------------------------
+def project_rows(rng, count, districts, premier=1):
+    """Projets répartis entre les ``districts`` (noms) et les types."""
+    types = list(TYPES_PROJET)
+    for numero in range(premier, premier + count):
+        type_projet = rng.choice(types)
+        statut = rng.choice(STATUTS_PROJET)
+        debut = DEBUT + timedelta(days=rng.randrange(PERIODE_JOURS))
+        delai_prevu = rng.randrange(30, 720)
+        montant_prevu = rng.randrange(10, 2000) * 1_000_000
+        termine = statut == "Terminé"
+        if statut == "Planifié":
+            progression, montant_execute, delai_reel = 0, 0, None
+        else:
+            progression = 100 if termine else rng.randrange(5, 96)
+            # Dépassements fréquents, quelques dérives marquées (anomalies)
+            ecart = rng.gauss(1.05, 0.12) if rng.random() > 0.02 else 2.5
+            montant_execute = int(montant_prevu * max(ecart, 0.5) * progression / 100)
+            delai_reel = int(delai_prevu * max(rng.gauss(1.1, 0.2), 0.6))
+        yield {
+            "nom": f"{rng.choice(TYPES_PROJET[type_projet][1])} "
+            f"{rng.choice(COMMUNES)} n°{numero}",
+            "date_debut": debut,
+            "statut": statut,
+            "date_fin": debut + timedelta(days=delai_prevu),
+            "budget": _ariary(montant_prevu),
+            "progression": progression,
+            "description": f"Projet {type_projet.lower()} (jeu synthétique)",
+            "type_projet": type_projet,
+            "district": rng.choice(districts) if districts else None,
+            "montant_prevu": montant_prevu,
+            "montant_execute": montant_execute,
+            "delai_prevu": delai_prevu,
+            "delai_reel": delai_reel,
+        }
+
+
+def task_rows(rng, count, projets):
+    """Tâches rattachées aux ``projets`` (catalogue de :func:`catalogue`)."""
+    for _ in range(count):
+        projet = rng.choice(projets)
+        yield {
+            "titre": f"{rng.choice(ACTIONS)} - {projet.nom}"[:200],
+            "date_limite": projet.date_debut + timedelta(days=rng.randrange(730)),
+            "statut": rng.choice(STATUTS_TACHE),
+            "priorite": rng.choice(PRIORITES),
+            "description": None,
+            "projet": projet.nom,
+            "assignee": _personne(rng),
+        }
+
+
+def budget_rows(rng, count, projets):
+    """Tranches de budget allouées aux ``projets``."""
+    for numero in range(1, count + 1):
+        projet = rng.choice(projets)
+        montant = (projet.montant_prevu or 10_000_000) // rng.choice((1, 2, 4))
+        yield {
+            "nom": f"Budget {projet.nom} - tranche {numero}"[:200],
+            "montant": _ariary(montant),
+            "statut": rng.choice(STATUTS_BUDGET),
+            "date_allocation": projet.date_debut - timedelta(days=rng.randrange(90)),
+            "projet_associe": projet.nom,
+            "description": None,
+        }
+
+
+def site_rows(rng, count, projets, emprises):
+    """Sites des ``projets``, dans l'emprise de leur district (ou de la région).
+
+    ``cellule`` et ``district`` sont laissés à :func:`_locate` (par lot).
+    """
+    for numero in range(1, count + 1):
+        projet = rng.choice(projets)
+        ouest, sud, est, nord = emprises.get(projet.district, BBOX)
+        categorie, ouvrages = TYPES_PROJET.get(
+            projet.type_projet, ("infrastructure", ("Site",))
+        )
+        yield {
+            "nom": f"{rng.choice(ouvrages)} {rng.choice(COMMUNES)} n°{numero}",
+            "latitude": round(rng.uniform(sud, nord), 6),
+            "longitude": round(rng.uniform(ouest, est), 6),
+            "projet": projet.nom,
+            "categorie": categorie,
+            "statut": STATUTS_SITE.get(projet.statut, "planifie"),
+            "budget": projet.montant_prevu,
+            "description": None,
+            "responsable": rng.choice(RESPONSABLES),
+            "date_debut": projet.date_debut,
+            "date_fin_prevue": projet.date_fin,
+            "avancement": projet.progression or 0,
+        }
+
+
+# -----------------------------
+# Insertion en masse
+# -----------------------------
+def catalogue(connection):
+    """Projets en base (colonnes utiles aux références), tous lus en une passe."""
+    return connection.execute(
+        select(
+            Projet.nom,
+            Projet.district,
+            Projet.type_projet,
+            Projet.statut,
+            Projet.date_debut,
+            Projet.date_fin,
+            Projet.montant_prevu,
+            Projet.progression,
+        ).order_by(Projet.id)
+    ).all()
+
+
+def _districts(connection):
+    # Contours de démonstration si aucun district n'a été importé
+    if connection.execute(select(District.id).limit(1)).first() is None:
+        db.session.add_all(District(**row) for row in DEMO_DISTRICTS)
+        db.session.flush()
+    return {
+        row.nom: (
+            max(row.min_lon, BBOX[0]),
+            max(row.min_lat, BBOX[1]),
+            min(row.max_lon, BBOX[2]),
+            min(row.max_lat, BBOX[3]),
+        )
+        for row in connection.execute(
+            select(
+                District.nom,
+                District.min_lon,
+                District.min_lat,
+                District.max_lon,
+                District.max_lat,
+            )
+        )
+    }
+
+
+def _locate(connection, rows):
+    # Cellule et district d'un lot de sites (sans événement ORM)
+    import numpy as np
+
+    from app import geo
+
+    noms = geo.assign_districts(
+        np.array([row["latitude"] for row in rows], dtype=float),
+        np.array([row["longitude"] for row in rows], dtype=float),
+        geo.load_districts(connection),
+    )
+    for row, nom in zip(rows, noms):
+        row["cellule"] = spatial.cell_of(row["latitude"], row["longitude"])
+        row["district"] = nom
+
+
+def _insert(model, rows, batch_size, progress, prepare=None):
+    connection = db.session.connection()
+    now = datetime.utcnow()
+    total = 0
+    debut = time.perf_counter()
+    for batch in _batches(rows, batch_size):
+        if prepare:
+            prepare(connection, batch)
+        for row in batch:
+            row["version"] = 1
+            row["updated_at"] = now
+        # Lot volontairement massif : hors du détecteur de requêtes lentes
+        with query_profiler.exempt(connection):
+            connection.execute(insert(model), batch)
+        total += len(batch)
+        if progress:
+            progress(model.__tablename__, total, time.perf_counter() - debut)
+    return total
+
+
+def generate(
+    taches=0,
+    projets=0,
+    budgets=0,
+    sites=0,
+    seed=42,
+    batch_size=BATCH_SIZE,
+    progress=None,
+):
+    """Insère le jeu synthétique dans la transaction courante ; renvoie les volumes.
+
+    Les tâches, budgets et sites se rattachent à tous les projets en base
+    (ceux créés ici et les existants). ``progress(table, lignes, secondes)``
+    est appelé après chaque lot.
+    """
+    rng = random.Random(seed)
+    connection = db.session.connection()
+    emprises = _districts(connection)
+
+    # Numérotation après les projets existants : noms uniques d'un appel à l'autre
+    premier = (connection.scalar(select(func.max(Projet.id))) or 0) + 1
+    volumes = {
+        "projets": _insert(
+            Projet,
+            project_rows(rng, projets, sorted(emprises), premier),
+            batch_size,
+            progress,
+        )
+    }
+    references = catalogue(connection)
+    if not references and (taches or budgets or sites):
+        raise ValueError("Aucun projet en base : générer d'abord des projets")
+
+    volumes["taches"] = _insert(
+        Tache, task_rows(rng, taches, references), batch_size, progress
+    )
+    volumes["budgets"] = _insert(
+        Budget, budget_rows(rng, budgets, references), batch_size, progress
+    )
+    volumes["sites"] = _insert(
+        Site,
+        site_rows(rng, sites, references, emprises),
+        batch_size,
+        progress,
+        prepare=_locate,
+    )
+
+    # Les écritures en masse ne passent pas par le flush ORM
+    modifiees = sorted(nom for nom, lignes in volumes.items() if lignes)
+    if modifiees:
+        touch_collections(connection, modifiees)
+        summary.reconcile(connection, modifiees)
+    return volumes
+
+
+def purge():
+    """Vide les tables du jeu de données (tâches, projets, budgets, sites)."""
+    connection = db.session.connection()
+    modeles = (Tache, Budget, Site, Projet)
+    for model in modeles:
+        connection.execute(delete(model))
+    sections = [model.__tablename__ for model in modeles]
+    touch_collections(connection, sections)
+    summary.reconcile(connection, sections)
+
+
+def init_app(app):
+    @app.cli.command("synthetic-data")
+    @click.option("--taches", type=int, default=100_000, show_default=True)
+    @click.option("--projets", type=int, default=10_000, show_default=True)
+    @click.option("--budgets", type=int, default=20_000, show_default=True)
+    @click.option("--sites", type=int, default=5_000, show_default=True)
+    @click.option("--graine", type=int, default=42, help="Graine du tirage.")
+    @click.option("--lot", type=int, default=BATCH_SIZE, help="Lignes par INSERT.")
+    @click.option(
+        "--vider", is_flag=True, help="Supprimer d'abord les données existantes."
+    )
+    def synthetic_data_command(taches, projets, budgets, sites, graine, lot, vider):
+        """Génère un jeu de données synthétique (insertions en masse)."""
+
+        def progress(table, lignes, secondes):
+            click.echo(f"   {table} : {lignes} ligne(s) en {secondes:.1f} s")
+
+        if vider:
+            purge()
+            click.echo("🗑️  Tâches, projets, budgets et sites supprimés")
+        try:
+            volumes = generate(
+                taches, projets, budgets, sites, graine, max(lot, 1), progress
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        db.session.commit()
+        click.echo(
+            "✅ Jeu synthétique inséré : "
+            + ", ".join(f"{lignes} {table}" for table, lignes in volumes.items())
+        )
@@ -0,0 +1,112 @@
+"""Cache d'identités utilisateur pour le ``user_loader`` de Flask-Login.
+
+Chaque worker garde un cache LRU borné, à durée de vie limitée, de petits
+enregistrements d'identité (id, nom d'utilisateur, rôle). Les requêtes
+authentifiées évitent ainsi l'aller-retour en base ; toute modification d'un
+utilisateur doit appeler :func:`invalidate`. Le TTL borne le délai de
+propagation vers les autres workers.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+
+DEFAULT_SIZE = 1024
+DEFAULT_TTL = 300
+
+
+class UserIdentity(UserMixin):
+    """Identité légère exposée comme ``current_user``."""
+
+    def __init__(self, id, username, role):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.role)
+
+    def __repr__(self):
+        return f"<UserIdentity {self.username}>"
+
+
+class IdentityCache:
+    def __init__(self, maxsize=DEFAULT_SIZE, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, maxsize, ttl):
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                identity, expires_at = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return identity
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, identity):
+        if self.maxsize <= 0:
+            return identity
+        with self._lock:
+            self._entries[identity.id] = (identity, self._clock() + self.ttl)
+            self._entries.move_to_end(identity.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return identity
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Instance partagée par le worker (configurée par create_app)
+cache = IdentityCache()
+
+
+def init_app(app):
+    cache.configure(
+        app.config.get("USER_CACHE_SIZE", DEFAULT_SIZE),
+        app.config.get("USER_CACHE_TTL", DEFAULT_TTL),
+    )
+
+
+def invalidate(user_id):
+    cache.invalidate(int(user_id))
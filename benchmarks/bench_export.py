@@ -0,0 +1,152 @@
+"""Benchmark des exports en flux : pic de RSS en fonction du nombre de lignes.
+
+Chaque taille est mesurée dans un processus séparé (``ru_maxrss`` est un pic
+à l'échelle du processus) : la base SQLite est remplie dans un premier
+processus, puis l'export est consommé via le client de test Flask dans un
+second, qui rapporte son pic de mémoire.
+
+Usage :
+    python benchmarks/bench_export.py                 # 10k, 100k, 1M lignes
+    python benchmarks/bench_export.py --rows 50000 --format xlsx
+"""
+
+import argparse
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STATUTS = ("Approuvé", "En cours", "Planifié")
+
+
+def populate(path, rows):
+    from app import create_app, db
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    with app.app_context():
+        db.create_all()
+
+    connection = sqlite3.connect(path)
+    start = datetime(2020, 1, 1)
+    now = datetime.utcnow().isoformat(" ")
+    batch = []
+    for i in range(1, rows + 1):
+        batch.append(
+            (
+                i,
+                f"Budget {i}",
+                f"{(i % 900 + 100) * 1000} Ariary",
+                STATUTS[i % 3],
+                (start + timedelta(days=i % 2000)).isoformat(" "),
+                f"Projet {i % 500}",
+                "Allocation générée pour le benchmark d'export",
+                1,
+                now,
+            )
+        )
+        if len(batch) == 50_000:
+            _insert(connection, batch)
+            batch = []
+    _insert(connection, batch)
+    connection.close()
+
+
+def _insert(connection, batch):
+    connection.executemany(
+        "INSERT INTO budgets (id, nom, montant, statut, date_allocation, "
+        "projet_associe, description, version, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        batch,
+    )
+    connection.commit()
+
+
+def export(path, fmt):
+    from app import create_app
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = "1"
+
+    with app.app_context():
+        from app import db
+        from app.models import User
+
+        if db.session.get(User, 1) is None:
+            db.session.add(User(id=1, username="bench", password="x"))
+            db.session.commit()
+
+    started = time.perf_counter()
+    response = client.get(f"/budgets/export?format={fmt}", buffered=False)
+    size = sum(len(chunk) for chunk in response.response)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"bytes": size, "seconds": elapsed, "peak_rss_kb": peak_kb}))
+
+
+def run(rows, fmt):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        subprocess.run(
+            [sys.executable, __file__, "--populate", path, "--rows", str(rows)],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        output = subprocess.run(
+            [sys.executable, __file__, "--export", path, "--format", fmt],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, action="append")
+    parser.add_argument("--format", default="csv", choices=("csv", "xlsx"))
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="ratio max entre le pic RSS de la plus grande et de la plus petite taille",
+    )
+    parser.add_argument("--populate", help=argparse.SUPPRESS)
+    parser.add_argument("--export", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.populate:
+        return populate(args.populate, args.rows[0])
+    if args.export:
+        return export(args.export, args.format)
+
+    sizes = sorted(args.rows or [10_000, 100_000, 1_000_000])
+    results = []
+    for rows in sizes:
+        result = run(rows, args.format)
+        results.append(result)
+        print(
+            f"{rows:>10} lignes  {result['bytes'] / 1e6:8.1f} Mo  "
+            f"{result['seconds']:7.2f} s  "
+            f"{rows / result['seconds']:>9.0f} lignes/s  "
+            f"pic RSS {result['peak_rss_kb'] / 1024:6.1f} Mo"
+        )
+
+    ratio = results[-1]["peak_rss_kb"] / results[0]["peak_rss_kb"]
+    print(f"Ratio pic RSS {sizes[-1]} / {sizes[0]} lignes : {ratio:.2f}")
+    if ratio > args.tolerance:
+        sys.exit("❌ La mémoire de l'export croît avec le nombre de lignes")
+    print("✅ Mémoire constante")
+
+
+if __name__ == "__main__":
+    main()
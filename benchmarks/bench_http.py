@@ -0,0 +1,1149 @@
+"""Benchmark HTTP de toutes les routes du blueprint : débit et percentiles.
+
+Remplit une base SQLite temporaire (ou la base désignée par
+``--database-url``, par exemple un PostgreSQL jetable), démarre l'application
+dans un processus séparé (serveur Werkzeug multi-threads, ou gunicorn avec
+``--gunicorn``) puis rejoue chaque scénario avec ``--clients`` clients
+authentifiés concurrents. Chaque route de ``routes.bp`` (méthode comprise) doit
+être couverte par un scénario : une route ajoutée sans scénario fait échouer
+le benchmark.
+
+Les résultats (débit, p50 / p90 / p99) sont comparés à la référence
+``benchmarks/http_baseline.json`` : le benchmark échoue si un scénario régresse
+au-delà de la tolérance. La référence dépend de la machine, enregistrée avec les
+résultats (système, processeur, nombre de CPU, mémoire) : sur une autre
+machine, la comparaison n'est pas faite ; régénérer la référence
+(``--update-baseline``) sur la machine de CI.
+
+Indépendamment de la référence, tout scénario dont le p50 dépasse son plafond
+(``--max-p50-ms``, ou celui du scénario pour les traitements coûteux par
+nature) est signalé : une page lente reste visible même une fois enregistrée
+dans la référence. Les routes sans scénario possible (gabarit absent) sont
+listées comme non couvertes.
+
+Usage :
+    python benchmarks/bench_http.py                        # compare à la référence
+    python benchmarks/bench_http.py --update-baseline      # enregistre la référence
+    python benchmarks/bench_http.py --only api_taches --only taches --requests 500
+    python benchmarks/bench_http.py --gunicorn --workers 4
+    python benchmarks/bench_http.py --database-url postgresql://bench@localhost/bench
+"""
+
+import argparse
+import http.client
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINE = os.path.join(ROOT, "benchmarks", "http_baseline.json")
+USERNAME = "bench"
+PASSWORD = "bench-mot-de-passe"
+
+# Emprise de la région Haute Matsiatra (ouest, sud, est, nord)
+BBOX = (46.6, -21.9, 47.5, -21.0)
+STATUTS = ("En cours", "Terminé", "En attente", "Planifié")
+PRIORITES = ("Haute", "Moyenne", "Basse")
+TYPES_PROJET = ("Route", "École", "Santé", "Eau", "Agriculture")
+CATEGORIES = ("infrastructure", "education", "sante", "agriculture")
+
+# nom, routes couvertes ((endpoint, méthode), ...), exécution, statuts attendus,
+# préparation (données jetables, une par requête), plafonds de clients et
+# requêtes, plafond de p50 propre au scénario (défaut : --max-p50-ms)
+Scenario = namedtuple(
+    "Scenario", "nom routes run attendu prepare clients max_requests plafond_ms"
+)
+Scenario.__new__.__defaults__ = ((200,), None, None, None, None)
+
+# Hachage des mots de passe volontairement lent, exports de collections
+# entières : plafond propre, plus haut que celui des pages
+PLAFOND_COUTEUX_MS = 1000
+
+# Pages dont le gabarit manque au dépôt (erreur 500 quelle que soit la charge) :
+# aucun scénario possible, rapportées comme non couvertes tant qu'elles ne
+# sont pas réparées
+GABARITS_ABSENTS = {
+    ("routes.profile", "GET"): "profile.html",
+    ("routes.add_document", "GET"): "add_document.html",
+    ("routes.edit_task", "GET"): "edit_task.html",
+    ("routes.edit_document", "GET"): "edit_document.html",
+}
+
+
+# -----------------------------
+# Données de test
+# -----------------------------
+def make_app(database_url, folder):
+    from app import create_app
+
+    return create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": database_url,
+            "DOCUMENTS_FOLDER": os.path.join(folder, "documents"),
+            "JOBS_FOLDER": os.path.join(folder, "jobs"),
+            "JOBS_ASYNC": False,
+            "QUERY_PROFILE_SAMPLE": 0,
+        }
+    )
+
+
+def _fichier(nom, contenu):
+    from werkzeug.datastructures import FileStorage
+
+    return FileStorage(io.BytesIO(contenu.encode()), filename=nom)
+
+
+def seed(app, rows, rng):
+    """Remplit la base (si elle est vide) ; renvoie les identifiants de référence."""
+    from app import db, hashing, jobs, search
+    from app import documents as document_store
+    from app.models import Budget, Document, Job, Projet, Site, Tache, User
+
+    with app.app_context():
+        db.create_all()
+        if User.query.filter_by(username=USERNAME).first() is None:
+            mot_de_passe = hashing.pool.generate(PASSWORD)
+            db.session.add_all(
+                [
+                    User(username=USERNAME, password=mot_de_passe, role="admin"),
+                    User(username=f"{USERNAME}-reset", password=mot_de_passe),
+                ]
+            )
+            db.session.commit()
+
+        if Tache.query.first() is None:
+            debut = datetime(2024, 1, 1)
+            db.session.add_all(
+                Projet(
+                    nom=f"Projet {i}",
+                    date_debut=debut + timedelta(days=i % 700),
+                    statut=rng.choice(STATUTS),
+                    budget=f"{rng.randint(1, 900) * 100000} Ar",
+                    progression=rng.randint(0, 100),
+                    type_projet=rng.choice(TYPES_PROJET),
+                    montant_prevu=prevu,
+                    montant_execute=int(prevu * rng.uniform(0.6, 1.5)),
+                    delai_prevu=delai,
+                    delai_reel=int(delai * rng.uniform(0.7, 1.8)),
+                )
+                for i, prevu, delai in (
+                    (i, rng.randint(50_000, 5_000_000), rng.randint(10, 720))
+                    for i in range(max(rows // 4, 1))
+                )
+            )
+            db.session.add_all(
+                Tache(
+                    titre=f"Tâche {i}",
+                    date_limite=debut + timedelta(days=i % 900),
+                    statut=rng.choice(STATUTS),
+                    priorite=rng.choice(PRIORITES),
+                    projet=f"Projet {i % max(rows // 4, 1)}",
+                    assignee=f"agent{i % 50}",
+                )
+                for i in range(rows)
+            )
+            db.session.add_all(
+                Budget(
+                    nom=f"Budget {i}",
+                    montant=f"{rng.randint(1, 900) * 1000} Ariary",
+                    statut=rng.choice(("Alloué", "Approuvé", "En cours")),
+                    date_allocation=debut + timedelta(days=i % 700),
+                    projet_associe=f"Projet {i % max(rows // 4, 1)}",
+                )
+                for i in range(max(rows // 2, 1))
+            )
+            db.session.add_all(
+                Site(
+                    nom=f"Site {i}",
+                    latitude=rng.uniform(BBOX[1], BBOX[3]),
+                    longitude=rng.uniform(BBOX[0], BBOX[2]),
+                    categorie=rng.choice(CATEGORIES),
+                    statut=rng.choice(STATUTS),
+                )
+                for i in range(max(rows // 2, 1))
+            )
+            for i in range(50):
+                document_store.create_document(
+                    {"titre": f"Rapport {i}", "type": "rapport", "projet": "Projet 1"},
+                    _fichier(
+                        f"rapport_{i}.txt",
+                        f"Rapport d'avancement {i} : travaux de réhabilitation "
+                        f"de la route, budget exécuté à {i} %.",
+                    ),
+                    USERNAME,
+                )
+            db.session.commit()
+            search.index_pending()
+
+        job = Job.query.filter_by(statut=jobs.TERMINE).first()
+        if job is None:
+            job_id = jobs.enqueue(
+                "exports.export",
+                {"collection": "budgets", "fmt": "csv", "args": {}},
+                USERNAME,
+            ).id
+            jobs.run_pending()
+        else:
+            job_id = job.id
+
+        return {
+            "tache": db.session.query(db.func.min(Tache.id)).scalar(),
+            "projet": db.session.query(db.func.min(Projet.id)).scalar(),
+            "budget": db.session.query(db.func.min(Budget.id)).scalar(),
+            "document": db.session.query(db.func.min(Document.id)).scalar(),
+            "job": job_id,
+        }
+
+
+def _disposable(app, factory, count):
+    # Lignes supprimées par les scénarios DELETE (une par requête)
+    from app import db
+
+    with app.app_context():
+        objets = [factory(i) for i in range(count)]
+        db.session.add_all(objets)
+        db.session.commit()
+        return [objet.id for objet in objets]
+
+
+def prepare_taches(app, count):
+    from app.models import Tache
+
+    return _disposable(
+        app,
+        lambda i: Tache(titre=f"Jetable {i}", date_limite=datetime(2025, 1, 1)),
+        count,
+    )
+
+
+def prepare_projets(app, count):
+    from app.models import Projet
+
+    return _disposable(
+        app,
+        lambda i: Projet(nom=f"Jetable {i}", date_debut=datetime(2025, 1, 1)),
+        count,
+    )
+
+
+def prepare_budgets(app, count):
+    from app.models import Budget
+
+    return _disposable(
+        app,
+        lambda i: Budget(
+            nom=f"Jetable {i}",
+            montant="1000",
+            statut="Alloué",
+            date_allocation=datetime(2025, 1, 1),
+        ),
+        count,
+    )
+
+
+def prepare_documents(app, count):
+    from app import db
+    from app import documents as document_store
+
+    with app.app_context():
+        documents = [
+            document_store.create_document(
+                {"titre": f"Jetable {i}"},
+                _fichier(f"jetable_{i}.txt", f"jetable {uuid.uuid4().hex}"),
+                USERNAME,
+            )
+            for i in range(count)
+        ]
+        db.session.commit()
+        return [document.id for document in documents]
+
+
+def prepare_jobs(app, count):
+    from app import jobs
+
+    with app.app_context():
+        return [
+            jobs.enqueue(
+                "exports.export",
+                {"collection": "taches", "fmt": "csv", "args": {}},
+                USERNAME,
+            ).id
+            for _ in range(count)
+        ]
+
+
+# -----------------------------
+# Client HTTP (une connexion persistante par thread)
+# -----------------------------
+class Client:
+    def __init__(self, port, cookie=None):
+        self.port = port
+        self.cookie = cookie
+        self.connection = None
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        for tentative in (1, 2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(
+                    "127.0.0.1", self.port, timeout=60
+                )
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                # Connexion fermée par le serveur (keep-alive expiré) : une reprise
+                self.close()
+                if tentative == 2:
+                    raise
+                continue
+            if response.getheader("Connection", "").lower() == "close":
+                self.close()
+            return response.status, response.getheader("Set-Cookie"), data
+
+    def get(self, path):
+        return self.request("GET", path)[0]
+
+    def form(self, path, fields, method="POST"):
+        return self.request(
+            method,
+            path,
+            urlencode(fields).encode(),
+            {"Content-Type": "application/x-www-form-urlencoded"},
+        )[0]
+
+    def multipart(self, path, fields, nom, contenu):
+        limite = uuid.uuid4().hex
+        parties = [
+            f'--{limite}\r\nContent-Disposition: form-data; name="{cle}"\r\n\r\n'
+            f"{valeur}\r\n".encode()
+            for cle, valeur in fields.items()
+        ]
+        parties.append(
+            f'--{limite}\r\nContent-Disposition: form-data; name="fichier"; '
+            f'filename="{nom}"\r\nContent-Type: text/plain\r\n\r\n'.encode()
+            + contenu
+            + f"\r\n--{limite}--\r\n".encode()
+        )
+        return self.request(
+            "POST",
+            path,
+            b"".join(parties),
+            {"Content-Type": f"multipart/form-data; boundary={limite}"},
+        )[0]
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+_CSRF = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+def _session_cookie(set_cookie):
+    return set_cookie.split(";", 1)[0] if set_cookie else None
+
+
+def login(port, username=USERNAME, password=PASSWORD):
+    """Connexion par le formulaire (jeton CSRF compris) ; renvoie le cookie."""
+    client = Client(port)
+    status, set_cookie, page = client.request("GET", "/login")
+    client.cookie = _session_cookie(set_cookie)
+    token = _CSRF.search(page.decode()).group(1)
+    status, set_cookie, _ = client.request(
+        "POST",
+        "/login",
+        urlencode(
+            {"csrf_token": token, "username": username, "password": password}
+        ).encode(),
+        {"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    client.close()
+    if status != 302 or not set_cookie:
+        sys.exit(f"❌ Connexion de {username} impossible (HTTP {status})")
+    return _session_cookie(set_cookie)
+
+
+# -----------------------------
+# Scénarios
+# -----------------------------
+def _page(nom, endpoint, path, plafond_ms=None):
+    return Scenario(
+        nom, ((endpoint, "GET"),), lambda c, p: c.get(path), plafond_ms=plafond_ms
+    )
+
+
+def _anonymous(path):
+    # Page publique : visiteur sans session (nouvelle connexion à chaque fois)
+    def run(client, param):
+        anonyme = Client(client.port)
+        try:
+            return anonyme.get(path)
+        finally:
+            anonyme.close()
+
+    return run
+
+
+def _upload(client, i, commit=True):
+    contenu = f"Rapport envoyé par morceaux {i} {uuid.uuid4().hex}".encode()
+    status, _, data = client.request(
+        "POST",
+        "/api/documents/uploads",
+        {"nom": f"envoi_{i}.txt", "taille": len(contenu)},
+    )
+    if status != 201:
+        return status
+    upload_id = json.loads(data)["id"]
+    if not commit:
+        return client.request("DELETE", f"/api/documents/uploads/{upload_id}")[0]
+    status = client.request(
+        "PUT",
+        f"/api/documents/uploads/{upload_id}",
+        contenu,
+        {"Content-Range": f"bytes 0-{len(contenu) - 1}/{len(contenu)}"},
+    )[0]
+    if status != 200:
+        return status
+    client.get(f"/api/documents/uploads/{upload_id}")
+    return client.request(
+        "POST",
+        f"/api/documents/uploads/{upload_id}/commit",
+        {"titre": f"Envoi {i}", "type": "rapport"},
+    )[0]
+
+
+def _login_form(client, i):
+    # Page de connexion puis envoi du formulaire (hachage du mot de passe)
+    anonyme = Client(client.port)
+    try:
+        status, set_cookie, page = anonyme.request("GET", "/login")
+        anonyme.cookie = _session_cookie(set_cookie)
+        token = _CSRF.search(page.decode()).group(1)
+        return anonyme.form(
+            "/login", {"csrf_token": token, "username": USERNAME, "password": PASSWORD}
+        )
+    finally:
+        anonyme.close()
+
+
+def _password_reset(client, i):
+    anonyme = Client(client.port)
+    try:
+        status, set_cookie, page = anonyme.request("GET", "/mot_de_passe_oublie")
+        anonyme.cookie = _session_cookie(set_cookie)
+        token = _CSRF.search(page.decode()).group(1)
+        return anonyme.form(
+            "/mot_de_passe_oublie",
+            {
+                "csrf_token": token,
+                "username": f"{USERNAME}-reset",
+                "new_password": PASSWORD,
+            },
+        )
+    finally:
+        anonyme.close()
+
+
+def scenarios(ids):
+    tache, projet, budget = ids["tache"], ids["projet"], ids["budget"]
+    document, job = ids["document"], ids["job"]
+    lat, lon = (BBOX[1] + BBOX[3]) / 2, (BBOX[0] + BBOX[2]) / 2
+    bbox = ",".join(map(str, BBOX))
+    formulaire_tache = {
+        "titre": "Tâche bench",
+        "date": "2025-06-30",
+        "statut": "En cours",
+        "priorite": "Haute",
+        "projet": "Projet 1",
+        "assignee": "agent1",
+    }
+    formulaire_projet = {
+        "nom": "Projet bench",
+        "date_debut": "2025-01-01",
+        "statut": "En cours",
+        "budget": "1000000 Ar",
+        "progression": "10",
+    }
+    return [
+        # Pages
+        _page("index", "routes.index", "/"),
+        _page("taches", "routes.taches", "/taches"),
+        _page("projets", "routes.projets", "/projets"),
+        _page("budgets", "routes.budgets", "/budgets"),
+        _page("documents", "routes.documents", "/documents"),
+        _page("cartographie", "routes.cartographie", "/cartographie"),
+        _page(
+            "gestion_utilisateurs",
+            "routes.gestion_utilisateurs",
+            "/gestion_utilisateurs",
+        ),
+        _page("rapports", "routes.rapports", "/rapports"),
+        _page("parametres", "routes.parametres", "/parametres"),
+        _page("outils_terrain", "routes.outils_terrain", "/outils_terrain"),
+        _page("analytics", "routes.analytics", "/analytics"),
+        _page("analytics_ia", "routes.analytics_ia", "/analytics_ia"),
+        _page("edit_project", "routes.edit_project", f"/edit_project/{projet}"),
+        Scenario(
+            "login",
+            (("routes.login", "GET"),),
+            _anonymous("/login"),
+        ),
+        Scenario(
+            "mot_de_passe_oublie",
+            (("routes.mot_de_passe_oublie", "GET"),),
+            _anonymous("/mot_de_passe_oublie"),
+        ),
+        Scenario(
+            "login_post",
+            (("routes.login", "POST"),),
+            _login_form,
+            (302,),
+            clients=2,
+            max_requests=20,
+            plafond_ms=PLAFOND_COUTEUX_MS,
+        ),
+        Scenario(
+            "mot_de_passe_oublie_post",
+            (("routes.mot_de_passe_oublie", "POST"),),
+            _password_reset,
+            (302,),
+            clients=2,
+            max_requests=20,
+            plafond_ms=PLAFOND_COUTEUX_MS,
+        ),
+        Scenario(
+            "logout", (("routes.logout", "GET"),), lambda c, p: c.get("/logout"), (302,)
+        ),
+        # API en lecture
+        _page("api_taches", "routes.api_taches", "/api/taches?limit=50"),
+        _page(
+            "api_taches_filtre",
+            "routes.api_taches",
+            "/api/taches?statut=En+cours&sort=date_limite&limit=50",
+        ),
+        _page("api_projets", "routes.api_projets", "/api/projets?limit=50"),
+        _page("api_projet", "routes.api_projet", f"/api/projets/{projet}"),
+        _page("api_budgets", "routes.api_budgets", "/api/budgets?limit=50"),
+        _page("api_budget", "routes.api_budget", f"/api/budgets/{budget}"),
+        _page("api_documents", "routes.api_documents", "/api/documents?limit=50"),
+        _page("api_document", "routes.api_document", f"/api/documents/{document}"),
+        _page(
+            "api_documents_search",
+            "routes.api_documents_search",
+            "/api/documents/search?q=route+budget",
+        ),
+        _page(
+            "download_document",
+            "routes.download_document",
+            f"/documents/{document}/download",
+        ),
+        _page("api_points", "routes.api_points", f"/api/points?bbox={bbox}&zoom=10"),
+        _page(
+            "api_points_detail",
+            "routes.api_points",
+            f"/api/points?bbox={lon - 0.05},{lat - 0.05},{lon + 0.05},{lat + 0.05}"
+            "&zoom=15",
+        ),
+        _page(
+            "api_sites_nearest",
+            "routes.api_sites_nearest",
+            f"/api/sites/nearest?lat={lat}&lon={lon}&k=10",
+        ),
+        _page(
+            "api_sites_radius",
+            "routes.api_sites_radius",
+            f"/api/sites/radius?lat={lat}&lon={lon}&km=10",
+        ),
+        _page(
+            "api_districts_coverage",
+            "routes.api_districts_coverage",
+            "/api/districts/coverage",
+        ),
+        _page(
+            "api_analytics_anomalies",
+            "routes.api_analytics_anomalies",
+            "/api/analytics/anomalies?limit=20",
+        ),
+        _page(
+            "api_user_cache_stats",
+            "routes.api_user_cache_stats",
+            "/api/user_cache/stats",
+        ),
+        _page("api_hashing_stats", "routes.api_hashing_stats", "/api/hashing/stats"),
+        _page("api_db_pool_stats", "routes.api_db_pool_stats", "/api/db/pool/stats"),
+        _page("metrics", "routes.prometheus_metrics", "/metrics"),
+        _page("api_job", "routes.api_job", f"/api/jobs/{job}"),
+        _page(
+            "api_job_download", "routes.api_job_download", f"/api/jobs/{job}/download"
+        ),
+        # Exports en flux
+        *(
+            _page(
+                f"export_{nom}",
+                f"routes.export_{nom}",
+                f"/{nom}/export?format=csv",
+                PLAFOND_COUTEUX_MS,
+            )
+            for nom in ("taches", "projets", "budgets")
+        ),
+        # Écritures
+        Scenario(
+            "add_task",
+            (("routes.add_task", "POST"),),
+            lambda c, p: c.form("/add_task", formulaire_tache),
+            (302,),
+        ),
+        Scenario(
+            "edit_task_post",
+            (("routes.edit_task", "POST"),),
+            lambda c, p: c.form(f"/edit_task/{tache}", formulaire_tache),
+            (302,),
+        ),
+        Scenario(
+            "complete_task",
+            (("routes.complete_task", "POST"),),
+            lambda c, p: c.form(f"/complete_task/{tache}", {}),
+            (302,),
+        ),
+        Scenario(
+            "delete_task",
+            (("routes.delete_task", "POST"),),
+            lambda c, p: c.form(f"/delete_task/{p}", {}),
+            (302,),
+            prepare_taches,
+        ),
+        Scenario(
+            "add_project",
+            (("routes.add_project", "POST"),),
+            lambda c, p: c.form("/add_project", formulaire_projet),
+            (302,),
+        ),
+        Scenario(
+            "edit_project_post",
+            (("routes.edit_project", "POST"),),
+            lambda c, p: c.form(f"/edit_project/{projet}", formulaire_projet),
+            (302,),
+        ),
+        Scenario(
+            "delete_project",
+            (("routes.delete_project", "POST"),),
+            lambda c, p: c.form(f"/delete_project/{p}", {}),
+            (302,),
+            prepare_projets,
+        ),
+        Scenario(
+            "api_budgets_post",
+            (("routes.api_budgets", "POST"),),
+            lambda c, p: c.request(
+                "POST",
+                "/api/budgets",
+                {
+                    "nom": "Budget bench",
+                    "montant": "1000",
+                    "statut": "Alloué",
+                    "date": "2025-01-01",
+                },
+            )[0],
+            (201,),
+        ),
+        Scenario(
+            "api_budget_put",
+            (("routes.api_budget", "PUT"),),
+            lambda c, p: c.request(
+                "PUT", f"/api/budgets/{budget}", {"statut": "Approuvé"}
+            )[0],
+        ),
+        Scenario(
+            "api_budget_delete",
+            (("routes.api_budget", "DELETE"),),
+            lambda c, p: c.request("DELETE", f"/api/budgets/{p}")[0],
+            prepare=prepare_budgets,
+        ),
+        Scenario(
+            "api_budgets_batch",
+            (("routes.api_budgets_batch", "POST"),),
+            lambda c, p: c.request(
+                "POST",
+                "/api/budgets/batch",
+                {
+                    "operations": [
+                        {
+                            "op": "create",
+                            "nom": f"Lot {i}",
+                            "montant": "500",
+                            "statut": "Alloué",
+                            "date": "2025-02-01",
+                        }
+                        for i in range(20)
+                    ]
+                    + [{"op": "update", "id": budget, "statut": "Alloué"}]
+                },
+            )[0],
+        ),
+        Scenario(
+            "parametres_post",
+            (("routes.parametres", "POST"),),
+            lambda c, p: c.form(
+                "/parametres", {"username": USERNAME, "email": "bench@example.org"}
+            ),
+            (302,),
+        ),
+        Scenario(
+            "api_documents_post",
+            (("routes.api_documents", "POST"),),
+            lambda c, p: c.multipart(
+                "/api/documents",
+                {"titre": "Document bench", "type": "rapport"},
+                "bench.txt",
+                f"contenu {uuid.uuid4().hex}".encode(),
+            ),
+            (201,),
+        ),
+        Scenario(
+            "add_document_post",
+            (("routes.add_document", "POST"),),
+            lambda c, p: c.multipart(
+                "/add_document",
+                {"titre": "Document bench", "type": "contrat"},
+                "bench.txt",
+                f"contenu {uuid.uuid4().hex}".encode(),
+            ),
+            (302,),
+        ),
+        Scenario(
+            "edit_document_post",
+            (("routes.edit_document", "POST"),),
+            lambda c, p: c.form(
+                f"/edit_document/{document}", {"titre": "Rapport 0", "type": "rapport"}
+            ),
+            (302,),
+        ),
+        Scenario(
+            "api_document_put",
+            (("routes.api_document", "PUT"),),
+            lambda c, p: c.request(
+                "PUT", f"/api/documents/{document}", {"description": "Mis à jour"}
+            )[0],
+        ),
+        Scenario(
+            "api_document_delete",
+            (("routes.api_document", "DELETE"),),
+            lambda c, p: c.request("DELETE", f"/api/documents/{p}")[0],
+            prepare=prepare_documents,
+        ),
+        Scenario(
+            "delete_document",
+            (("routes.delete_document", "POST"),),
+            lambda c, p: c.form(f"/delete_document/{p}", {}),
+            (302,),
+            prepare_documents,
+        ),
+        Scenario(
+            "upload_par_morceaux",
+            (
+                ("routes.api_upload_start", "POST"),
+                ("routes.api_upload", "PUT"),
+                ("routes.api_upload", "GET"),
+                ("routes.api_upload_commit", "POST"),
+            ),
+            lambda c, p: _upload(c, p),
+            (201,),
+            prepare=lambda app, count: list(range(count)),
+            # Quatre requêtes par itération
+            plafond_ms=PLAFOND_COUTEUX_MS,
+        ),
+        Scenario(
+            "upload_annule",
+            (("routes.api_upload_start", "POST"), ("routes.api_upload", "DELETE")),
+            lambda c, p: _upload(c, p, commit=False),
+            prepare=lambda app, count: list(range(count)),
+        ),
+        Scenario(
+            "api_job_delete",
+            (("routes.api_job", "DELETE"),),
+            lambda c, p: c.request("DELETE", f"/api/jobs/{p}")[0],
+            prepare=prepare_jobs,
+        ),
+    ]
+
+
+def uncovered(app, liste):
+    """Routes du blueprint (endpoint, méthode) sans scénario, gabarits absents
+    compris."""
+    couvertes = {route for scenario in liste for route in scenario.routes}
+    attendues = {
+        (rule.endpoint, method)
+        for rule in app.url_map.iter_rules()
+        if rule.endpoint.startswith("routes.")
+        for method in rule.methods - {"HEAD", "OPTIONS"}
+    }
+    return sorted(attendues - couvertes)
+
+
+# -----------------------------
+# Exécution et mesures
+# -----------------------------
+def percentile(valeurs, p):
+    # Rang le plus proche, sur des valeurs triées
+    rang = max(int(round(p / 100 * len(valeurs) + 0.5)) - 1, 0)
+    return valeurs[min(rang, len(valeurs) - 1)]
+
+
+def run_scenario(scenario, app, port, cookie, args):
+    total = min(args.requests, scenario.max_requests or args.requests)
+    warmup = min(args.warmup, total)
+    clients = min(args.clients, scenario.clients or args.clients)
+    params = (
+        scenario.prepare(app, total + warmup)
+        if scenario.prepare
+        else [None] * (total + warmup)
+    )
+
+    client = Client(port, cookie)
+    for param in params[:warmup]:
+        scenario.run(client, param)
+    client.close()
+
+    latences, erreurs = [], []
+    compteur = itertools.count()
+
+    def worker():
+        client = Client(port, cookie)
+        try:
+            while True:
+                i = next(compteur)
+                if i >= total:
+                    return
+                debut = time.perf_counter()
+                try:
+                    status = scenario.run(client, params[warmup + i])
+                except (http.client.HTTPException, OSError) as e:
+                    status = repr(e)
+                latences.append(time.perf_counter() - debut)
+                if status not in scenario.attendu:
+                    erreurs.append(status)
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    debut = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duree = time.perf_counter() - debut
+
+    latences.sort()
+    return {
+        "requests": total,
+        "clients": clients,
+        "errors": len(erreurs),
+        "error_sample": sorted({str(e) for e in erreurs})[:3],
+        "rps": round(total / duree, 1),
+        "mean_ms": round(sum(latences) / len(latences) * 1000, 2),
+        "p50_ms": round(percentile(latences, 50) * 1000, 2),
+        "p90_ms": round(percentile(latences, 90) * 1000, 2),
+        "p99_ms": round(percentile(latences, 99) * 1000, 2),
+        "max_ms": round(latences[-1] * 1000, 2),
+    }
+
+
+def over_ceiling(results, liste, args):
+    """Scénarios dont le p50 dépasse leur plafond (liste de messages)."""
+    plafonds = {s.nom: s.plafond_ms or args.max_p50_ms for s in liste}
+    return [
+        f"{nom} : p50 {r['p50_ms']:.1f} ms > plafond {plafonds[nom]:.0f} ms"
+        for nom, r in results.items()
+        if r["p50_ms"] > plafonds[nom]
+    ]
+
+
+def machine():
+    """Machine de mesure : une référence n'est comparable que sur la même."""
+    processeur = platform.processor()
+    memoire = None
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as fichier:
+            for ligne in fichier:
+                if ligne.startswith("model name"):
+                    processeur = ligne.split(":", 1)[1].strip()
+                    break
+        with open("/proc/meminfo", encoding="utf-8") as fichier:
+            kio = int(fichier.readline().split()[1])
+            memoire = f"{round(kio / 1024**2)} Gio"
+    except (OSError, ValueError, IndexError):
+        pass
+    return {
+        "systeme": f"{platform.system()} {platform.machine()}",
+        "processeur": processeur or "inconnu",
+        "cpu": os.cpu_count(),
+        "memoire": memoire,
+    }
+
+
+def best_run(runs):
+    # Meilleure répétition (p50 le plus bas) : écarte les perturbations ponctuelles
+    return min(runs, key=lambda run: (run["errors"], run["p50_ms"]))
+
+
+def compare(results, baseline, args):
+    """Régressions par rapport à la référence (liste de messages)."""
+    failures = []
+    for nom, base in baseline.get("scenarios", {}).items():
+        courant = results.get(nom)
+        if courant is None:
+            continue
+        for cle, tolerance in (
+            ("p50_ms", args.tolerance),
+            ("p90_ms", args.tolerance),
+            ("p99_ms", args.p99_tolerance),
+        ):
+            limite = base[cle] * (1 + tolerance)
+            if courant[cle] > limite and courant[cle] - base[cle] > args.min_ms:
+                failures.append(
+                    f"{nom} : {cle} {courant[cle]:.1f} > {limite:.1f} "
+                    f"(référence {base[cle]:.1f})"
+                )
+        plancher = base["rps"] / (1 + args.tolerance)
+        if courant["rps"] < plancher and base["rps"] - courant["rps"] > 1:
+            failures.append(
+                f"{nom} : débit {courant['rps']:.0f} req/s < {plancher:.0f} "
+                f"(référence {base['rps']:.0f})"
+            )
+    return failures
+
+
+# -----------------------------
+# Serveur
+# -----------------------------
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(port):
+    # Processus serveur : configuration par l'environnement (voir start_server)
+    import logging
+
+    from werkzeug.serving import run_simple
+
+    from wsgi import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    run_simple("127.0.0.1", port, app, threaded=True)
+
+
+def start_server(args, database_url, folder, port):
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "DOCUMENTS_FOLDER": os.path.join(folder, "documents"),
+        "JOBS_FOLDER": os.path.join(folder, "jobs"),
+        "JOBS_ASYNC": "0",
+        "QUERY_PROFILE_SAMPLE": "0",
+        "PORT": str(port),
+        "SECRET_KEY": uuid.uuid4().hex,
+    }
+    if args.gunicorn:
+        env["WEB_CONCURRENCY"] = str(args.workers)
+        commande = [
+            "gunicorn",
+            "-c",
+            "gunicorn.conf.py",
+            "--access-logfile",
+            "/dev/null",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "wsgi:app",
+        ]
+    else:
+        commande = [sys.executable, __file__, "--serve", str(port)]
+    process = subprocess.Popen(commande, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    echeance = time.monotonic() + 30
+    while time.monotonic() < echeance:
+        if process.poll() is not None:
+            sys.exit("❌ Le serveur s'est arrêté au démarrage")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    sys.exit("❌ Le serveur ne répond pas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000, help="tâches (projets : /4)")
+    parser.add_argument("--requests", type=int, default=200, help="par scénario")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--only", action="append", help="scénario(s) à jouer")
+    parser.add_argument(
+        "--database-url", help="base dédiée (défaut : SQLite temporaire)"
+    )
+    parser.add_argument("--gunicorn", action="store_true")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.3, help="hausse admise de p50 / p90"
+    )
+    parser.add_argument("--p99-tolerance", type=float, default=1.0)
+    parser.add_argument(
+        "--max-p50-ms",
+        type=float,
+        default=250.0,
+        help="plafond de p50 par scénario, référence ou non",
+    )
+    parser.add_argument(
+        "--min-ms", type=float, default=2.0, help="écart absolu ignoré (bruit)"
+    )
+    parser.add_argument("--output", help="résultats bruts (JSON)")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve)
+
+    with tempfile.TemporaryDirectory() as folder:
+        database_url = (
+            args.database_url or f"sqlite:///{os.path.join(folder, 'bench.db')}"
+        )
+        app = make_app(database_url, folder)
+        ids = seed(app, args.rows, random.Random(42))
+        liste = scenarios(ids)
+        non_couvertes = uncovered(app, liste)
+        manquantes = [r for r in non_couvertes if r not in GABARITS_ABSENTS]
+        if manquantes:
+            sys.exit(
+                "❌ Routes sans scénario : "
+                + ", ".join(f"{m} {e}" for e, m in manquantes)
+            )
+        for endpoint, method in non_couvertes:
+            gabarit = GABARITS_ABSENTS[(endpoint, method)]
+            print(f"⚠️  {endpoint} {method} non couverte : gabarit {gabarit} absent")
+        if args.only:
+            liste = [s for s in liste if s.nom in args.only]
+
+        port = _free_port()
+        server = start_server(args, database_url, folder, port)
+        try:
+            cookie = login(port)
+            results = {}
+            print(
+                f"{'scénario':<26} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} "
+                f"{'p99 ms':>8} {'max ms':>8} {'erreurs':>8}"
+            )
+            for scenario in liste:
+                result = best_run(
+                    [
+                        run_scenario(scenario, app, port, cookie, args)
+                        for _ in range(args.repeat)
+                    ]
+                )
+                results[scenario.nom] = result
+                print(
+                    f"{scenario.nom:<26} {result['rps']:>8.1f} "
+                    f"{result['p50_ms']:>8.1f} {result['p90_ms']:>8.1f} "
+                    f"{result['p99_ms']:>8.1f} {result['max_ms']:>8.1f} "
+                    f"{result['errors']:>8}"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+    meta = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "machine": machine(),
+        "python": platform.python_version(),
+        "serveur": f"gunicorn x{args.workers}" if args.gunicorn else "werkzeug",
+        "base": "postgresql" if database_url.startswith("postgres") else "sqlite",
+        "rows": args.rows,
+        "requests": args.requests,
+        "clients": args.clients,
+    }
+    print(f"\nMachine : {meta['machine']}")
+    depassements = over_ceiling(results, liste, args)
+    rapport = {
+        "meta": meta,
+        "scenarios": results,
+        "non_couvertes": [f"{e} {m}" for e, m in non_couvertes],
+        "au_dela_du_plafond": depassements,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fichier:
+            json.dump(rapport, fichier, indent=2)
+    if non_couvertes:
+        print(f"⚠️  {len(non_couvertes)} route(s) non couverte(s)")
+    if depassements:
+        print("⚠️  Au-delà du plafond :\n  " + "\n  ".join(depassements))
+
+    failures = [
+        f"{nom} : {r['errors']} réponse(s) inattendue(s) {r['error_sample']}"
+        for nom, r in results.items()
+        if r["errors"]
+    ]
+    if args.update_baseline:
+        if failures:
+            sys.exit("❌ Référence non enregistrée : " + " ; ".join(failures))
+        # Dépassements enregistrés avec la référence : elle ne les rend pas normaux
+        with open(args.baseline, "w", encoding="utf-8") as fichier:
+            json.dump(rapport, fichier, indent=2)
+            fichier.write("\n")
+        print(f"\n✅ Référence enregistrée : {os.path.relpath(args.baseline, ROOT)}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fichier:
+            baseline = json.load(fichier)
+        ecarts = {
+            cle: (baseline["meta"].get(cle), valeur)
+            for cle, valeur in meta.items()
+            if cle not in ("date",) and baseline["meta"].get(cle) != valeur
+        }
+        if ecarts:
+            # Autre machine ou autres paramètres : les chiffres ne se comparent pas
+            print(
+                f"\n⚠️  Conditions différentes de la référence : {ecarts}\n"
+                "    Comparaison non faite ; régénérer la référence sur cette "
+                "machine (--update-baseline)"
+            )
+        else:
+            failures += compare(results, baseline, args)
+    else:
+        print("\n⚠️  Pas de référence : lancer avec --update-baseline")
+    failures += depassements
+    if failures:
+        sys.exit("❌ Régressions ou plafonds dépassés :\n  " + "\n  ".join(failures))
+    print("\n✅ Aucune régression au-delà de la tolérance")
+
+
+if __name__ == "__main__":
+    main()
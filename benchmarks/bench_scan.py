@@ -0,0 +1,143 @@
+"""Benchmark du scan d'anomalies par blocs : pic de RSS selon la taille.
+
+Comme ``bench_export.py``, chaque taille est remplie puis analysée dans des
+processus séparés ; le pic de RSS du processus d'analyse doit rester stable.
+
+Usage :
+    python benchmarks/bench_scan.py                    # 100k, 1M projets
+    python benchmarks/bench_scan.py --rows 10000 --rows 200000 --chunksize 20000
+"""
+
+import argparse
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def populate(path, rows):
+    import random
+
+    from app import create_app, db
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    with app.app_context():
+        db.create_all()
+
+    rng = random.Random(42)
+    connection = sqlite3.connect(path)
+    batch = []
+    for i in range(1, rows + 1):
+        budget = rng.randint(50_000, 5_000_000)
+        delai = rng.randint(10, 720)
+        batch.append(
+            (
+                i,
+                f"Projet {i}",
+                "2020-01-01 00:00:00",
+                "En cours",
+                budget,
+                int(budget * rng.uniform(0.6, 1.5)),
+                delai,
+                int(delai * rng.uniform(0.7, 1.8)),
+                1,
+                "2020-01-01 00:00:00",
+            )
+        )
+        if len(batch) == 50_000:
+            _insert(connection, batch)
+            batch = []
+    _insert(connection, batch)
+    connection.close()
+
+
+def _insert(connection, batch):
+    connection.executemany(
+        "INSERT INTO projets (id, nom, date_debut, statut, montant_prevu, "
+        "montant_execute, delai_prevu, delai_reel, version, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        batch,
+    )
+    connection.commit()
+
+
+def scan(path, chunksize):
+    from app import create_app
+    from app.analytics import scan_anomalies
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    with app.app_context():
+        started = time.perf_counter()
+        resultat = scan_anomalies(chunksize=chunksize)
+        elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        json.dumps(
+            {
+                "total": resultat["total_projets"],
+                "anomalies": resultat["anomalies_total"],
+                "seconds": elapsed,
+                "peak_rss_kb": peak_kb,
+            }
+        )
+    )
+
+
+def run(rows, chunksize):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        subprocess.run(
+            [sys.executable, __file__, "--populate", path, "--rows", str(rows)],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        output = subprocess.run(
+            [sys.executable, __file__, "--scan", path, "--chunksize", str(chunksize)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, action="append")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--populate", help=argparse.SUPPRESS)
+    parser.add_argument("--scan", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.populate:
+        return populate(args.populate, args.rows[0])
+    if args.scan:
+        return scan(args.scan, args.chunksize)
+
+    sizes = sorted(args.rows or [100_000, 1_000_000])
+    results = []
+    for rows in sizes:
+        result = run(rows, args.chunksize)
+        results.append(result)
+        print(
+            f"{rows:>10} projets  {result['anomalies']:>9} anomalies  "
+            f"{result['seconds']:7.2f} s  {rows / result['seconds']:>9.0f} projets/s  "
+            f"pic RSS {result['peak_rss_kb'] / 1024:6.1f} Mo"
+        )
+
+    ratio = results[-1]["peak_rss_kb"] / results[0]["peak_rss_kb"]
+    print(f"Ratio pic RSS {sizes[-1]} / {sizes[0]} projets : {ratio:.2f}")
+    if ratio > args.tolerance:
+        sys.exit("❌ La mémoire du scan croît avec la taille de la table")
+    print("✅ Mémoire bornée")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark du démarrage à froid : imports, ``create_app()`` et RSS de base.
+
+Lance ``python -X importtime`` dans un processus neuf (comme un worker
+gunicorn ou un démarrage à froid Vercel), puis relève :
+
+- le temps total d'import et les modules les plus coûteux ;
+- la durée de ``create_app()`` ;
+- le pic de RSS du processus après création de l'application ;
+- les modules lourds (pandas, NumPy) chargés alors qu'ils ne devraient pas.
+
+Usage :
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --max-ms 800 --max-rss-mb 80
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules qui ne doivent être chargés qu'à la demande (analytics IA)
+HEAVY_MODULES = ("pandas", "numpy")
+
+CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+created = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "heavy": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def parse_importtime(stderr, max_depth=1):
+    """Renvoie ``[(cumul_us, module)]`` jusqu'à la profondeur ``max_depth``."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Chaque niveau de sous-import ajoute deux espaces d'indentation
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= max_depth:
+            rows.append((int(cumulative), name.strip()))
+    return rows
+
+
+def measure():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    stats["imports"] = parse_importtime(result.stderr)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, help="budget import + create_app")
+    parser.add_argument("--max-rss-mb", type=float, help="budget de RSS de base")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.repeat)]
+    best = min(runs, key=lambda run: run["import_ms"] + run["create_app_ms"])
+    total_ms = best["import_ms"] + best["create_app_ms"]
+    rss_mb = best["peak_rss_kb"] / 1024
+
+    print(f"Import de app          : {best['import_ms']:8.1f} ms")
+    print(f"create_app()           : {best['create_app_ms']:8.1f} ms")
+    print(f"Total (meilleur de {args.repeat})  : {total_ms:8.1f} ms")
+    print(f"RSS après create_app   : {rss_mb:8.1f} Mo")
+    print("\nImports les plus coûteux (-X importtime, cumulé) :")
+    for cumulative, name in sorted(best["imports"], reverse=True)[: args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if best["heavy"]:
+        failures.append(f"modules lourds chargés au démarrage : {best['heavy']}")
+    if args.max_ms and total_ms > args.max_ms:
+        failures.append(f"démarrage {total_ms:.0f} ms > {args.max_ms:.0f} ms")
+    if args.max_rss_mb and rss_mb > args.max_rss_mb:
+        failures.append(f"RSS {rss_mb:.1f} Mo > {args.max_rss_mb:.1f} Mo")
+    if failures:
+        sys.exit("❌ " + " ; ".join(failures))
+    print("\n✅ Démarrage dans les limites")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# gunicorn.conf.py - Configuration de production
+#
+# L'application est chargée une seule fois dans le processus maître
+# (preload_app) puis partagée par fork : un worker (re)lancé par max_requests
+# démarre sans import ni accès à la base. L'initialisation de la base se fait
+# à part, une fois par déploiement : `flask --app wsgi bootstrap`.
+
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+preload_app = True
+
+# Recyclage périodique des workers (fuites mémoire) : quasi instantané
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+accesslog = "-"
+
+# Métriques agrégées entre workers (app/metrics.py) : un dossier par maître,
+# renseigné avant le chargement de l'application
+_metrics_temporaire = "METRICS_FOLDER" not in os.environ
+if _metrics_temporaire:
+    os.environ["METRICS_FOLDER"] = tempfile.mkdtemp(prefix="projets-metrics-")
+
+
+def post_fork(server, worker):
+    # Ne jamais partager entre processus une connexion ouverte par le maître
+    from app import db
+    from wsgi import app
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    # Les compteurs d'un worker recyclé restent acquis (archive)
+    from app import metrics
+
+    metrics.mark_process_dead(os.environ["METRICS_FOLDER"], worker.pid)
+
+
+def on_exit(server):
+    if _metrics_temporaire:
+        shutil.rmtree(os.environ["METRICS_FOLDER"], ignore_errors=True)
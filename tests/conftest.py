@@ -0,0 +1,34 @@
+import pytest
+
+from app import create_app, db, metrics
+from app.models import User
+
+
+@pytest.fixture
+def app_db(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "WTF_CSRF_ENABLED": False,
+        # Tâches de fond exécutées explicitement par les tests
+        "JOBS_ASYNC": False,
+        "JOBS_FOLDER": str(tmp_path),
+        "METRICS_FOLDER": None,
+    })
+    metrics.registry.reset()
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username="admin", password="x", role="admin"))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def auth_client(app_db):
+    client = app_db.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = "1"
+        session["_fresh"] = True
+    return client
@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pandas as pd
+
+from app import create_app, db
+from app.analytics import (
+    RECO_AUCUNE,
+    RECO_BUDGET,
+    RECO_DELAI,
+    AnalysisCache,
+    analyse,
+    detect,
+    scan_anomalies,
+)
+from app.models import Projet
+
+
+def test_analyse_vectorisee():
+    df = pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "budget": [500000, 300000, 400000, 100000],
+        "executed": [520000, 250000, 600000, 200000],
+        "delai": [30, 20, 25, 10],
+        "delai_real": [40, 18, 50, 10],
+    })
+
+    anomalies, recommandations = analyse(df)
+
+    assert anomalies["id"].tolist() == [1, 3, 4]
+    assert recommandations.tolist() == [
+        RECO_DELAI, RECO_AUCUNE, RECO_DELAI, RECO_BUDGET
+    ]
+
+
+def test_cache_par_version():
+    cache = AnalysisCache(maxsize=1)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute("v1", compute) == 1
+    assert cache.get_or_compute("v1", compute) == 1
+    assert cache.get_or_compute("v2", compute) == 2
+    assert cache.get_or_compute("v1", compute) == 3
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_scan_anomalies_par_blocs():
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(
+            Projet(
+                nom=f"Projet {i}",
+                date_debut=datetime(2025, 1, 1),
+                statut="En cours",
+                montant_prevu=1000,
+                montant_execute=1000 + 50 * i,
+                delai_prevu=10,
+                delai_reel=10,
+            )
+            for i in range(10)
+        )
+        db.session.commit()
+
+        resultat = scan_anomalies(chunksize=3, top=2)
+
+    assert resultat["total_projets"] == 10
+    # Dépassement > 10 % à partir de i = 3
+    assert resultat["anomalies_budget"] == 7
+    assert resultat["depassement_total"] == 50 * sum(range(10))
+    assert [a["nom"] for a in resultat["anomalies"]] == ["Projet 9", "Projet 8"]
+    assert resultat["recommandations"] == [RECO_BUDGET, RECO_BUDGET]
+
+
+def test_detecteurs_par_groupe():
+    df = pd.DataFrame({
+        "id": range(1, 13),
+        "nom": [f"P{i}" for i in range(1, 13)],
+        "type_projet": ["Route"] * 6 + ["École"] * 6,
+        "district": None,
+        "budget": [100] * 12,
+        # Les routes dépassent toutes de 50 % : seule l'école à 160 % détonne
+        "executed": [150, 151, 149, 150, 152, 148, 100, 101, 99, 100, 102, 160],
+        "delai": [10] * 12,
+        "delai_real": [10] * 12,
+    })
+
+    assert set(detect(df, "ratio")["id"]) == {1, 2, 3, 4, 5, 6, 12}
+    assert detect(df, "zscore")["id"].tolist() == [12]
+    assert detect(df, "iqr")["id"].tolist() == [12]
+    assert set(detect(df, "percentile", seuil=0.9)["id"]) == {5, 12}
+    # Sans regroupement pertinent, ce sont les écoles « normales » qui détonnent
+    assert set(detect(df, "zscore", groupe="district")["id"]) == {7, 8, 9, 10, 11}
@@ -0,0 +1,43 @@
+import gzip
+import os
+import re
+
+import pytest
+
+from app import assets
+
+
+@pytest.mark.parametrize("page", ["/", "/parametres", "/cartographie", "/documents"])
+def test_pages_sans_css_ni_js_embarques(auth_client, page):
+    html = auth_client.get(page).get_data(as_text=True)
+    assert "<style>" not in html and "<script>" not in html
+    urls = re.findall(r'"(/assets/[^"]+)"', html)
+    assert len(urls) == 2
+    for url in urls:
+        response = auth_client.get(url)
+        assert response.status_code == 200
+        assert response.headers["Cache-Control"] == assets.IMMUTABLE
+
+
+def test_paquet_a_empreinte_compresse_et_conditionnel(auth_client):
+    paquet = assets.bundle("index.css")
+    chemin = os.path.join(auth_client.application.static_folder, "css/index.css")
+    with open(chemin, "rb") as f:
+        source = f.read()
+    assert paquet.contenu == source
+    url = f"/assets/{paquet.fichier}"
+    assert re.fullmatch(r"/assets/index\.[0-9a-f]{12}\.css", url)
+
+    response = auth_client.get(url, headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.mimetype == "text/css"
+    assert gzip.decompress(response.data) == source
+
+    etag = response.headers["ETag"]
+    assert auth_client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    # Empreinte périmée (page rendue avant un déploiement) : pas de cache durable
+    perime = auth_client.get("/assets/index.000000000000.css")
+    assert perime.status_code == 200 and perime.headers["Cache-Control"] == "no-cache"
+    assert auth_client.get("/assets/inconnu.000000000000.css").status_code == 404
+    assert auth_client.get("/assets/index.css").status_code == 404
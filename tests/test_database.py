@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError
+
+from app import create_app, database, db
+from app.models import User
+
+
+@pytest.fixture
+def app_fichier(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'projets.db'}",
+        "WTF_CSRF_ENABLED": False,
+        "JOBS_ASYNC": False,
+        "SQLITE_BUSY_TIMEOUT": 2500,
+    })
+    database.metrics.reset()
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username="admin", password="x", role="admin"))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+def test_profil_postgresql():
+    options = database.engine_options({
+        "SQLALCHEMY_DATABASE_URI": "postgresql://u:p@db/projets",
+        "DB_POOL_SIZE": 8,
+        "DB_STATEMENT_TIMEOUT": 30000,
+    })
+    assert options["poolclass"] is database.MeteredQueuePool
+    assert options["pool_size"] == 8 and options["pool_pre_ping"] is True
+    assert options["pool_recycle"] == 1800
+    assert options["connect_args"]["options"] == "-c statement_timeout=30000"
+
+
+def test_pragmas_sqlite(app_fichier):
+    pragmas = {
+        nom: db.session.execute(text(f"PRAGMA {nom}")).scalar()
+        for nom in ("journal_mode", "synchronous", "busy_timeout")
+    }
+    # synchronous : 1 = NORMAL
+    assert pragmas == {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 2500}
+
+
+def test_metriques_du_pool(app_fichier):
+    client = app_fichier.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = "1"
+        session["_fresh"] = True
+
+    stats = client.get("/api/db/pool/stats").get_json()
+    assert stats["pool"] == "MeteredQueuePool" and stats["checkouts"] >= 1
+    assert stats["wait_histogram"]["+Inf"] == stats["checkouts"]
+    assert 0 < stats["saturation"] <= 1
+
+
+def test_delai_du_pool_sature(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'sature.db'}",
+        "SQLALCHEMY_ENGINE_OPTIONS": {
+            "pool_size": 1, "max_overflow": 0, "pool_timeout": 0.05,
+        },
+        "JOBS_ASYNC": False,
+    })
+    database.metrics.reset()
+    with app.app_context():
+        engine = db.engine
+    with engine.connect():
+        with ThreadPoolExecutor(1) as executor, pytest.raises(TimeoutError):
+            executor.submit(engine.connect).result()
+        assert database.stats(engine)["saturation"] == 1.0
+    assert database.metrics.snapshot()["timeouts"] == 1
+    engine.dispose()
@@ -0,0 +1,94 @@
+import random
+
+import numpy as np
+
+from app import create_app, db, summary
+from app.demo_data import seed_demo_data
+from app.geo import assign_all_sites, haversine_km, nearest, points_in_polygons
+from app.models import District, Site
+
+
+def test_point_dans_polygone_avec_trou():
+    carre = np.array([[0, 0], [4, 0], [4, 4], [0, 4], [0, 0]], dtype=float)
+    trou = np.array([[1, 1], [3, 1], [3, 3], [1, 3], [1, 1]], dtype=float)
+    x = np.array([0.5, 2.0, 3.5, 5.0])
+    y = np.array([0.5, 2.0, 3.5, 2.0])
+
+    inside = points_in_polygons(x, y, [[carre, trou]])
+
+    assert inside.tolist() == [True, False, True, False]
+
+
+def test_districts_et_plus_proches_voisins():
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        db.create_all()
+        seed_demo_data()
+        sites = {site.nom: site.district for site in Site.query}
+        assert sites["Installation Pompe Solaire"] == "Vohibato"
+        assert sites["Lycée Technique Antsirabe"] == "Fianarantsoa I"
+
+        rng = random.Random(3)
+        db.session.add_all(
+            Site(nom=f"Site {i}", latitude=rng.uniform(-21.9, -21.0),
+                 longitude=rng.uniform(46.6, 47.5))
+            for i in range(500)
+        )
+        db.session.commit()
+
+        tous = Site.query.all()
+        distances = haversine_km(
+            -21.45, 47.08,
+            np.array([s.latitude for s in tous]), np.array([s.longitude for s in tous]),
+        )
+        attendus = [tous[i].id for i in np.argsort(distances, kind="stable")[:10]]
+        assert [site_id for site_id, _ in nearest(-21.45, 47.08, 10)] == attendus
+
+        # Nouveau contour : réaffectation en masse et compteurs à jour
+        db.session.add(District(nom="Isorana", **District.columns_for({
+            "type": "Polygon",
+            "coordinates": [[[46.5, -22.0], [46.9, -22.0], [46.9, -21.7],
+                             [46.5, -21.7], [46.5, -22.0]]],
+        })))
+        db.session.flush()
+        assert assign_all_sites(chunk=100) > 0
+        db.session.commit()
+
+        couverture = summary.district_coverage()
+        par_nom = {d["district"]: d["sites"] for d in couverture["districts"]}
+        assert par_nom["Isorana"] == Site.query.filter_by(district="Isorana").count()
+        assert summary.reconcile(db.session.connection()) == {}
+
+
+def test_api_rayon():
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "WTF_CSRF_ENABLED": False,
+        # Tâches de fond exécutées explicitement par les tests
+        "JOBS_ASYNC": False,
+    })
+    with app.app_context():
+        db.create_all()
+        seed_demo_data()
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["_user_id"] = "1"
+
+        from app.models import User
+
+        db.session.add(User(id=1, username="admin", password="x", role="admin"))
+        db.session.commit()
+
+        data = client.get("/api/sites/radius?lat=-21.45&lon=47.08&km=3").get_json()
+        distances = [site["distance_km"] for site in data["items"]]
+        assert distances == sorted(distances) and distances[-1] <= 3
+        assert data["items"][0]["nom"] == "École Primaire Publique d'Antsirabe"
+
+        assert client.get("/api/sites/radius?lat=-21.45&lon=47.08").status_code == 400
+        assert client.get("/api/sites/nearest?lat=100&lon=47").status_code == 400
+        voisins = client.get("/api/sites/nearest?lat=-21&lon=47&k=2").json["items"]
+        assert len(voisins) == 2
+
+        coverage = client.get("/api/districts/coverage").get_json()
+        assert coverage["couverts"] >= 2
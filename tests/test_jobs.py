@@ -0,0 +1,131 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db, jobs
+from app.models import Budget, Job, Projet
+
+
+def _echoue(ctx):
+    raise RuntimeError("panne réseau")
+
+
+def _remplace(ctx):
+    path = ctx.output_path("txt")
+    with open(path, "w") as fichier:
+        fichier.write(f"tentative {ctx.tentative}")
+    if ctx.tentative == 1:
+        # Échéance dépassée : une seconde tentative reprend et aboutit
+        job = db.session.get(Job, ctx.id)
+        job.expire_a = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        jobs.expire_overdue()
+        job.execute_apres = datetime.utcnow()
+        db.session.commit()
+        jobs.execute(jobs._claim_next())
+        with pytest.raises(jobs.JobCancelled):
+            ctx.progress(50, force=True)
+    return {"fichier": os.path.basename(path)}
+
+
+def test_export_en_tache_de_fond(auth_client):
+    db.session.add_all(
+        Budget(nom=f"Budget {i}", montant="1000", statut="Alloué",
+               date_allocation=datetime(2025, 1, 1))
+        for i in range(5)
+    )
+    db.session.commit()
+
+    response = auth_client.get("/budgets/export?format=csv&async=1")
+    assert response.status_code == 202
+    url = response.headers["Location"]
+    assert auth_client.get(url).get_json()["statut"] == jobs.EN_ATTENTE
+
+    assert jobs.run_pending() == 1
+    job = auth_client.get(url).get_json()
+    assert job["statut"] == jobs.TERMINE and job["resultat"]["lignes"] == 5
+
+    fichier = auth_client.get(f"{url}/download")
+    contenu = io.StringIO(fichier.data.decode("utf-8-sig"))
+    lignes = list(csv.reader(contenu, delimiter=";"))
+    assert len(lignes) == 6 and lignes[1][1] == "Budget 0"
+
+
+def test_anomalies_dans_le_pool_de_processus(app_db, auth_client):
+    db.session.add_all(
+        Projet(nom=f"Projet {i}", date_debut=datetime(2025, 1, 1), type_projet="Route",
+               montant_prevu=1000, montant_execute=1000 + (5000 if i == 3 else i),
+               delai_prevu=10, delai_reel=10)
+        for i in range(10)
+    )
+    db.session.commit()
+
+    invalide = auth_client.get("/api/analytics/anomalies?async=1&method=x")
+    assert invalide.status_code == 400
+    url = auth_client.get("/api/analytics/anomalies?async=1").headers["Location"]
+    jobs.run_pending()
+
+    job = auth_client.get(url).get_json()
+    assert job["statut"] == jobs.TERMINE, job["erreur"]
+    assert [a["nom"] for a in job["resultat"]["anomalies"]] == ["Projet 3"]
+
+
+def test_nouvelle_tentative_puis_echec(app_db, monkeypatch):
+    monkeypatch.setitem(
+        jobs.TASKS, "test.echec", jobs.Task(f"{__name__}:_echoue", 60, 1, False)
+    )
+    job_id = jobs.enqueue("test.echec").id
+
+    jobs.run_pending()
+    job = db.session.get(Job, job_id)
+    db.session.refresh(job)
+    assert job.statut == jobs.EN_ATTENTE and "panne réseau" in job.erreur
+    assert job.execute_apres > datetime.utcnow()
+
+    job.execute_apres = datetime.utcnow()
+    db.session.commit()
+    jobs.run_pending()
+    db.session.refresh(job)
+    assert job.statut == jobs.ECHEC and job.tentatives == 2
+
+
+def test_delai_depasse_et_annulation(app_db, auth_client, monkeypatch):
+    monkeypatch.setitem(
+        jobs.TASKS, "test.echec", jobs.Task(f"{__name__}:_echoue", 60, 0, False)
+    )
+    job_id = jobs.enqueue("test.echec").id
+    # Tentative réclamée par un worker disparu depuis
+    assert jobs._claim_next() == job_id
+    job = db.session.get(Job, job_id)
+    job.expire_a = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+    assert jobs.expire_overdue() == 1
+    db.session.refresh(job)
+    assert job.statut == jobs.ECHEC and "Délai" in job.erreur
+
+    autre = jobs.enqueue("test.echec").id
+    assert auth_client.delete(f"/api/jobs/{autre}").get_json()["statut"] == jobs.ANNULE
+    assert auth_client.delete(f"/api/jobs/{autre}").status_code == 409
+    assert jobs.run_pending() == 0
+
+
+def test_tentative_expiree_sans_effet(app_db, tmp_path, monkeypatch):
+    monkeypatch.setitem(
+        jobs.TASKS, "test.remplace", jobs.Task(f"{__name__}:_remplace", 60, 1, False)
+    )
+    job_id = jobs.enqueue("test.remplace").id
+    assert jobs.run_pending() == 1
+
+    job = db.session.get(Job, job_id)
+    db.session.refresh(job)
+    assert job.statut == jobs.TERMINE and job.tentatives == 2
+    assert job.progression == 100
+    # Fichier de la tentative retenue intact, celui de l'ancienne supprimé
+    assert json.loads(job.resultat)["fichier"] == f"{job_id}.2.txt"
+    assert os.listdir(tmp_path) == [f"{job_id}.2.txt"]
+    assert (tmp_path / f"{job_id}.2.txt").read_text() == "tentative 2"
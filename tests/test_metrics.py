@@ -0,0 +1,71 @@
+import json
+import os
+
+from app import metrics
+
+
+def _valeur(texte, ligne):
+    for courante in texte.splitlines():
+        if courante.startswith(ligne + " "):
+            return float(courante.rsplit(" ", 1)[1])
+    raise AssertionError(f"{ligne} absent")
+
+
+def test_latence_et_requetes_sql_par_route(auth_client):
+    for _ in range(3):
+        assert auth_client.get("/api/taches").status_code == 200
+    auth_client.get("/inexistante")
+
+    texte = auth_client.get("/metrics").data.decode()
+    route = 'endpoint="routes.api_taches"'
+    assert _valeur(
+        texte, f'http_requests_total{{{route},method="GET",status="200"}}'
+    ) == 3
+    assert _valeur(
+        texte, f'http_request_duration_seconds_count{{{route},method="GET"}}'
+    ) == 3
+    assert _valeur(
+        texte,
+        f'http_request_duration_seconds_bucket{{{route},method="GET",le="+Inf"}}',
+    ) == 3
+    # Chargement de l'utilisateur + liste des tâches
+    assert _valeur(texte, f"http_request_db_queries_sum{{{route}}}") >= 6
+    assert 'endpoint="<unmatched>",method="GET",status="404"' in texte
+    # La requête /metrics elle-même est en cours
+    assert _valeur(texte, "http_requests_in_flight") == 1
+
+
+def test_acces_par_jeton(app_db):
+    app_db.config["METRICS_TOKEN"] = "secret"
+    client = app_db.test_client()
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+
+
+def test_agregation_entre_workers(app_db, tmp_path):
+    app_db.test_client().get("/login")
+    autre = {
+        "counters": [
+            ["http_requests_total",
+             [["endpoint", "routes.login"], ["method", "GET"], ["status", "200"]], 4]
+        ],
+        "gauges": [["http_requests_in_flight", [], 2]],
+        "histograms": [],
+    }
+    (tmp_path / "worker-999999.json").write_text(json.dumps(autre))
+    ligne = (
+        'http_requests_total{endpoint="routes.login",method="GET",status="200"}'
+    )
+
+    texte = metrics.render(str(tmp_path))
+    assert _valeur(texte, ligne) == 5
+    assert _valeur(texte, "http_requests_in_flight") == 2
+
+    # Worker recyclé : ses compteurs restent, ses jauges disparaissent
+    metrics.mark_process_dead(str(tmp_path), 999999)
+    assert not os.path.exists(tmp_path / "worker-999999.json")
+    texte = metrics.render(str(tmp_path))
+    assert _valeur(texte, ligne) == 5
+    assert _valeur(texte, "http_requests_in_flight") == 0
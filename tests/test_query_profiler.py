@@ -0,0 +1,93 @@
+import logging
+
+import pytest
+
+from app import create_app, db, metrics, query_profiler
+from app.models import User
+
+
+def _app(**config):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "JOBS_ASYNC": False,
+        "METRICS_FOLDER": None,
+        **config,
+    })
+
+    @app.route("/test/utilisateurs")
+    def utilisateurs_un_par_un():
+        # Boucle typique d'une relation paresseuse : une requête par ligne
+        noms = [User.query.filter_by(id=i).first().username for i in range(1, 5)]
+        return {"noms": noms}
+
+    return app
+
+
+@pytest.fixture
+def profiled(request):
+    app = _app(**request.param)
+    metrics.registry.reset()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(User(username=f"u{i}", password="x") for i in range(4))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_empreinte_normalise_les_valeurs():
+    assert query_profiler.fingerprint(
+        "SELECT * FROM taches WHERE id IN (?, ?, ?) AND titre = 'a''b'  LIMIT 10"
+    ) == "SELECT * FROM taches WHERE id IN (?...) AND titre = ? LIMIT ?"
+    assert query_profiler.fingerprint(
+        "SELECT 1 FROM t WHERE a = %(a_1)s AND b = :b"
+    ) == "SELECT ? FROM t WHERE a = ? AND b = ?"
+
+
+@pytest.mark.parametrize(
+    "profiled", [{"QUERY_PROFILE_SAMPLE": 1.0, "QUERY_REPEAT_THRESHOLD": 3}],
+    indirect=True,
+)
+def test_requetes_repetees_signalees(profiled, caplog):
+    with caplog.at_level(logging.WARNING):
+        assert profiled.test_client().get("/test/utilisateurs").status_code == 200
+
+    alertes = [r.getMessage() for r in caplog.records if "N+1" in r.getMessage()]
+    assert len(alertes) == 1
+    assert "répétée 4 fois" in alertes[0]
+    assert "utilisateurs_un_par_un" in alertes[0]
+    assert metrics.registry.counters[
+        ("db_repeated_queries_total", (("endpoint", "utilisateurs_un_par_un"),))
+    ] == 1
+
+
+@pytest.mark.parametrize(
+    "profiled", [{"QUERY_PROFILE_SAMPLE": 0, "QUERY_SLOW_MS": 0}], indirect=True
+)
+def test_requetes_lentes_sans_echantillonnage(profiled, caplog):
+    with caplog.at_level(logging.WARNING):
+        profiled.test_client().get("/test/utilisateurs")
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert not any("N+1" in m for m in messages)
+    lentes = [m for m in messages if "lente" in m and "utilisateurs_un_par_un" in m]
+    assert len(lentes) == 4 and "FROM user WHERE user.id = ?" in lentes[0]
+
+
+@pytest.mark.parametrize(
+    "profiled", [{"QUERY_PROFILE_SAMPLE": 0, "QUERY_SLOW_MS": 0}], indirect=True
+)
+def test_traitement_de_masse_exempte(profiled, caplog):
+    connection = db.session.connection()
+    with caplog.at_level(logging.WARNING):
+        with query_profiler.exempt(connection):
+            connection.execute(
+                User.__table__.insert(),
+                [{"username": f"masse{i}", "password": "x"} for i in range(50)],
+            )
+        assert not any("lente" in r.getMessage() for r in caplog.records)
+        # Hors du bloc, la mesure reprend
+        User.query.count()
+    assert any("lente" in r.getMessage() for r in caplog.records)
@@ -1,13 +1,665 @@
+import hashlib
+import io
+import os
+import zipfile
+import zlib
+from datetime import datetime
+
 import pytest
-from app import create_app
+from app import budget_batch, create_app, db, summary
+from app.models import (
+    Budget, CollectionVersion, SummaryCounter, Tache, User, touch_collections,
+)
+
 
 @pytest.fixture
-def client():
-    app = create_app()
-    app.testing = True
+def client(tmp_path):
+    # Base jetable : jamais instance/projets.db
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'projets.db'}",
+    })
     return app.test_client()
 
+
 def test_home(client):
     # Suivre la redirection pour obtenir le code final
     response = client.get('/', follow_redirects=True)
     assert response.status_code == 200
+
+
+def test_add_and_complete_task(auth_client):
+    auth_client.post("/add_task", data={
+        "titre": "Inspection chantier",
+        "date": "2025-10-01",
+        "statut": "En cours",
+        "assignee": "Jean Dupont",
+    })
+    tache = Tache.query.filter_by(titre="Inspection chantier").one()
+
+    auth_client.post(f"/complete_task/{tache.id}")
+
+    response = auth_client.get("/api/taches")
+    assert response.get_json()["items"][0]["statut"] == "Terminé"
+
+
+def test_api_taches_keyset_pagination(auth_client):
+    for jour in range(1, 6):
+        db.session.add(Tache(
+            titre=f"Tâche {jour}",
+            date_limite=datetime(2025, 10, jour),
+            statut="En cours" if jour % 2 else "Terminé",
+        ))
+    db.session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"statut": "En cours", "sort": "-date_limite", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = auth_client.get("/api/taches", query_string=params).get_json()
+        seen += [item["titre"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == ["Tâche 5", "Tâche 3", "Tâche 1"]
+    assert auth_client.get("/api/taches?cursor=xyz").status_code == 400
+
+
+def test_api_budget_crud(auth_client):
+    response = auth_client.post("/api/budgets", json={
+        "nom": "Budget Éducation",
+        "montant": "300 000 Ariary",
+        "statut": "Planifié",
+        "date": "2025-04-01",
+    })
+    assert response.status_code == 201
+    budget_id = response.get_json()["id"]
+
+    response = auth_client.put(f"/api/budgets/{budget_id}", json={"statut": "Approuvé"})
+    assert response.get_json()["statut"] == "Approuvé"
+
+    auth_client.delete(f"/api/budgets/{budget_id}")
+    assert db.session.get(Budget, budget_id) is None
+
+
+def test_api_budgets_conditional_get(auth_client):
+    response = auth_client.get("/api/budgets")
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+
+    response = auth_client.get("/api/budgets", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    auth_client.post("/api/budgets", json={
+        "nom": "Budget Eau",
+        "montant": "90 000 Ariary",
+        "statut": "Planifié",
+        "date": "2025-05-01",
+    })
+    response = auth_client.get("/api/budgets", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    budget_id = response.get_json()["items"][0]["id"]
+    entity = auth_client.get(f"/api/budgets/{budget_id}")
+    auth_client.put(f"/api/budgets/{budget_id}", json={"statut": "Approuvé"})
+    response = auth_client.get(
+        f"/api/budgets/{budget_id}", headers={"If-None-Match": entity.headers["ETag"]}
+    )
+    assert response.status_code == 200
+    assert response.get_json()["statut"] == "Approuvé"
+
+
+def test_touch_collections_upsert(app_db):
+    # Première écriture puis suivantes : une seule instruction (ON CONFLICT)
+    for attendu in (1, 2, 3):
+        with db.engine.begin() as connection:
+            touch_collections(connection, ["nouvelle"])
+        assert db.session.get(CollectionVersion, "nouvelle").version == attendu
+        db.session.expire_all()
+
+    # Même principe pour les compteurs du tableau de bord
+    for attendu in (2, 4):
+        with db.engine.begin() as connection:
+            summary.apply_deltas(connection, {"essai:total": 2, "essai:nul": 0})
+        assert db.session.get(SummaryCounter, "essai:total").valeur == attendu
+        assert db.session.get(SummaryCounter, "essai:nul") is None
+        db.session.expire_all()
+
+
+def test_export_streams_csv_and_xlsx(auth_client):
+    for jour in range(1, 4):
+        db.session.add(Budget(
+            nom=f"Budget {jour}",
+            montant="10 000 Ariary",
+            statut="Approuvé" if jour < 3 else "Planifié",
+            date_allocation=datetime(2025, 1, jour),
+        ))
+    db.session.commit()
+
+    response = auth_client.get("/budgets/export?statut=Approuvé")
+    assert response.is_streamed
+    lines = response.get_data().decode("utf-8-sig").splitlines()
+    assert len(lines) == 3
+    assert lines[1].startswith("1;Budget 1;")
+
+    response = auth_client.get("/budgets/export?format=xlsx")
+    archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+    assert archive.testzip() is None
+    assert b"Budget 3" in archive.read("xl/worksheets/sheet1.xml")
+
+
+def test_export_neutralizes_formulas(auth_client):
+    db.session.add(Tache(
+        titre='=HYPERLINK("http://exemple.test","clic")',
+        date_limite=datetime(2025, 1, 1),
+        statut="En cours",
+        projet="@SUM(A1)",
+    ))
+    db.session.commit()
+
+    lines = auth_client.get("/taches/export").get_data().decode("utf-8-sig")
+    assert ";'=HYPERLINK(" in lines.replace('"', "") and ";'@SUM(A1)" in lines
+    response = auth_client.get("/taches/export?format=xlsx")
+    xlsx = zipfile.ZipFile(io.BytesIO(response.get_data()))
+    sheet = xlsx.read("xl/worksheets/sheet1.xml").decode()
+    assert "<t>'=HYPERLINK(" in sheet and "<t>=" not in sheet
+
+
+def test_streamed_export_returns_pooled_connection(tmp_path):
+    # Base fichier : pool de connexions réel (QueuePool), pas de StaticPool
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'export.db'}",
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username="admin", password="x", role="admin"))
+        db.session.add_all(
+            Budget(nom=f"Budget {i}", montant="1000", statut="Approuvé",
+                   date_allocation=datetime(2025, 1, 1))
+            for i in range(5)
+        )
+        db.session.commit()
+        db.session.remove()
+        pool = db.engine.pool
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = "1"
+        session["_fresh"] = True
+    for fmt in ("csv", "xlsx"):
+        response = client.get(f"/budgets/export?format={fmt}")
+        assert response.is_streamed
+        response.get_data()
+        response.close()
+        assert pool.checkedout() == 0, fmt
+
+
+def test_api_budgets_batch(auth_client):
+    existing = Budget(
+        nom="Budget Santé",
+        montant="750 000 Ariary",
+        statut="En cours",
+        date_allocation=datetime(2025, 2, 10),
+    )
+    doomed = Budget(
+        nom="Budget obsolète",
+        montant="1 Ariary",
+        statut="Planifié",
+        date_allocation=datetime(2025, 2, 10),
+    )
+    db.session.add_all([existing, doomed])
+    db.session.commit()
+    version = existing.version
+
+    creates = [
+        {"op": "create", "nom": f"Ligne {i}", "montant": "1 000 Ariary",
+         "statut": "Planifié", "date": "2025-06-01"}
+        for i in range(50)
+    ]
+    response = auth_client.post("/api/budgets/batch", json={"operations": creates + [
+        {"op": "update", "id": existing.id, "statut": "Approuvé"},
+        {"op": "delete", "id": doomed.id},
+    ]})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert (body["created"], body["updated"], body["deleted"]) == (50, 1, 1)
+    assert body["results"][0]["status"] == 201
+
+    db.session.expire_all()
+    assert db.session.get(Budget, existing.id).statut == "Approuvé"
+    assert db.session.get(Budget, existing.id).version == version + 1
+    assert db.session.get(Budget, doomed.id) is None
+    assert Budget.query.count() == 51
+    # Statistiques ajustées par incréments, sans dérive
+    compteurs = summary.counters()
+    assert compteurs["budgets:total"] == 51
+    assert compteurs["budgets:statut:Approuvé"] == 1
+    assert compteurs["budgets:montant"] == 750_000 + 50 * 1_000
+    assert summary.reconcile(db.session.connection(), ["budgets"]) == {}
+
+    response = auth_client.post("/api/budgets/batch", json={"operations": [
+        {"op": "create", "nom": "Incomplet"},
+        {"op": "update", "id": 9999, "statut": "Approuvé"},
+        {"op": "delete", "id": existing.id},
+        {"op": "update", "id": 9998, "nom": None},
+        {"op": "update", "id": 9997, "statut": 3},
+        {"op": "create", "nom": "X", "montant": "beaucoup", "statut": "Planifié",
+         "date": "2025-06-01"},
+        {"op": "update", "id": 9996, "nom": "x" * 201},
+    ]})
+    assert response.status_code == 400
+    erreurs = {}
+    for r in response.get_json()["results"]:
+        erreurs.setdefault(r["index"], []).append(r["error"])
+    assert sorted(erreurs) == [0, 3, 4, 5, 6]
+    assert "'nom' requis" in erreurs[3][0] and "'statut'" in erreurs[4][0]
+    assert "montant" in erreurs[5][0] and "trop long" in erreurs[6][0]
+    assert db.session.get(Budget, existing.id) is not None
+
+    # Existence vérifiée sur les lignes verrouillées, à l'application
+    response = auth_client.post("/api/budgets/batch", json={"operations": [
+        {"op": "create", "nom": "Lot", "montant": "1 000", "statut": "Planifié",
+         "date": "2025-06-01"},
+        {"op": "update", "id": 9999, "statut": "Approuvé"},
+        {"op": "delete", "id": existing.id},
+    ]})
+    assert response.status_code == 400
+    assert response.get_json()["results"] == [
+        {"index": 1, "op": "update", "id": 9999, "error": "Budget non trouvé"},
+    ]
+    assert Budget.query.count() == 51
+
+    # Budget supprimé entre la validation et l'application : lot rejeté
+    lot = budget_batch.validate([{"op": "update", "id": existing.id, "nom": "X"}])
+    db.session.delete(db.session.get(Budget, existing.id))
+    db.session.commit()
+    with pytest.raises(budget_batch.BatchRejected) as rejet:
+        budget_batch.apply(*lot[:3])
+    assert rejet.value.errors[0]["id"] == existing.id
+    db.session.rollback()
+
+
+def test_user_loader_cache(auth_client):
+    from app.models import load_user
+    from app.user_cache import cache
+
+    assert load_user("1").username == "admin"
+    assert load_user("1").role == "admin"
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"]) == (1, 1)
+
+    auth_client.post("/mot_de_passe_oublie", data={
+        "username": "admin", "new_password": "nouveau-secret",
+    })
+    assert cache.stats()["size"] == 0
+
+
+def test_login_rehashes_and_sheds_load(app_db):
+    from werkzeug.security import generate_password_hash
+    from app.hashing import pool
+
+    pool.configure(1, 0, 5.0, "pbkdf2:sha256:1000")
+    db.session.add(User(
+        username="agent",
+        password=generate_password_hash("secret", "pbkdf2:sha256:500"),
+    ))
+    db.session.commit()
+    client = app_db.test_client()
+
+    response = client.post("/login", data={"username": "agent", "password": "secret"})
+    assert response.status_code == 302
+    agent = User.query.filter_by(username="agent").one()
+    assert agent.password.startswith("pbkdf2:sha256:1000$")
+    assert pool.stats()["rehashed"] == 1
+
+    # Pool saturé : rejet immédiat en 429
+    client.get("/logout")
+    pool._slots.acquire()
+    response = client.post("/login", data={"username": "agent", "password": "secret"})
+    assert response.status_code == 429
+    assert pool.stats()["rejected"] == 1
+
+
+def test_login_short_hash_method_rehashes_once(app_db):
+    from werkzeug.security import generate_password_hash
+    from app.hashing import pool
+
+    # Nom court : Werkzeug stocke « scrypt:32768:8:1 »
+    pool.configure(1, 1, 5.0, "scrypt")
+    db.session.add(User(
+        username="agent",
+        password=generate_password_hash("secret", "pbkdf2:sha256:500"),
+    ))
+    db.session.commit()
+    client = app_db.test_client()
+
+    hashes = []
+    identifiants = {"username": "agent", "password": "secret"}
+    for _ in range(2):
+        response = client.post("/login", data=identifiants)
+        assert response.status_code == 302
+        client.get("/logout")
+        db.session.expire_all()
+        hashes.append(User.query.filter_by(username="agent").one().password)
+    assert hashes[0].startswith("scrypt:32768:8:1$") and hashes[1] == hashes[0]
+    assert pool.stats()["rehashed"] == 1
+
+
+def test_dashboard_summary_is_maintained_incrementally(
+    app_db, auth_client, tmp_path
+):
+    from app import summary
+    from app.models import Projet
+
+    app_db.config["DOCUMENTS_FOLDER"] = str(tmp_path)
+
+    auth_client.post("/add_task", data={
+        "titre": "Réception travaux", "date": "2025-10-01", "statut": "En cours",
+    })
+    tache = Tache.query.filter_by(titre="Réception travaux").one()
+    auth_client.post(f"/complete_task/{tache.id}")
+
+    db.session.add(Projet(
+        nom="Adduction d'eau", date_debut=datetime(2025, 1, 1), statut="En retard",
+        district="Vohibato", montant_prevu=200_000, montant_execute=150_000,
+    ))
+    db.session.commit()
+    projet = Projet.query.one()
+    # Objet expiré après commit : l'ancienne valeur est relue en base
+    projet.statut = "Terminé"
+    db.session.commit()
+
+    response = auth_client.post("/api/budgets", json={
+        "nom": "Budget Santé", "montant": "1 200 000 Ariary",
+        "statut": "Planifié", "date": "2025-04-01",
+    })
+    budget_id = response.get_json()["id"]
+    auth_client.put(f"/api/budgets/{budget_id}", json={"montant": "900 000"})
+    auth_client.post("/api/budgets/batch", json={"operations": [
+        {"op": "create", "nom": "Lot", "montant": "100 000", "statut": "Planifié",
+         "date": "2025-05-01"},
+    ]})
+    auth_client.post(f"/delete_project/{projet.id}")
+    documents = [
+        auth_client.post("/api/documents", data={
+            "titre": f"Rapport {i}", "type": "rapport",
+            "fichier": (io.BytesIO(b"texte"), "rapport.txt"),
+        }, content_type="multipart/form-data").get_json()["id"]
+        for i in range(2)
+    ]
+    auth_client.put(f"/api/documents/{documents[0]}", json={"type": "contrat"})
+    auth_client.delete(f"/api/documents/{documents[1]}")
+
+    counters = summary.counters()
+    assert counters["documents:total"] == 1
+    assert counters["documents:type:contrat"] == 1
+    assert counters["documents:type:rapport"] == 0
+    assert counters["taches:statut:Terminé"] == 1
+    assert counters["projets:total"] == 0
+    assert counters["budgets:montant"] == 1_000_000
+    # Les compteurs incrémentaux égalent un recalcul complet
+    assert summary.reconcile(db.session.connection()) == {}
+
+    stats = summary.dashboard_stats()
+    assert stats["total_budget"] == "1M"
+    assert stats["total_tasks"] == 1
+    assert stats["total_documents"] == 1
+    assert auth_client.get("/dashboard").status_code == 200
+
+
+def test_summary_reconcile_repairs_drift(app_db):
+    from app import summary
+
+    db.session.add(Budget(
+        nom="Budget", montant="2 400 000 000 Ar", statut="Approuvé",
+        date_allocation=datetime(2025, 1, 1),
+    ))
+    db.session.commit()
+    summary.apply_deltas(db.session.connection(), {"budgets:total": 5})
+    db.session.commit()
+
+    result = app_db.test_cli_runner().invoke(args=["summary-reconcile"])
+    assert "1 correction(s)" in result.output
+    assert summary.dashboard_stats()["total_budget"] == "2.4B"
+    assert summary.counters()["budgets:total"] == 1
+
+
+def test_api_points_bbox_and_clustering(auth_client):
+    import random
+
+    from app.models import Site
+
+    rng = random.Random(7)
+    sites = [
+        Site(nom=f"Site {i}", latitude=rng.uniform(-22.2, -21.0),
+             longitude=rng.uniform(46.5, 47.6), categorie="eau")
+        for i in range(300)
+    ]
+    db.session.add_all(sites)
+    db.session.commit()
+
+    bbox = (47.0, -21.6, 47.2, -21.4)
+    attendus = {
+        s.id for s in sites
+        if bbox[0] <= s.longitude <= bbox[2] and bbox[1] <= s.latitude <= bbox[3]
+    }
+    query = "bbox=" + ",".join(map(str, bbox))
+
+    data = auth_client.get(f"/api/points?{query}&zoom=15").get_json()
+    assert not data["clustered"]
+    assert {p["id"] for p in data["points"]} == attendus
+
+    # Faible zoom : groupes + points isolés couvrent exactement l'emprise
+    data = auth_client.get(f"/api/points?{query}&zoom=6").get_json()
+    assert data["clustered"] and data["clusters"]
+    total = len(data["points"]) + sum(c["count"] for c in data["clusters"])
+    assert total == len(attendus)
+
+    assert auth_client.get("/api/points?bbox=47,-21,46,-22").status_code == 400
+    assert auth_client.get(f"/api/points?{query}&zoom=40").status_code == 400
+
+
+def test_documents_upload_listing_and_ranged_download(app_db, auth_client, tmp_path):
+    app_db.config["DOCUMENTS_FOLDER"] = str(tmp_path)
+    contenu = b"%PDF-1.4 " + bytes(range(256)) * 4
+
+    for i in range(3):
+        response = auth_client.post("/api/documents", data={
+            "titre": f"Rapport {i}",
+            "type": "rapport",
+            "projet": "REF-2025-001",
+            "fichier": (io.BytesIO(contenu + bytes([i])), f"../rapport {i}.pdf"),
+        }, content_type="multipart/form-data")
+        assert response.status_code == 201
+    doc = response.get_json()
+    contenu += bytes([2])
+    assert doc["fichier"] == "rapport 2.pdf" and doc["taille"] == len(contenu)
+
+    refus = auth_client.post("/api/documents", data={
+        "titre": "Script",
+        "fichier": (io.BytesIO(b"x"), "script.sh"),
+    }, content_type="multipart/form-data")
+    assert refus.status_code == 400
+
+    page = auth_client.get("/api/documents?sort=-date_ajout&limit=2").get_json()
+    assert len(page["items"]) == 2 and page["next_cursor"]
+    suite = auth_client.get(
+        f"/api/documents?sort=-date_ajout&limit=2&cursor={page['next_cursor']}"
+    ).get_json()
+    assert len(suite["items"]) == 1 and suite["next_cursor"] is None
+
+    url = f"/documents/{doc['id']}/download"
+    response = auth_client.get(url)
+    assert response.data == contenu
+    assert auth_client.get(
+        url, headers={"If-None-Match": response.headers["ETag"]}
+    ).status_code == 304
+    partiel = auth_client.get(url, headers={"Range": "bytes=100-199"})
+    assert partiel.status_code == 206 and partiel.data == contenu[100:200]
+
+    from app.models import Document
+
+    chemin = tmp_path / db.session.get(Document, doc["id"]).chemin
+    # Hors du délai de grâce des fichiers récents
+    os.utime(chemin, (0, 0))
+    assert auth_client.delete(f"/api/documents/{doc['id']}").status_code == 200
+    assert not chemin.exists()
+
+
+def test_document_download_ignores_declared_content_type(
+    app_db, auth_client, tmp_path
+):
+    app_db.config["DOCUMENTS_FOLDER"] = str(tmp_path)
+    envois = [
+        ("note.txt", "text/html", "text/plain", "inline"),
+        ("tableau.xlsx", "text/html", "application/vnd.openxmlformats", "attachment"),
+    ]
+    for nom, annonce, attendu, disposition in envois:
+        fichier = (io.BytesIO(b"<script>alert(1)</script>"), nom, annonce)
+        doc = auth_client.post("/api/documents", data={
+            "titre": nom, "fichier": fichier,
+        }, content_type="multipart/form-data").get_json()
+        assert doc["mime_type"].startswith(attendu)
+
+        response = auth_client.get(f"/documents/{doc['id']}/download")
+        assert response.mimetype.startswith(attendu)
+        assert response.headers["Content-Disposition"].startswith(disposition)
+        assert response.headers["X-Content-Type-Options"] == "nosniff"
+
+
+def test_chunked_upload_resumes_and_deduplicates(app_db, auth_client, tmp_path):
+    app_db.config["DOCUMENTS_FOLDER"] = str(tmp_path)
+    contenu = os.urandom(250_000)
+    empreinte = hashlib.sha256(contenu).hexdigest()
+
+    upload = auth_client.post("/api/documents/uploads", json={
+        "nom": "scan.pdf", "taille": len(contenu),
+    }).get_json()
+    url = f"/api/documents/uploads/{upload['id']}"
+
+    def envoyer(debut, fin):
+        return auth_client.put(url, data=contenu[debut:fin], headers={
+            "Content-Range": f"bytes {debut}-{fin - 1}/{len(contenu)}",
+        })
+
+    assert envoyer(0, 100_000).get_json()["recu"] == 100_000
+    # Morceau rejoué après une coupure : le serveur indique où reprendre
+    conflit = envoyer(0, 100_000)
+    assert conflit.status_code == 409 and conflit.get_json()["recu"] == 100_000
+    assert auth_client.post(f"{url}/commit", json={"titre": "Scan"}).status_code == 400
+
+    assert auth_client.get(url).get_json()["recu"] == 100_000
+    assert envoyer(100_000, len(contenu)).get_json()["complet"]
+    doc = auth_client.post(f"{url}/commit", json={
+        "titre": "Scan", "type": "technique",
+    }).get_json()
+    assert auth_client.get(f"/documents/{doc['id']}/download").data == contenu
+    assert auth_client.get(url).status_code == 404
+
+    # Même contenu annoncé par son empreinte : aucun morceau à envoyer
+    doublon = auth_client.post("/api/documents/uploads", json={
+        "nom": "copie.pdf", "taille": len(contenu), "sha256": empreinte,
+    }).get_json()
+    assert doublon["complet"]
+    copie = auth_client.post(
+        f"/api/documents/uploads/{doublon['id']}/commit", json={"titre": "Copie"}
+    ).get_json()
+    # Même contenu par formulaire classique : fichier partagé également
+    auth_client.post("/api/documents", data={
+        "titre": "Re-scan", "fichier": (io.BytesIO(contenu), "rescan.pdf"),
+    }, content_type="multipart/form-data")
+
+    from app.models import Document
+
+    assert {d.chemin for d in Document.query} == {
+        db.session.get(Document, copie["id"]).chemin
+    }
+    fichiers = [p for p in tmp_path.rglob("*") if p.is_file()]
+    assert [p.name for p in fichiers] == [empreinte]
+
+
+def _docx(texte):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("word/document.xml", (
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/'
+            'wordprocessingml/2006/main"><w:body><w:p><w:r><w:t>'
+            f"{texte}</w:t></w:r></w:p></w:body></w:document>"
+        ))
+    data.seek(0)
+    return data
+
+
+def test_document_search_index_is_incremental(app_db, auth_client, tmp_path):
+    from app import jobs
+    from app.models import Job
+
+    app_db.config["DOCUMENTS_FOLDER"] = str(tmp_path)
+    flux = zlib.compress(b"BT /F1 12 Tf (Forage du puits de Vohibato) Tj ET")
+    pdf = b"%PDF-1.4\n1 0 obj << /Filter /FlateDecode >>\nstream\n" + flux
+    pdf += b"\nendstream\nendobj\n%%EOF"
+    contrat = _docx("Réhabilitation de l'école d'Ambalavao")
+    envois = [
+        ("Rapport forage", (io.BytesIO(pdf), "forage.pdf")),
+        ("Contrat école", (contrat, "ecole.docx")),
+        ("Notes", (io.BytesIO("Réunion <chantier> école".encode()), "notes.txt")),
+    ]
+    ids = []
+    for titre, fichier in envois:
+        ids.append(auth_client.post("/api/documents", data={
+            "titre": titre, "type": "rapport", "fichier": fichier,
+        }, content_type="multipart/form-data").get_json()["id"])
+
+    # Métadonnées cherchables dès l'envoi, contenu après l'extraction
+    assert auth_client.get("/api/documents/search?q=forage").get_json()["items"]
+    assert not auth_client.get("/api/documents/search?q=puits").get_json()["items"]
+    assert jobs.run_pending() == 1
+    assert Job.query.one().to_dict()["resultat"] == {"documents": 3}
+
+    page = auth_client.get("/api/documents/search?q=Vohibato").get_json()
+    assert [d["id"] for d in page["items"]] == [ids[0]]
+    assert "<mark>Vohibato</mark>" in page["items"][0]["extrait"]
+
+    # Accents ignorés, préfixe sur le dernier terme, titre mieux classé
+    page = auth_client.get("/api/documents/search?q=ecol&limit=1").get_json()
+    assert [d["id"] for d in page["items"]] == [ids[1]] and page["next_offset"] == 1
+    suite = auth_client.get("/api/documents/search?q=ecol&offset=1").get_json()
+    assert [d["id"] for d in suite["items"]] == [ids[2]]
+    assert "&lt;chantier&gt;" in suite["items"][0]["extrait"]
+
+    auth_client.put(f"/api/documents/{ids[2]}", json={"titre": "Compte rendu"})
+    assert auth_client.get("/api/documents/search?q=compte").get_json()["items"]
+    auth_client.delete(f"/api/documents/{ids[0]}")
+    assert not auth_client.get("/api/documents/search?q=Vohibato").get_json()["items"]
+    assert auth_client.get("/api/documents/search?q=%22").status_code == 400
+
+    # Progression réelle du travail de fond (document par document)
+    from app import search
+
+    class Suivi:
+        def __init__(self):
+            self.etapes = []
+
+        def progress(self, pourcentage, message=None, force=False):
+            self.etapes.append((round(pourcentage), message))
+
+    search.rebuild()
+    suivi = Suivi()
+    assert search.index_job(suivi) == {"documents": 2}
+    assert suivi.etapes == [(50, "1/2 document(s)"), (100, "2/2 document(s)")]
+
+    # Traitement actif jamais réclamé par un second indexeur ; abandonné, si
+    from app.models import DocumentIndex
+
+    ligne = db.session.get(DocumentIndex, ids[1])
+    ligne.statut, ligne.updated_at = search.EN_COURS, datetime.utcnow()
+    db.session.commit()
+    assert not search._claim(ids[1])
+    ligne.updated_at = datetime.utcnow() - search.STALE_AFTER * 2
+    db.session.commit()
+    assert search._claim(ids[1])
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+from app import create_app
+from app.models import Tache, User
+
+
+def test_create_app_ne_charge_pas_pandas():
+    # Démarrage à froid (worker gunicorn, Vercel) : pandas reste différé
+    code = (
+        "import sys; from app import create_app; create_app(); "
+        "print('lourds=' + ','.join("
+        "m for m in ('pandas', 'numpy') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip().splitlines()[-1] == "lourds="
+
+
+def test_bootstrap_command_is_idempotent():
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    runner = app.test_cli_runner()
+
+    with app.app_context():
+        assert runner.invoke(args=["bootstrap"]).exit_code == 0
+        result = runner.invoke(args=["bootstrap", "--sans-demo"])
+        assert result.exit_code == 0
+        assert "existe déjà" in result.output
+        assert User.query.count() == 1
+        assert Tache.query.count() > 0
@@ -0,0 +1,64 @@
+from app import create_app, db, summary, synthetic
+from app.models import Budget, Projet, Site, Tache
+from app.spatial import cell_of
+
+
+def _app():
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_jeu_synthetique_coherent():
+    app = _app()
+    with app.app_context():
+        volumes = synthetic.generate(
+            taches=500, projets=40, budgets=60, sites=200, seed=7, batch_size=64
+        )
+        db.session.commit()
+        assert volumes == {"projets": 40, "taches": 500, "budgets": 60, "sites": 200}
+
+        projets = {p.nom: p for p in Projet.query}
+        assert len(projets) == 40
+        assert {t.projet for t in Tache.query} <= projets.keys()
+        assert {b.projet_associe for b in Budget.query} <= projets.keys()
+
+        sites = Site.query.all()
+        ouest, sud, est, nord = synthetic.BBOX
+        for site in sites:
+            assert sud <= site.latitude <= nord and ouest <= site.longitude <= est
+            assert site.cellule == cell_of(site.latitude, site.longitude)
+            # Placé dans l'emprise (rectangle) du district de son projet
+            assert site.district == projets[site.projet].district
+
+        stats = summary.dashboard_stats()
+        assert (stats["total_tasks"], stats["total_projects"]) == (500, 40)
+        assert stats["total_sites"] == 200
+        assert summary.reconcile(db.session.connection()) == {}
+
+
+def test_graine_reproductible_et_vidage():
+    premier, second = _app(), _app()
+    lignes = []
+    for app in (premier, second):
+        with app.app_context():
+            synthetic.generate(taches=50, projets=5, sites=10, seed=3)
+            db.session.commit()
+            lignes.append([(t.titre, t.date_limite, t.assignee) for t in Tache.query])
+    assert lignes[0] == lignes[1]
+
+    runner = premier.test_cli_runner()
+    result = runner.invoke(
+        args=["synthetic-data", "--vider", "--taches", "20", "--projets", "0",
+              "--budgets", "0", "--sites", "0"]
+    )
+    assert result.exit_code != 0 and "Aucun projet" in result.output
+
+    result = runner.invoke(
+        args=["synthetic-data", "--vider", "--taches", "20", "--projets", "3",
+              "--budgets", "0", "--sites", "0"]
+    )
+    assert result.exit_code == 0, result.output
+    with premier.app_context():
+        assert Tache.query.count() == 20 and Projet.query.count() == 3